@@ -0,0 +1,116 @@
+# bench/bench_commoncrawl.py
+# Common Crawl discovery throughput on a synthetic local crawl: a WARC of mostly unrelated pages
+# plus OpenTable venue pages and Resy search pages, with its CDX shard and cluster.idx.
+# Compares a streaming WARC scan, a CDX shard scan and the cluster.idx lookup.
+# Run from the repo root: python -m bench.bench_commoncrawl --records 20000
+import argparse
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from bench.fixture_server import resy_page
+from pipeline.commoncrawl import surt
+from restaurants.discover_commoncrawl import iter_commoncrawl_restaurants
+
+WARC_PATH = 'crawl-data/CC-MAIN-SAMPLE/segments/0/warc/sample-00000.warc.gz'
+CDX_BLOCK_LINES = 3000  # Common Crawl's own block size
+
+
+def venue_page(i, noise=200):
+    venue = {'@context': 'https://schema.org', '@type': 'Restaurant', 'name': f"Restaurant {i}",
+             'address': {'streetAddress': f"{100 + i} Main St", 'addressLocality': 'Dallas',
+                         'addressRegion': 'TX', 'postalCode': '75201'},
+             'telephone': f"214-555-{i % 10000:04d}", 'servesCuisine': ['Steakhouse'], 'priceRange': '$$$$',
+             'geo': {'latitude': 32.78, 'longitude': -96.80}}
+    filler = ''.join(f'<p>Review {j}</p>' for j in range(noise))
+    return (f'<html><head><meta property="og:title" content="Restaurant {i} - Dallas, TX">'
+            f'<script type="application/ld+json">{json.dumps(venue)}</script></head>'
+            f'<body>{filler}</body></html>')
+
+
+def other_page(i, noise=200):
+    return '<html><body>' + ''.join(f'<div><p>Item {i}-{j}</p></div>' for j in range(noise)) + '</body></html>'
+
+
+def sample_pages(records, match_every):
+    for i in range(records):
+        if i % match_every == 0:
+            yield f"https://www.opentable.com/r/restaurant-{i}-dallas", venue_page(i)
+        elif i % match_every == 1:
+            yield f"https://resy.com/cities/dal/search?page={i}", resy_page(i, cards=20, noise=100)
+        else:
+            tld = 'com' if i % 2 else 'org'
+            yield f"https://site{i % 500}.example.{tld}/page/{i}", other_page(i)
+
+
+def warc_member(url, html):
+    body = html.encode('utf-8')
+    http = (b'HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n'
+            + f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    head = (f"WARC/1.0\r\nWARC-Type: response\r\nWARC-Date: 2024-03-01T12:00:00Z\r\n"
+            f"WARC-Target-URI: {url}\r\nContent-Type: application/http; msgtype=response\r\n"
+            f"Content-Length: {len(http)}\r\n\r\n").encode()
+    return gzip.compress(head + http + b'\r\n\r\n')
+
+
+def write_sample_crawl(directory, records, match_every):
+    """WARC + CDX shard (+ cluster.idx) under directory, returns (warc_dir, cdx_dir)"""
+    warc_dir, cdx_dir = os.path.join(directory, 'warc'), os.path.join(directory, 'cdx')
+    os.makedirs(os.path.dirname(os.path.join(warc_dir, WARC_PATH)))
+    os.makedirs(cdx_dir)
+    captures = []
+    with open(os.path.join(warc_dir, WARC_PATH), 'wb') as f:
+        for url, html in sample_pages(records, match_every):
+            member = warc_member(url, html)
+            capture = {'url': url, 'mime': 'text/html', 'status': '200', 'length': str(len(member)),
+                       'offset': str(f.tell()), 'filename': WARC_PATH}
+            captures.append(f"{surt(url)} 20240301120000 {json.dumps(capture)}\n")
+            f.write(member)
+
+    captures.sort()
+    with open(os.path.join(cdx_dir, 'cdx-00000.gz'), 'wb') as shard, \
+            open(os.path.join(cdx_dir, 'cluster.idx'), 'w') as index:
+        for number, start in enumerate(range(0, len(captures), CDX_BLOCK_LINES)):
+            block = captures[start:start + CDX_BLOCK_LINES]
+            member = gzip.compress(''.join(block).encode('utf-8'))
+            key = ' '.join(block[0].split(' ', 2)[:2])
+            index.write(f"{key}\tcdx-00000.gz\t{shard.tell()}\t{len(member)}\t{number}\n")
+            shard.write(member)
+    return warc_dir, cdx_dir
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=20000, help="WARC records in the sample crawl")
+    parser.add_argument('--match-every', type=int, default=50, help="1 in N records is a platform page")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        warc_dir, cdx_dir = write_sample_crawl(directory, args.records, args.match_every)
+        size = os.path.getsize(os.path.join(warc_dir, WARC_PATH)) / 1024 ** 2
+        print(f"Sample crawl: {args.records} WARC records, {size:.1f} MB compressed")
+
+        no_index_dir = os.path.join(directory, 'cdx-no-index')
+        shutil.copytree(cdx_dir, no_index_dir)
+        os.remove(os.path.join(no_index_dir, 'cluster.idx'))
+        modes = {
+            'warc-scan': os.path.join(directory, 'no-cdx'),
+            'cdx-scan': no_index_dir,
+            'cdx-indexed': cdx_dir
+        }
+        for mode, mode_cdx_dir in modes.items():
+            started = time.perf_counter()
+            restaurants = sum(1 for _ in iter_commoncrawl_restaurants('dallas', mode_cdx_dir, warc_dir))
+            elapsed = time.perf_counter() - started
+            print(f"{mode:12s} {elapsed:7.2f}s  {args.records / elapsed:10,.0f} crawl records/sec  "
+                  f"{restaurants} restaurants")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
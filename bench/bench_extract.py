@@ -0,0 +1,70 @@
+# bench/bench_extract.py
+# Parse ms/page and peak RSS for the old BeautifulSoup lambda scan vs the compiled-selector paths.
+# Each path runs in its own subprocess so peak RSS is not shared. Run: python -m bench.bench_extract
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from bench.fixture_server import listing_page
+
+PATHS = ['bs4', 'lxml', 'lxml-stream']
+
+
+def extract_bs4(page):
+    """The previous scrape_opentable path: full html.parser tree + lambda on every div"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(page, 'html.parser')
+    return soup.find_all('div', class_=lambda x: x and 'restaurant' in x.lower())
+
+
+def run_child(path, pages, cards, noise):
+    from pipeline.extract import extract_listings
+
+    parsers = {
+        'bs4': extract_bs4,
+        'lxml': lambda page: extract_listings('opentable', page),
+        'lxml-stream': lambda page: extract_listings('opentable', page, streaming=True),
+    }
+    documents = [listing_page(page, cards, noise).encode('utf-8') for page in range(pages)]
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    started = time.perf_counter()
+    found = sum(len(parsers[path](document)) for document in documents)
+    elapsed = time.perf_counter() - started
+
+    print(json.dumps({
+        'path': path,
+        'ms_per_page': elapsed * 1000 / pages,
+        'records': found,
+        'peak_rss_delta_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_rss
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('--cards', type=int, default=50)
+    parser.add_argument('--noise', type=int, default=2000, help='nav/footer nodes around the listing')
+    parser.add_argument('--child', choices=PATHS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.pages, args.cards, args.noise)
+        return
+
+    for path in PATHS:
+        output = subprocess.run(
+            [sys.executable, '-m', 'bench.bench_extract', '--child', path,
+             '--pages', str(args.pages), '--cards', str(args.cards), '--noise', str(args.noise)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output)
+        print(f"{path:12s} {result['ms_per_page']:8.2f} ms/page  "
+              f"{result['peak_rss_delta_kb']:8d} KB peak RSS delta  {result['records']} records")
+
+
+if __name__ == "__main__":
+    main()
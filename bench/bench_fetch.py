@@ -0,0 +1,49 @@
+# bench/bench_fetch.py
+# Compares the old blocking loop (requests.get + sleep) with the async fetch engine
+# against a local stand-in server. Run from the repo root: python -m bench.bench_fetch
+import argparse
+import time
+
+import requests
+
+from bench.fixture_server import start_fixture_server
+from pipeline.fetch import fetch_all
+
+
+def run_blocking(urls, sleep):
+    """The original scraper loop"""
+    for url in urls:
+        requests.get(url)
+        time.sleep(sleep)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=40)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--sleep', type=float, default=2.0, help='sleep used by the blocking loop')
+    parser.add_argument('--rate', type=float, default=20.0, help='engine token bucket rate per host')
+    parser.add_argument('--per-host', type=int, default=8)
+    args = parser.parse_args()
+
+    server, base_url = start_fixture_server(latency=args.latency)
+    urls = [f"{base_url}/location/dallas-restaurants?page={page}" for page in range(1, args.pages + 1)]
+
+    # The blocking loop is slow by design, so only time a handful of pages
+    sample = urls[:min(5, len(urls))]
+    started = time.perf_counter()
+    run_blocking(sample, args.sleep)
+    blocking_rate = len(sample) / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    results = fetch_all(urls, rate=args.rate, burst=args.per_host, per_host=args.per_host)
+    engine_rate = len(urls) / (time.perf_counter() - started)
+    errors = sum(1 for r in results if r['error'])
+
+    server.shutdown()
+    print(f"Blocking loop: {blocking_rate:.2f} pages/sec")
+    print(f"Fetch engine:  {engine_rate:.2f} pages/sec ({errors} errors)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# bench/bench_importtime.py
+# Cold-start cost of the entry points: `python -X importtime` per module in a fresh interpreter
+# (total import time + the heaviest top-level imports) and wall time of `cli.py --help`.
+# Run from the repo root: python -m bench.bench_importtime [--runs 5] [--top 5]
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# What a short job on a worker actually imports before doing any work
+TARGETS = ['cli', 'main', 'pipeline.workqueue', 'pipeline.metrics', 'crawl_worker', 'enrich_with_apis_fixed']
+OWN_PACKAGES = {'bench', 'causes', 'cli', 'configs', 'creators', 'crawl_worker', 'enrich_with_apis_fixed', 'main',
+                'pipeline', 'restaurants'}
+
+
+def _importtime(code):
+    """[(module, cumulative ms)] from `python -X importtime -c code`"""
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, check=True).stderr
+    entries = []
+    for line in stderr.splitlines():
+        if line.startswith('import time:') and 'cumulative' not in line:
+            _, cumulative, name = line[len('import time:'):].split('|')
+            entries.append((name.strip(), int(cumulative) / 1000))
+    return entries
+
+
+def import_times(module, startup):
+    """(total ms, {dependency: ms}) for one import in a fresh interpreter
+
+    Dependencies are top-level packages outside this repo (and not already loaded by
+    interpreter startup), charged their largest cumulative time in the import tree.
+    """
+    total, dependencies = 0.0, {}
+    for name, ms in _importtime(f"import {module}"):
+        if name == module:
+            total = ms
+        package = name.split('.')[0]
+        if package not in OWN_PACKAGES and name not in startup:
+            dependencies[package] = max(dependencies.get(package, 0), ms)
+    return total, dependencies
+
+
+def cli_help_seconds(runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, 'cli.py', '--help'], capture_output=True, check=True)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5, help="`cli.py --help` runs (median is reported)")
+    parser.add_argument('--top', type=int, default=5, help="heaviest imports shown per module")
+    parser.add_argument('--modules', nargs='*', default=TARGETS)
+    args = parser.parse_args()
+
+    startup = {name for name, _ in _importtime('pass')}
+    for module in args.modules:
+        total, dependencies = import_times(module, startup)
+        heaviest = sorted(dependencies.items(), key=lambda item: item[1], reverse=True)[:args.top]
+        print(f"{module:24s} {total:8.1f} ms   " + ', '.join(f"{name} {ms:.0f}" for name, ms in heaviest))
+    print(f"\ncli.py --help wall time (median of {args.runs}): {cli_help_seconds(args.runs) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
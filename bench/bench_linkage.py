@@ -0,0 +1,91 @@
+# bench/bench_linkage.py
+# Throughput and match quality of pipeline/linkage.py on synthetic data with planted duplicates.
+# Run from the repo root: python -m bench.bench_linkage --rows 100000
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from pipeline.linkage import link_records
+
+WORDS = ['oak', 'ember', 'uchi', 'monarch', 'hearth', 'gemma', 'pappas', 'grille', 'fearing', 'tei',
+         'lark', 'mesa', 'sable', 'copper', 'olive', 'saffron', 'juniper', 'harbor', 'willow', 'cedar',
+         'bistro', 'kitchen', 'table', 'house', 'tavern', 'cantina', 'trattoria', 'chop', 'social', 'prime']
+STREETS = ['Maple Ave', 'McKinney Ave', 'Henderson Ave', 'Elm St', 'Main St', 'Lovers Ln', 'Oak Lawn Ave',
+           'Greenville Ave', 'Routh St', 'Market Center Blvd', 'Lombardy Ln', 'Crescent Ct']
+LONG_FORMS = {'Ave': 'Avenue', 'St': 'Street', 'Ln': 'Lane', 'Blvd': 'Boulevard', 'Ct': 'Court'}
+
+
+def typo(text, rng):
+    if len(text) < 4:
+        return text
+    i = rng.randrange(1, len(text) - 1)
+    return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+
+
+def variant(row, rng):
+    """A messy second sighting of the same restaurant from another source"""
+    name, address = row['name'], row['address']
+    change = rng.random()
+    if change < 0.25:
+        name = f"{name} Restaurant"
+    elif change < 0.45:
+        name = f"{name}™"
+    elif change < 0.7:
+        name = typo(name, rng)
+    if rng.random() < 0.5:
+        street = address.split(',')[0]
+        for short, long in LONG_FORMS.items():
+            street = street.replace(f" {short}", f" {long}")
+        address = ', '.join([street] + address.split(',')[1:])
+    return {**row, 'name': name, 'address': address,
+            'lat': row['lat'] + rng.uniform(-0.0002, 0.0002), 'lng': row['lng'] + rng.uniform(-0.0002, 0.0002)}
+
+
+def synthetic_restaurants(rows, duplicate_rate=0.3, seed=1):
+    rng = random.Random(seed)
+    originals = int(rows / (1 + duplicate_rate))
+    records = []
+    for entity in range(originals):
+        records.append({
+            'entity': entity,
+            'name': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 3))).title(),
+            'address': f"{rng.randint(100, 19999)} {rng.choice(STREETS)}, Dallas, TX 752{rng.randint(0, 99):02d}",
+            'lat': 32.6 + rng.random() * 0.4,
+            'lng': -97.0 + rng.random() * 0.4
+        })
+    records += [variant(rng.choice(records[:originals]), rng) for _ in range(rows - originals)]
+    rng.shuffle(records)
+    return pd.DataFrame(records)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    df = synthetic_restaurants(args.rows)
+    started = time.perf_counter()
+    canonical, annotated, stats = link_records(df.drop(columns=['entity']))
+    elapsed = time.perf_counter() - started
+
+    # Pairwise precision/recall of the clustering against the planted entities
+    truth = df['entity'].to_numpy()
+    clusters = annotated['cluster_id'].to_numpy()
+    true_pairs = sum(c * (c - 1) // 2 for c in pd.Series(truth).value_counts())
+    found = pd.DataFrame({'cluster': clusters, 'entity': truth})
+    found_pairs = sum(c * (c - 1) // 2 for c in found['cluster'].value_counts())
+    correct_pairs = sum(c * (c - 1) // 2 for c in found.value_counts())
+
+    print(f"Rows:             {stats['rows']}")
+    print(f"Candidate pairs:  {stats['candidate_pairs']} (naive pairwise: {args.rows * (args.rows - 1) // 2})")
+    print(f"Elapsed:          {elapsed:.2f}s  ({stats['rows'] / elapsed:,.0f} rows/sec, "
+          f"{stats['candidate_pairs'] / elapsed:,.0f} pairs/sec)")
+    print(f"Clusters:         {stats['clusters']} (true entities: {df['entity'].nunique()})")
+    print(f"Pair precision:   {correct_pairs / max(found_pairs, 1):.3f}")
+    print(f"Pair recall:      {correct_pairs / max(true_pairs, 1):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# bench/bench_querystore.py
+# Client-delivery filters over synthetic clean outputs: reading the Parquet and filtering in pandas
+# on every question vs the indexed SQLite query store loaded once.
+# Run from the repo root: python -m bench.bench_querystore --restaurants 200000 --creators 200000
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from bench.bench_tiers import synthetic_creators
+from creators.tiers import assign_tiers
+from pipeline.columnar import write_dataset
+from pipeline.querystore import QueryStore
+
+NEIGHBORHOODS = ['Uptown', 'Deep Ellum', 'Bishop Arts', 'Downtown', 'Knox/Henderson', 'Design District',
+                 'Lower Greenville', 'Oak Lawn', 'Preston Hollow', 'Victory Park']
+CUISINES = ['Steakhouse', 'Italian', 'Tex-Mex', 'Seafood', 'Sushi', 'BBQ', 'French', 'New American', 'Thai', 'Indian']
+PRICE_BANDS = ['$', '$$', '$$$ (Upscale)', '$$$$ (Fine Dining)']
+PLATFORMS = ['OpenTable', 'Resy', 'Tock', 'Yelp']
+
+
+def synthetic_restaurants(rows, seed=3):
+    rng = np.random.default_rng(seed)
+    cuisines = rng.choice(CUISINES, (rows, 2))
+    return pd.DataFrame({
+        'name': [f"Restaurant {i}" for i in range(rows)],
+        'address': [f"{100 + i} Main St, Dallas, TX 75201" for i in range(rows)],
+        'reservation_platform': rng.choice(PLATFORMS, rows),
+        'price_band': rng.choice(PRICE_BANDS, rows, p=[0.3, 0.4, 0.2, 0.1]),
+        'cuisine_tags': [f"{a}, {b}" if a != b else a for a, b in cuisines],
+        'neighborhood': rng.choice(NEIGHBORHOODS, rows),
+        'rating': np.round(rng.uniform(3, 5, rows), 1),
+        'review_count': rng.integers(0, 5000, rows)
+    })
+
+
+def timed(function, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - started)
+    return result, statistics.median(times) * 1000
+
+
+def pandas_steakhouses(path):
+    df = pd.read_parquet(path)
+    return df[(df['neighborhood'] == 'Uptown') & (df['price_band'] == '$$$$ (Fine Dining)')
+              & (df['reservation_platform'] == 'Resy')
+              & df['cuisine_tags'].str.split(', ').map(lambda tags: 'Steakhouse' in tags)]
+
+
+def pandas_vip_creators(path):
+    df = pd.read_parquet(path)
+    return df[(df['tier'] == 'VIP') & (df['audience_location_pct'] >= 0.4)]
+
+
+def pandas_handle(path, handle):
+    df = pd.read_parquet(path)
+    return df[df['handle'] == handle]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--restaurants', type=int, default=200000)
+    parser.add_argument('--creators', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        restaurants = write_dataset(synthetic_restaurants(args.restaurants), 'restaurants', 'clean',
+                                    source='enriched', root=root)
+        creators = write_dataset(assign_tiers(synthetic_creators(args.creators)), 'creators', 'clean',
+                                 source='instagram_hashtags', root=root)
+        store = QueryStore(os.path.join(root, 'query.sqlite'))
+        started = time.perf_counter()
+        loads = [load for load in store.load_all(root) if load['rows']]
+        loaded = ', '.join(f"{load['rows']} {load['dataset']}" for load in loads)
+        print(f"Load: {loaded} in {time.perf_counter() - started:.2f}s")
+        started = time.perf_counter()
+        store.load_all(root)
+        print(f"Reload with unchanged outputs: {(time.perf_counter() - started) * 1000:.1f} ms\n")
+
+        handle = f"@creator{args.creators // 2}"
+        questions = [
+            ("$$$$ steakhouses in Uptown on Resy",
+             lambda: pandas_steakhouses(restaurants),
+             lambda: store.find('restaurants', neighborhood='uptown', price_band='$$$$', cuisine='Steakhouse',
+                                reservation_platform='Resy')),
+            ("VIP creators with >=40% DFW audience",
+             lambda: pandas_vip_creators(creators),
+             lambda: store.find('creators', tier='VIP', audience_location_pct__gte=0.4)),
+            ("  same, handle + followers + email",
+             lambda: pandas_vip_creators(creators)[['handle', 'followers', 'email']],
+             lambda: store.find('creators', columns=['handle', 'followers', 'email'], tier='VIP',
+                                audience_location_pct__gte=0.4)),
+            ("one creator by handle",
+             lambda: pandas_handle(creators, handle),
+             lambda: store.find('creators', handle=handle)),
+            ("acceptance checks",
+             lambda: None,
+             store.checks)
+        ]
+        print(f"{'question':38s} {'rows':>7s} {'parquet+pandas':>15s} {'query store':>12s}")
+        for label, scan, query in questions:
+            expected, scan_ms = timed(scan, args.repeat)
+            rows, query_ms = timed(query, args.repeat)
+            if expected is not None and len(expected) != len(rows):
+                raise AssertionError(f"{label}: pandas found {len(expected)} rows, the store {len(rows)}")
+            scan_column = f"{scan_ms:12.1f} ms" if expected is not None else f"{'-':>15s}"
+            print(f"{label:38s} {len(rows):7d} {scan_column} {query_ms:9.2f} ms")
+        print()
+        print('\n'.join(store.plan('restaurants', neighborhood='Uptown', price_band='$$$$', cuisine='Steakhouse',
+                                   reservation_platform='Resy')))
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
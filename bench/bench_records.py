@@ -0,0 +1,74 @@
+# bench/bench_records.py
+# Memory and Arrow conversion cost of a buffered chunk: scraper dicts through the pandas path
+# vs slotted RestaurantRecords converted column by column.
+# Run from the repo root: python -m bench.bench_records --records 100000
+import argparse
+import gc
+import time
+import tracemalloc
+
+from pipeline.columnar import to_table
+from pipeline.records import RestaurantRecord
+
+CUISINES = ['Steakhouse', 'Italian', 'Tex-Mex', 'Seafood', 'Sushi', 'BBQ']
+PRICE_BANDS = ['$', '$$', '$$$ (Upscale)', '$$$$ (Fine Dining)']
+NEIGHBORHOODS = ['Uptown', 'Deep Ellum', 'Bishop Arts', 'Downtown', 'Knox-Henderson']
+
+
+def sample_dicts(records):
+    """Shaped like extract_listings output, including the string-typed numbers"""
+    return [{
+        'name': f"Restaurant {i}",
+        'address': f"{100 + i} Main St, Dallas, TX 75201",
+        'phone': f"214-555-{i % 10000:04d}",
+        'reservation_platform': 'OpenTable',
+        'reservation_url': f"https://www.opentable.com/r/restaurant-{i}-dallas",
+        'price': PRICE_BANDS[i % len(PRICE_BANDS)],
+        'cuisine': CUISINES[i % len(CUISINES)],
+        'neighborhood': NEIGHBORHOODS[i % len(NEIGHBORHOODS)],
+        'rating': f"{3.5 + (i % 15) / 10:.1f}",
+        'review_count': f"{(i * 37) % 5000:,}",
+        'source': 'OpenTable'
+    } for i in range(records)]
+
+
+def measure(build):
+    """(result, seconds, retained bytes, peak bytes) - timed without tracemalloc, which slows allocation"""
+    gc.collect()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, retained, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=100000)
+    args = parser.parse_args()
+
+    # Records are built from fresh dicts, so both sizes include the field strings
+    dicts, _, dict_bytes, _ = measure(lambda: sample_dicts(args.records))
+    _, _, record_bytes, _ = measure(lambda: [RestaurantRecord.from_dict(d) for d in sample_dicts(args.records)])
+    records, build_seconds, _, _ = measure(lambda: [RestaurantRecord.from_dict(d) for d in dicts])
+    print(f"Buffered chunk of {args.records}: dicts {dict_bytes / 1024 ** 2:6.1f} MB   "
+          f"records {record_bytes / 1024 ** 2:6.1f} MB ({dict_bytes / record_bytes:.1f}x smaller, "
+          f"validated in {build_seconds:.2f}s)")
+
+    dict_table, dict_seconds, _, dict_peak = measure(lambda: to_table(dicts, 'restaurants'))
+    record_table, record_seconds, _, record_peak = measure(lambda: to_table(records, 'restaurants'))
+    print(f"to_table dicts   {dict_seconds:7.3f}s  peak {dict_peak / 1024 ** 2:6.1f} MB")
+    print(f"to_table records {record_seconds:7.3f}s  peak {record_peak / 1024 ** 2:6.1f} MB  "
+          f"({dict_seconds / record_seconds:.1f}x faster)")
+    _, from_seconds, _, _ = measure(lambda: RestaurantRecord.from_table(record_table))
+    print(f"from_table       {from_seconds:7.3f}s")
+    print(f"Tables equal: {dict_table.equals(record_table)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# bench/bench_storage.py
+# Publishing a raw/staging/clean layout to S3, against moto's in-process S3 with a fixed delay per
+# request standing in for the network round trip. Compares one sequential put_object per file
+# (whole file in memory) with S3Store: concurrent small files, parallel multipart parts, bounded
+# buffering, and a re-sync that skips unchanged objects by ETag.
+# Needs moto: pip install moto. Run from the repo root: python -m bench.bench_storage --small 300
+import argparse
+import os
+import tempfile
+import time
+
+import boto3
+from moto import mock_aws
+
+from configs.settings import AWS_REGION
+from pipeline.storage import S3Store, sync_layout
+
+
+def build_layout(root, small, small_kb, large, large_mb):
+    paths = []
+    for i in range(small + large):
+        layer = ('raw', 'staging', 'clean')[i % 3]
+        directory = os.path.join(root, layer, 'restaurants', 'city=dallas', f"source=s{i % 5}", 'run_date=2024-06-01')
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"part-{i:05d}.parquet")
+        with open(path, 'wb') as f:
+            f.write(os.urandom(small_kb * 1024 if i < small else large_mb * 1024 ** 2))
+        paths.append(path)
+    return paths
+
+
+def instrument(client, latency):
+    """Delay and count every request the client sends"""
+    calls = []
+
+    def before_send(**kwargs):
+        calls.append(1)
+        time.sleep(latency)
+
+    client.meta.events.register('before-send.s3.*', before_send)
+    return calls
+
+
+def sequential_put(client, bucket, root, paths):
+    peak = 0
+    for path in paths:
+        with open(path, 'rb') as f:
+            body = f.read()
+        peak = max(peak, len(body))
+        client.put_object(Bucket=bucket, Key=os.path.relpath(path, root).replace(os.sep, '/'), Body=body)
+    return peak
+
+
+def report(label, seconds, calls, megabytes, peak=None, extra=''):
+    buffered = f"  peak buffered {peak / 1024 ** 2:6.1f} MB" if peak is not None else ''
+    print(f"{label:30s} {seconds:7.2f}s  {megabytes / seconds:7.1f} MB/s  {calls:5d} requests{buffered}{extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--small', type=int, default=300, help="small Parquet-sized files")
+    parser.add_argument('--small-kb', type=int, default=64)
+    parser.add_argument('--large', type=int, default=3)
+    parser.add_argument('--large-mb', type=int, default=64)
+    parser.add_argument('--latency', type=float, default=0.02, help="seconds added to every S3 request")
+    parser.add_argument('--part-mb', type=int, default=5)
+    parser.add_argument('--max-in-flight', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root, mock_aws():
+        paths = build_layout(root, args.small, args.small_kb, args.large, args.large_mb)
+        megabytes = sum(os.path.getsize(path) for path in paths) / 1024 ** 2
+        print(f"{len(paths)} files ({args.small} x {args.small_kb} KB, {args.large} x {args.large_mb} MB), "
+              f"{megabytes:.0f} MB, {args.latency * 1000:.0f} ms per request\n")
+
+        client = boto3.client('s3', region_name=AWS_REGION)
+        for bucket in ('baseline', 'store'):
+            client.create_bucket(Bucket=bucket)
+        calls = instrument(client, args.latency)
+
+        started = time.perf_counter()
+        peak = sequential_put(client, 'baseline', root, paths)
+        report('sequential put_object', time.perf_counter() - started, len(calls), megabytes, peak)
+
+        part_size = args.part_mb * 1024 ** 2
+        store = S3Store('store', client=client, part_size=part_size, small_file_bytes=part_size,
+                        max_in_flight=args.max_in_flight, workers=args.workers)
+        del calls[:]
+        started = time.perf_counter()
+        stats = sync_layout(store, root)
+        report('S3Store sync', time.perf_counter() - started, len(calls), megabytes, store.peak_buffered,
+               f"  {stats['uploaded']} uploaded")
+
+        del calls[:]
+        started = time.perf_counter()
+        sequential_put(client, 'baseline', root, paths)
+        report('sequential re-upload', time.perf_counter() - started, len(calls), megabytes)
+
+        del calls[:]
+        started = time.perf_counter()
+        stats = sync_layout(store, root)
+        report('S3Store re-sync, unchanged', time.perf_counter() - started, len(calls), megabytes,
+               extra=f"  {stats['uploaded']} uploaded, {stats['skipped']} skipped")
+
+        with open(paths[0], 'wb') as f:
+            f.write(os.urandom(args.small_kb * 1024))
+        del calls[:]
+        started = time.perf_counter()
+        stats = sync_layout(store, root)
+        report('S3Store re-sync, one changed', time.perf_counter() - started, len(calls), megabytes,
+               extra=f"  {stats['uploaded']} uploaded, {stats['skipped']} skipped")
+
+        remote = store.checksums()
+        mismatched = [path for path in paths
+                      if remote.get(os.path.relpath(path, root).replace(os.sep, '/')) != store.checksum(path)]
+        print(f"\nETags match local checksums for {len(paths) - len(mismatched)}/{len(paths)} objects")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
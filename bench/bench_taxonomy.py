@@ -0,0 +1,86 @@
+# bench/bench_taxonomy.py
+# Cuisine tagging throughput on a synthetic corpus shaped like the inputs it will see - Yelp category
+# lists, Google place types and free-text descriptions. Compares one regex per synonym with the
+# compiled automaton, scanning every text and memoized over a Series column.
+# Run from the repo root: python -m bench.bench_taxonomy --texts 200000
+import argparse
+import random
+import re
+import time
+
+import pandas as pd
+
+from pipeline.keys import normalize_text
+from pipeline.taxonomy import CuisineTagger, load_taxonomy
+
+FILLER = ('the', 'best', 'in', 'dallas', 'with', 'a', 'patio', 'and', 'happy', 'hour', 'family', 'owned',
+          'since', '1998', 'serving', 'seasonal', 'local', 'ingredients', 'downtown', 'late', 'night')
+
+
+def sample_texts(texts, synonyms, seed=7):
+    rng = random.Random(seed)
+    phrases = list(synonyms)
+    # Category lists and place types repeat across listings; descriptions are mostly unique
+    categories = [', '.join(rng.sample(phrases, rng.randint(1, 3))).title() for _ in range(2000)]
+    types = ['_'.join(rng.choice(phrases).split()) + '_restaurant' for _ in range(500)]
+    corpus = []
+    for i in range(texts):
+        kind = i % 4
+        if kind < 2:
+            corpus.append(rng.choice(categories))
+        elif kind == 2:
+            corpus.append(rng.choice(types))
+        else:
+            words = [rng.choice(FILLER) for _ in range(30)]
+            for _ in range(rng.randint(0, 3)):
+                words.insert(rng.randrange(len(words)), rng.choice(phrases))
+            corpus.append(' '.join(words).capitalize() + '.')
+    return corpus
+
+
+def naive_tags(patterns, text):
+    """One regex per synonym - the straightforward approach"""
+    text = normalize_text(text)
+    return {tag for pattern, tag in patterns if pattern.search(text)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--texts', type=int, default=200000)
+    parser.add_argument('--naive-sample', type=int, default=20000, help="texts timed for the regex loop")
+    args = parser.parse_args()
+
+    synonyms = load_taxonomy()
+    corpus = sample_texts(args.texts, synonyms)
+    megabytes = sum(len(text) for text in corpus) / 1024 ** 2
+    print(f"{len(synonyms)} synonyms, {args.texts} texts ({megabytes:.1f} MB), "
+          f"{len(set(corpus))} distinct")
+
+    started = time.perf_counter()
+    tagger = CuisineTagger(synonyms)
+    print(f"Automaton: {tagger.states} states, compiled in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    patterns = [(re.compile(rf"\b{re.escape(phrase)}\b"), tag) for phrase, tag in synonyms.items()]
+    sample = corpus[:args.naive_sample]
+    started = time.perf_counter()
+    tags = sum(len(naive_tags(patterns, text)) for text in sample)
+    elapsed = time.perf_counter() - started
+    print(f"regex per synonym   {len(sample) / elapsed:12,.0f} texts/sec  {tags / elapsed:12,.0f} tags/sec")
+
+    started = time.perf_counter()
+    tags = sum(len(tagger._scan(normalize_text(text))) for text in corpus)
+    elapsed = time.perf_counter() - started
+    print(f"automaton           {len(corpus) / elapsed:12,.0f} texts/sec  {tags / elapsed:12,.0f} tags/sec  "
+          f"{megabytes / elapsed:6.1f} MB/s")
+
+    column = pd.Series(corpus)
+    started = time.perf_counter()
+    tagged = tagger.tag_column(column)
+    elapsed = time.perf_counter() - started
+    tags = int(tagged.map(len).sum())
+    print(f"automaton + memo    {len(corpus) / elapsed:12,.0f} texts/sec  {tags / elapsed:12,.0f} tags/sec  "
+          f"{megabytes / elapsed:6.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# bench/bench_throttle.py
+# Sustained pages/sec against local servers that block: one that answers 429 + Retry-After beyond
+# `--server-rate` req/s, then a pool of stand-in proxies (each exit rate limited, one banned with 403s).
+# Compares single-attempt fetching with the transport's retries + AIMD + proxy health scoring.
+# Run from the repo root: python -m bench.bench_throttle --pages 200
+import argparse
+import time
+
+from bench.fixture_server import fixture_url, start_fixture_server
+from pipeline.fetch import fetch_all
+from pipeline.transport import ProxyPool
+
+
+def run(urls, **engine_kwargs):
+    started = time.perf_counter()
+    results = fetch_all(urls, **engine_kwargs)
+    elapsed = time.perf_counter() - started
+    ok = sum(1 for r in results if r['status'] == 200)
+    return ok, elapsed
+
+
+def report(label, pages, ok, elapsed):
+    print(f"{label:34s} {ok:4d}/{pages} pages in {elapsed:6.2f}s  {ok / elapsed:7.2f} good pages/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--server-rate', type=float, default=10.0, help="requests/sec a server (or exit IP) tolerates")
+    parser.add_argument('--rate', type=float, default=40.0, help="configured per-host rate - deliberately too high")
+    parser.add_argument('--per-host', type=int, default=8)
+    parser.add_argument('--proxies', type=int, default=3, help="stand-in proxies, the last one banned")
+    args = parser.parse_args()
+    engine = {'rate': args.rate, 'burst': args.per_host, 'per_host': args.per_host}
+
+    server, base_url = start_fixture_server(latency=0.02, max_rate=args.server_rate, retry_after=1)
+    urls = [fixture_url(base_url, 'opentable', page) for page in range(args.pages)]
+    print(f"Direct, server allows {args.server_rate:.0f} req/s:")
+    report('  single attempt (AIMD only)', args.pages, *run(urls, retries=0, **engine))
+    time.sleep(1.5)  # let the server's window drain
+    report('  retries + AIMD', args.pages, *run(urls, **engine))
+    server.shutdown()
+
+    proxies = [start_fixture_server(latency=0.02, max_rate=args.server_rate, retry_after=1,
+                                    forbid=1.0 if i == args.proxies - 1 else 0.0) for i in range(args.proxies)]
+    urls = [fixture_url('http://origin.test', 'opentable', page) for page in range(args.pages)]
+    print(f"\n{args.proxies} proxies, each exit allows {args.server_rate:.0f} req/s, the last one banned:")
+    proxy_urls = [url for _, url in proxies]
+    report('  single attempt (AIMD only)', args.pages, *run(urls, retries=0, proxies=proxy_urls, **engine))
+    time.sleep(1.5)
+    pool = ProxyPool(proxy_urls)
+    report('  retries + AIMD + health scoring', args.pages, *run(urls, proxies=pool, **engine))
+    for health in pool.health():
+        print(f"    {health['proxy']:22s} score {health['score']:.2f}  latency {health['latency'] * 1000:5.0f} ms"
+              f"  {'breaker open' if health['open'] else ''}")
+    for server, _ in proxies:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
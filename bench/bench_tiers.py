@@ -0,0 +1,63 @@
+# bench/bench_tiers.py
+# Re-tiering cost of creators/tiers.py on a synthetic creator table.
+# Run from the repo root: python -m bench.bench_tiers --rows 1000000
+import argparse
+import copy
+import time
+
+import numpy as np
+import pandas as pd
+
+from configs.settings import CREATOR_TIERS
+from creators.tiers import assign_tiers, creator_metrics, tier_summary
+
+
+def synthetic_creators(rows, seed=1):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'handle': [f"@creator{i}" for i in range(rows)],
+        'platform': rng.choice(['Instagram', 'TikTok'], rows),
+        'followers': rng.integers(500, 600000, rows),
+        'engagement_rate': rng.random(rows) * 0.06,
+        'audience_location_pct': rng.random(rows),
+        'food_focus_pct': rng.random(rows),
+        'cadence_flag': rng.choice(['weekly', 'biweekly', 'monthly', 'quarterly', 'inactive'], rows,
+                                   p=[0.4, 0.3, 0.15, 0.1, 0.05]),
+        'bio': rng.choice(['Dallas foodie', 'DFW eats + travel', 'DM for comps', 'Brunch hunter'], rows,
+                          p=[0.4, 0.4, 0.05, 0.15]),
+        'compliance_flag': rng.choice([True, False], rows, p=[0.97, 0.03])
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+
+    df = synthetic_creators(args.rows)
+    started = time.perf_counter()
+    metrics = creator_metrics(df)
+    prepared = time.perf_counter() - started
+
+    started = time.perf_counter()
+    tiered = assign_tiers(df, metrics=metrics)
+    first = time.perf_counter() - started
+
+    # Threshold change - only the gate masks are recomputed
+    looser = copy.deepcopy(CREATOR_TIERS)
+    for rule in looser:
+        rule['min_engagement_rate'] *= 0.8
+    started = time.perf_counter()
+    retiered = assign_tiers(df, tiers=looser, metrics=metrics)
+    again = time.perf_counter() - started
+
+    print(f"Rows:               {args.rows}")
+    print(f"Metrics + exclusions: {prepared:.3f}s")
+    print(f"Tiering:            {first:.3f}s  ({args.rows / first:,.0f} rows/sec)")
+    print(f"Re-tier (new ER):   {again:.3f}s")
+    print(f"Tiers:              {tier_summary(tiered)['tiers']}")
+    print(f"Tiers after change: {tier_summary(retiered)['tiers']}")
+
+
+if __name__ == "__main__":
+    main()
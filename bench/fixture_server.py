@@ -0,0 +1,181 @@
+# bench/fixture_server.py
+import glob
+import hashlib
+import os
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+def listing_page(page, cards=50, noise=400):
+    """Synthetic OpenTable-style listing page - header/footer noise around the card list"""
+    nav = ''.join(f'<li><a href="/dallas/{i}">Link {i}</a></li>' for i in range(noise))
+    items = ''.join(
+        '<div data-test="restaurant-card" class="restaurant-card">'
+        f'<a href="/r/restaurant-{page}-{i}-dallas"><h6 data-test="res-card-name">Restaurant {page}-{i}</h6></a>'
+        '<span data-test="res-card-neighborhood">Uptown</span>'
+        '<span data-test="res-card-cuisine">Steakhouse</span>'
+        '<span data-test="res-card-price">$$$$</span>'
+        '</div>'
+        for i in range(cards)
+    )
+    footer = ''.join(f'<div class="footer-item"><p>Footer {i}</p></div>' for i in range(noise))
+    return (
+        f'<html><head><title>Dallas Restaurants - page {page}</title></head><body>'
+        f'<nav><ul>{nav}</ul></nav>'
+        f'<div data-test="restaurant-list">{items}</div>'
+        f'<footer>{footer}</footer></body></html>'
+    )
+
+
+def resy_page(page, cards=50, noise=400):
+    """Synthetic Resy search results"""
+    items = ''.join(
+        '<div class="SearchResult SearchResult--venue">'
+        f'<a href="/cities/dal/venues/venue-{page}-{i}"><h3 class="SearchResult__venue-name">Venue {page}-{i}</h3></a>'
+        '<span class="SearchResult__neighborhood">Bishop Arts</span>'
+        '<span class="SearchResult__cuisine">Italian</span>'
+        '<span class="SearchResult__price">$$$</span>'
+        '</div>'
+        for i in range(cards)
+    )
+    noise_html = ''.join(f'<div class="Promo"><p>Promo {i}</p></div>' for i in range(noise))
+    return (f'<html><body><header>{noise_html}</header>'
+            f'<div class="SearchResultsContainer">{items}</div><footer>{noise_html}</footer></body></html>')
+
+
+def tock_page(page, cards=50, noise=400):
+    """Synthetic Tock search results"""
+    items = ''.join(
+        '<div class="SearchResultCard">'
+        f'<a href="/tock-{page}-{i}"><h2>Tock Venue {page}-{i}</h2></a>'
+        '<span class="Location">Design District</span>'
+        '<span class="Cuisine">Tasting Menu</span>'
+        '<span class="Price">$$$$</span>'
+        '</div>'
+        for i in range(cards)
+    )
+    noise_html = ''.join(f'<div class="Banner"><p>Banner {i}</p></div>' for i in range(noise))
+    return (f'<html><body><header>{noise_html}</header>'
+            f'<div class="SearchResults">{items}</div><footer>{noise_html}</footer></body></html>')
+
+
+def district_page(page, cards=50, noise=400):
+    """Synthetic school district directory"""
+    items = ''.join(
+        '<div class="school">'
+        f'<a href="https://school-{page}-{i}.example.org">School {page}-{i}</a>'
+        f'<span class="address">{100 + i} Main St, Dallas, TX 75201</span>'
+        f'<a href="tel:214-555-{i:04d}" class="phone">214-555-{i:04d}</a>'
+        '</div>'
+        for i in range(cards)
+    )
+    noise_html = ''.join(f'<li><a href="/news/{i}">News {i}</a></li>' for i in range(noise))
+    return (f'<html><body><ul>{noise_html}</ul>'
+            f'<div class="directory">{items}</div><ul>{noise_html}</ul></body></html>')
+
+
+# First path segment -> page builder; any other path is an OpenTable listing
+PAGE_BUILDERS = {
+    'opentable': listing_page,
+    'resy': resy_page,
+    'tock': tock_page,
+    'district': district_page
+}
+
+
+def fixture_url(base_url, source, page):
+    return f"{base_url}/{source}/page-{page}"
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so pooled connections get reused
+
+    def _body(self):
+        """A recorded page for the source when one exists, otherwise a synthetic one"""
+        path = urlsplit(self.path).path  # absolute when the server is used as a proxy
+        source = path.strip('/').split('/')[0]
+        recorded = self.server.recorded.get(source)
+        if recorded:
+            index = int(hashlib.md5(path.encode('utf-8')).hexdigest(), 16) % len(recorded)
+            with open(recorded[index], 'rb') as f:
+                return f.read()
+        return PAGE_BUILDERS.get(source, listing_page)(path).encode('utf-8')
+
+    def _blocked(self):
+        """403 for a share of requests (a flagged IP/UA), 429 once requests outpace max_rate"""
+        server = self.server
+        if server.forbid and random.random() < server.forbid:
+            return 403
+        if server.max_rate:
+            with server.window_lock:
+                now = time.monotonic()
+                while server.window and now - server.window[0] > 1.0:
+                    server.window.popleft()
+                if len(server.window) >= server.max_rate:
+                    return 429
+                server.window.append(now)
+        return None
+
+    def _refuse(self, status):
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', str(self.server.retry_after))
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        status = self._blocked()
+        if status:
+            self._refuse(status)
+            return
+        body = self._body()
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # the default backlog of 5 stalls highly concurrent clients on SYN retries
+
+
+def start_fixture_server(latency=0.05, port=0, recorded_dir=None, max_rate=None, retry_after=1, forbid=0.0):
+    """Start a local stand-in server on a background thread, returns (server, base_url)
+
+    `recorded_dir` may hold captured pages as <source>/*.html (e.g. resy/search-1.html);
+    those are replayed instead of the synthetic pages. `max_rate` (requests/sec, answered
+    with 429 + Retry-After beyond it) and `forbid` (share of 403s) inject blocking. The
+    server also answers proxy-style requests, so several instances can stand in for a
+    proxy pool whose exit IPs are each rate limited.
+    """
+    server = FixtureServer(('127.0.0.1', port), FixtureHandler)
+    server.latency = latency
+    server.max_rate = max_rate
+    server.retry_after = retry_after
+    server.forbid = forbid
+    server.window = deque()
+    server.window_lock = threading.Lock()
+    server.recorded = {
+        source: sorted(glob.glob(os.path.join(recorded_dir, source, '*.html')))
+        for source in PAGE_BUILDERS
+    } if recorded_dir else {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
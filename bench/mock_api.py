@@ -0,0 +1,88 @@
+# bench/mock_api.py
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+def google_places_payload(query):
+    return {
+        'status': 'OK',
+        'candidates': [{
+            'name': query.get('input', [''])[0],
+            'rating': 4.6,
+            'user_ratings_total': 812,
+            'formatted_phone_number': '214-555-0100',
+            'website': 'https://example.com',
+            'geometry': {'location': {'lat': 32.7925, 'lng': -96.8037}},
+            'opening_hours': {'open_now': True}
+        }]
+    }
+
+
+def yelp_payload(query):
+    return {
+        'businesses': [{
+            'name': query.get('term', [''])[0],
+            'rating': 4.5,
+            'review_count': 640,
+            'price': '$$$',
+            'categories': [{'alias': 'steak', 'title': 'Steakhouses'}],
+            'url': 'https://www.yelp.com/biz/example-dallas'
+        }]
+    }
+
+
+ROUTES = {
+    '/maps/api/place/findplacefromtext/json': google_places_payload,
+    '/v3/businesses/search': yelp_payload
+}
+
+
+class MockApiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        time.sleep(server.latency)
+        parts = urlsplit(self.path)
+        with server.lock:
+            server.calls += 1
+        if random.random() < server.error_rate:
+            self._send(429, {'error': 'rate limited'}, {'Retry-After': '0'})
+        elif parts.path in ROUTES:
+            self._send(200, ROUTES[parts.path](parse_qs(parts.query)))
+        else:
+            self._send(404, {'error': 'not found'})
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class MockApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # the default backlog of 5 stalls highly concurrent clients on SYN retries
+
+
+def start_mock_api(latency=0.05, error_rate=0.0, port=0):
+    """Mock Places/Yelp endpoints with configurable latency and 429 rate, returns (server, endpoint urls)"""
+    server = MockApiServer(('127.0.0.1', port), MockApiHandler)
+    server.latency = latency
+    server.error_rate = error_rate
+    server.calls = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    return server, {provider: base_url + path for provider, path in zip(('google_places', 'yelp'), ROUTES)}
@@ -0,0 +1,187 @@
+# bench/suite.py
+# Throughput + peak RSS for every pipeline stage against local stand-ins (fixture pages, mock
+# Places/Yelp API), written as JSON so runs can be compared over time.
+# Run from the repo root: python -m bench.suite [--quick] [--compare bench/results/<earlier>.json]
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+STAGES = ['fetch', 'parse', 'enrich', 'dedup']
+SOURCES = {'opentable': 'opentable', 'resy': 'resy', 'tock': 'tock', 'district': 'district_directory'}
+
+# Headline metric per stage - used for the comparison table; higher is better except *_ms
+HEADLINES = {
+    'fetch': 'pages_per_sec',
+    'parse': 'ms_per_page',
+    'enrich': 'rows_per_sec',
+    'dedup': 'pairs_per_sec'
+}
+
+DEFAULTS = {'pages': 200, 'cards': 50, 'noise': 400, 'latency': 0.02, 'enrich_rows': 2000,
+            'api_latency': 0.02, 'error_rate': 0.05, 'dedup_rows': 100000, 'recorded_dir': None}
+QUICK = {'pages': 40, 'enrich_rows': 300, 'dedup_rows': 20000}
+
+
+def bench_fetch(params):
+    from bench.fixture_server import fixture_url, start_fixture_server
+    from pipeline.fetch import fetch_all
+
+    server, base_url = start_fixture_server(latency=params['latency'], recorded_dir=params['recorded_dir'])
+    results = {}
+    for source in SOURCES:
+        urls = [fixture_url(base_url, source, page) for page in range(params['pages'])]
+        started = time.perf_counter()
+        responses = fetch_all(urls, rate=1000.0, burst=32, per_host=32)
+        elapsed = time.perf_counter() - started
+        results[source] = {'pages_per_sec': len(urls) / elapsed,
+                           'errors': sum(1 for response in responses if response['error'])}
+    server.shutdown()
+    return {'pages_per_sec': sum(r['pages_per_sec'] for r in results.values()) / len(results), 'sources': results}
+
+
+def bench_parse(params):
+    from bench.fixture_server import PAGE_BUILDERS
+    from pipeline.extract import extract_listings
+
+    results = {}
+    for source, extractor in SOURCES.items():
+        documents = [PAGE_BUILDERS[source](page, params['cards'], params['noise']).encode('utf-8')
+                     for page in range(params['pages'])]
+        started = time.perf_counter()
+        records = sum(len(extract_listings(extractor, document, streaming=True)) for document in documents)
+        elapsed = time.perf_counter() - started
+        results[source] = {'ms_per_page': elapsed * 1000 / len(documents), 'records': records}
+    return {'ms_per_page': sum(r['ms_per_page'] for r in results.values()) / len(results), 'sources': results}
+
+
+def bench_enrich(params):
+    import pandas as pd
+
+    from bench.mock_api import start_mock_api
+    from pipeline.places import EnrichmentClient, MemoStore
+
+    server, urls = start_mock_api(latency=params['api_latency'], error_rate=params['error_rate'])
+    restaurants = pd.DataFrame({
+        'name': [f"Restaurant {i}" for i in range(params['enrich_rows'])],
+        'address': [f"{100 + i} Main St, Dallas, TX 75201" for i in range(params['enrich_rows'])]
+    })
+    results = {}
+    with tempfile.TemporaryDirectory() as memo_dir:
+        memo = MemoStore(os.path.join(memo_dir, 'memo.sqlite'))
+        for provider, url in urls.items():
+            client = EnrichmentClient(provider, memo=memo, url=url, api_key='bench')
+            # Budgets sized for the stand-in, not the real provider
+            client.config = {**client.config, 'rate': 500.0, 'concurrency': 32,
+                             'daily_quota': len(restaurants) * 10, 'monthly_quota': None}
+            started = time.perf_counter()
+            found = client.enrich(restaurants)
+            elapsed = time.perf_counter() - started
+            results[provider] = {'rows_per_sec': len(restaurants) / elapsed, 'matched': len(found), **client.stats}
+    server.shutdown()
+    return {'rows_per_sec': sum(r['rows_per_sec'] for r in results.values()) / len(results),
+            'mock_api_calls': server.calls, 'providers': results}
+
+
+def bench_dedup(params):
+    from bench.bench_linkage import synthetic_restaurants
+    from pipeline.linkage import link_records
+
+    df = synthetic_restaurants(params['dedup_rows']).drop(columns=['entity'])
+    started = time.perf_counter()
+    canonical, annotated, stats = link_records(df)
+    elapsed = time.perf_counter() - started
+    return {'pairs_per_sec': stats['candidate_pairs'] / elapsed, 'rows_per_sec': stats['rows'] / elapsed,
+            'elapsed_sec': elapsed, **stats}
+
+
+RUNNERS = {'fetch': bench_fetch, 'parse': bench_parse, 'enrich': bench_enrich, 'dedup': bench_dedup}
+
+
+def run_child(stage, params):
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result = RUNNERS[stage](params)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux
+    result.update({'peak_rss_mb': peak / 1024, 'peak_rss_delta_mb': (peak - baseline) / 1024})
+    print(json.dumps(result))
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, previous):
+    print(f"\nvs {previous.get('run_at')} ({previous.get('git_commit')})")
+    for stage, metric in HEADLINES.items():
+        new = current['stages'].get(stage, {})
+        old = previous.get('stages', {}).get(stage, {})
+        for name in (metric, 'peak_rss_mb'):
+            if name in new and name in old and old[name]:
+                change = (new[name] - old[name]) / old[name] * 100
+                print(f"  {stage:7s} {name:14s} {old[name]:12.2f} -> {new[name]:12.2f}  ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--stages', nargs='*', choices=STAGES, default=STAGES)
+    parser.add_argument('--quick', action='store_true', help="smaller workloads for a fast smoke run")
+    parser.add_argument('--recorded-dir', help="replay captured pages from <dir>/<source>/*.html")
+    parser.add_argument('--error-rate', type=float, help="share of mock API calls answered with 429")
+    parser.add_argument('--api-latency', type=float)
+    parser.add_argument('--out', default=os.path.join('bench', 'results'))
+    parser.add_argument('--compare', help="earlier results file to diff against")
+    parser.add_argument('--child', choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument('--params', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, json.loads(args.params))
+        return
+
+    params = {**DEFAULTS, **(QUICK if args.quick else {})}
+    for name in ('recorded_dir', 'error_rate', 'api_latency'):
+        if getattr(args, name) is not None:
+            params[name] = getattr(args, name)
+
+    # One subprocess per stage so peak RSS belongs to that stage alone
+    stages = {}
+    for stage in args.stages:
+        output = subprocess.run(
+            [sys.executable, '-m', 'bench.suite', '--child', stage, '--params', json.dumps(params)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        stages[stage] = json.loads(output.strip().splitlines()[-1])
+        metric = HEADLINES[stage]
+        print(f"{stage:7s} {metric:14s} {stages[stage][metric]:12.2f}   peak RSS {stages[stage]['peak_rss_mb']:8.1f} MB")
+
+    results = {
+        'run_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': params,
+        'stages': stages
+    }
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved {path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
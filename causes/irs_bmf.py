@@ -0,0 +1,300 @@
+# causes/irs_bmf.py
+# IRS Exempt Organizations Business Master File (eo_*.csv extracts) -> sorted, memory-mapped EIN index.
+# Build once:  python -m causes.irs_bmf build data/irs/bmf/eo_tx.csv
+# Look up:     python -m causes.irs_bmf lookup 75-6013907
+import argparse
+import csv
+import glob
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from configs.settings import DALLAS_ZIP_PREFIXES, IRS_BMF_SETTINGS
+
+# Fixed-width record layout - one row per EIN, same order as eins.u32
+RECORD_DTYPE = np.dtype([
+    ('name', 'S70'),
+    ('street', 'S35'),
+    ('city', 'S22'),
+    ('state', 'S2'),
+    ('zip', 'S10'),
+    ('ntee', 'S4'),
+    ('subsection', 'S2'),
+    ('foundation', 'S2'),
+    ('ruling', 'S6'),
+    ('asset_amt', '<i8'),
+    ('income_amt', '<i8'),
+    ('revenue_amt', '<i8')
+])
+TEXT_COLUMNS = {'name': 'NAME', 'street': 'STREET', 'city': 'CITY', 'state': 'STATE', 'zip': 'ZIP',
+                'ntee': 'NTEE_CD', 'subsection': 'SUBSECTION', 'foundation': 'FOUNDATION', 'ruling': 'RULING'}
+AMOUNT_COLUMNS = {'asset_amt': 'ASSET_AMT', 'income_amt': 'INCOME_AMT', 'revenue_amt': 'REVENUE_AMT'}
+
+# NTEE major group -> causes org_type (B94 = parent/teacher groups)
+NTEE_ORG_TYPES = {'B94': 'School/PTA', 'B': 'School', 'A5': 'Museum', 'A': 'Arts & Culture',
+                  'X': 'Church/Religious', 'T': 'Foundation'}
+
+BUILD_CHUNK = 100000
+
+
+def normalize_ein(value):
+    """'75-6013907' / 756013907 -> 756013907 (None when it is not a 9-digit EIN)"""
+    digits = ''.join(c for c in str(value) if c.isdigit())
+    return int(digits) if len(digits) == 9 else None
+
+
+def normalize_eins(values):
+    """Vectorized normalize_ein for a column - 0 where there is no valid EIN"""
+    digits = pd.Series(values, dtype=object).fillna('').astype(str).str.replace(r'\D', '', regex=True)
+    return pd.to_numeric(digits.where(digits.str.len() == 9), errors='coerce').fillna(0).to_numpy(dtype=np.uint32)
+
+
+def org_type(ntee):
+    for prefix in sorted(NTEE_ORG_TYPES, key=len, reverse=True):
+        if ntee.startswith(prefix):
+            return NTEE_ORG_TYPES[prefix]
+    return 'Nonprofit'
+
+
+def _amount(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _parse_chunk(rows):
+    chunk = np.zeros(len(rows), dtype=RECORD_DTYPE)
+    for field, column in TEXT_COLUMNS.items():
+        width = RECORD_DTYPE[field].itemsize
+        chunk[field] = [(row.get(column) or '').strip().encode('utf-8')[:width] for row in rows]
+    for field, column in AMOUNT_COLUMNS.items():
+        chunk[field] = [_amount(row.get(column)) for row in rows]
+    return chunk
+
+
+def build_index(paths, index_dir=None):
+    """Stream BMF CSVs into a sorted on-disk index - memory stays at one chunk plus the EIN column
+
+    Later files win when an EIN appears twice. Returns the index metadata.
+    """
+    index_dir = index_dir or IRS_BMF_SETTINGS['index_dir']
+    os.makedirs(index_dir, exist_ok=True)
+    unsorted_path = os.path.join(index_dir, 'records.unsorted')
+    eins = []
+    count = 0
+    with open(unsorted_path, 'wb') as out:
+        for path in paths:
+            with open(path, newline='', encoding='utf-8', errors='replace') as f:
+                rows = []
+                for row in csv.DictReader(f):
+                    ein = normalize_ein(row.get('EIN', ''))
+                    if ein is None:
+                        continue
+                    eins.append(ein)
+                    rows.append(row)
+                    if len(rows) >= BUILD_CHUNK:
+                        out.write(_parse_chunk(rows).tobytes())
+                        count += len(rows)
+                        rows = []
+                if rows:
+                    out.write(_parse_chunk(rows).tobytes())
+                    count += len(rows)
+
+    eins = np.asarray(eins, dtype=np.uint32)
+    order = np.argsort(eins, kind='stable')
+    # Keep the last occurrence of each EIN
+    sorted_eins = eins[order]
+    keep = np.append(sorted_eins[1:] != sorted_eins[:-1], True) if count else np.zeros(0, dtype=bool)
+    order = order[keep]
+
+    unsorted = np.memmap(unsorted_path, dtype=RECORD_DTYPE, mode='r', shape=(count,)) if count else \
+        np.zeros(0, dtype=RECORD_DTYPE)
+    with open(os.path.join(index_dir, 'records.bin'), 'wb') as out:
+        for start in range(0, len(order), BUILD_CHUNK):
+            out.write(unsorted[order[start:start + BUILD_CHUNK]].tobytes())
+    zips = np.zeros(len(order), dtype=np.uint32)
+    for start in range(0, len(order), BUILD_CHUNK):
+        zip5 = pd.Series(unsorted['zip'][order[start:start + BUILD_CHUNK]]).str.decode('utf-8').str[:5]
+        zips[start:start + BUILD_CHUNK] = pd.to_numeric(zip5, errors='coerce').fillna(0).to_numpy(dtype=np.uint32)
+    del unsorted
+    os.remove(unsorted_path)
+
+    eins[order].tofile(os.path.join(index_dir, 'eins.u32'))
+    zips.tofile(os.path.join(index_dir, 'zips.u32'))
+    meta = {'records': int(len(order)), 'rows_read': count, 'sources': source_signature(paths),
+            'built_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'record_bytes': RECORD_DTYPE.itemsize}
+    with open(os.path.join(index_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+class EINIndex:
+    """Read-only view of a built index - every array is a memory map, nothing is loaded up front"""
+
+    def __init__(self, index_dir=None):
+        self.index_dir = index_dir or IRS_BMF_SETTINGS['index_dir']
+        with open(os.path.join(self.index_dir, 'meta.json')) as f:
+            self.meta = json.load(f)
+        n = self.meta['records']
+        self.eins = self._map('eins.u32', np.uint32, n)
+        self.zips = self._map('zips.u32', np.uint32, n)
+        self.records = self._map('records.bin', RECORD_DTYPE, n)
+
+    def _map(self, name, dtype, n):
+        if n == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(os.path.join(self.index_dir, name), dtype=dtype, mode='r', shape=(n,))
+
+    def __len__(self):
+        return len(self.eins)
+
+    def positions(self, eins):
+        """Row per EIN via binary search over the mapped EIN column, -1 where absent"""
+        eins = np.asarray(eins, dtype=np.uint32)
+        pos = np.searchsorted(self.eins, eins)
+        clipped = np.minimum(pos, max(len(self.eins) - 1, 0))
+        found = (pos < len(self.eins)) & (self.eins[clipped] == eins) if len(self.eins) else np.zeros(len(eins), bool)
+        return np.where(found, clipped, -1)
+
+    def _record(self, pos):
+        row = self.records[pos]
+        record = {field: row[field].decode('utf-8', errors='replace') for field in TEXT_COLUMNS}
+        record.update({field: int(row[field]) for field in AMOUNT_COLUMNS})
+        record['EIN'] = int(self.eins[pos])
+        return record
+
+    def lookup(self, ein):
+        ein = normalize_ein(ein)
+        if ein is None:
+            return None
+        pos = self.positions([ein])[0]
+        return self._record(pos) if pos >= 0 else None
+
+    def lookup_many(self, eins):
+        """DataFrame of index fields for a column of EINs, in input order (unknown EINs are dropped)"""
+        keys = normalize_eins(eins)
+        pos = self.positions(keys)
+        hits = pos[pos >= 0]
+        rows = self.records[hits] if len(hits) else np.zeros(0, dtype=RECORD_DTYPE)
+        df = pd.DataFrame({field: rows[field] for field in RECORD_DTYPE.names})
+        for field in TEXT_COLUMNS:
+            df[field] = df[field].str.decode('utf-8', errors='replace')
+        df.insert(0, 'EIN', self.eins[hits].astype(np.int64))
+        return df
+
+    def zip_prefix_positions(self, prefixes=DALLAS_ZIP_PREFIXES):
+        """Rows whose ZIP starts with one of `prefixes` - a scan of the 4-byte zip column only"""
+        mask = np.zeros(len(self.zips), dtype=bool)
+        for prefix in prefixes:
+            scale = 10 ** (5 - len(prefix))
+            mask |= (self.zips // scale) == int(prefix)
+        return np.flatnonzero(mask)
+
+
+def to_cause(record):
+    """Index record -> CAUSES_SCHEMA row"""
+    ein = f"{record['EIN']:09d}"
+    return {
+        'org_name': record['name'].title(),
+        'EIN': f"{ein[:2]}-{ein[2:]}",
+        'org_type': org_type(record['ntee']),
+        'address': f"{record['street'].title()}, {record['city'].title()}, {record['state']} {record['zip'][:5]}",
+        'size_indicator': f"${record['income_amt']:,} income / ${record['asset_amt']:,} assets",
+        'ntee_code': record['ntee'],
+        'source_platform': 'IRS EO BMF'
+    }
+
+
+def iter_bmf_causes(index=None, zip_prefixes=DALLAS_ZIP_PREFIXES, ntee_prefixes=None):
+    """Yield cause rows for organizations in the ZIP prefixes, optionally narrowed by NTEE prefix"""
+    index = index or EINIndex()
+    for pos in index.zip_prefix_positions(zip_prefixes):
+        record = index._record(pos)
+        if ntee_prefixes and not record['ntee'].startswith(tuple(ntee_prefixes)):
+            continue
+        yield to_cause(record)
+
+
+def enrich_causes(causes, index=None):
+    """Fill org_name/address/org_type/size_indicator from the index by EIN and dedup on EIN
+
+    Scraped values win; rows without a known EIN pass through untouched.
+    """
+    index = index or EINIndex()
+    df = causes.copy().reset_index(drop=True)
+    keys = normalize_eins(df['EIN'] if 'EIN' in df.columns else pd.Series('', index=df.index))
+    pos = index.positions(keys)
+    hit = np.flatnonzero(pos >= 0)
+    filled = pd.DataFrame([to_cause(index._record(p)) for p in pos[hit]], index=hit)
+    for column in ('org_name', 'EIN', 'address', 'org_type', 'size_indicator', 'ntee_code'):
+        if column not in df.columns:
+            df[column] = ''
+        if len(filled):
+            current = df.loc[hit, column]
+            blank = current.isna() | (current.astype(str).str.strip() == '')
+            df.loc[hit, column] = current.where(~blank, filled[column])
+    df['_ein'] = keys
+    known = df[df['_ein'] != 0].drop_duplicates('_ein', keep='first')
+    return pd.concat([known, df[df['_ein'] == 0]]).sort_index().drop(columns=['_ein']).reset_index(drop=True)
+
+
+def default_sources():
+    return sorted(glob.glob(os.path.join(IRS_BMF_SETTINGS['source_dir'], 'eo_*.csv')))
+
+
+def source_signature(paths):
+    """Path, size and mtime of every extract - stored in meta.json to tell when the index is stale"""
+    signature = []
+    for path in paths:
+        stat = os.stat(path)
+        signature.append({'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns})
+    return signature
+
+
+def ensure_index(index_dir=None, paths=None):
+    """Open the index, (re)building it first when the extracts differ from the ones it was built from
+
+    None when there is neither an index nor any extract to build one from.
+    """
+    index_dir = index_dir or IRS_BMF_SETTINGS['index_dir']
+    paths = default_sources() if paths is None else paths
+    meta_path = os.path.join(index_dir, 'meta.json')
+    meta = None
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+    if paths and (meta is None or meta.get('sources') != source_signature(paths)):
+        build_index(paths, index_dir)
+    elif meta is None:
+        return None
+    return EINIndex(index_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IRS EO BMF EIN index")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="build the index from eo_*.csv extracts")
+    build.add_argument('paths', nargs='*', help=f"defaults to {IRS_BMF_SETTINGS['source_dir']}/eo_*.csv")
+    lookup = commands.add_parser('lookup', help="look up one or more EINs")
+    lookup.add_argument('eins', nargs='+')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        paths = args.paths or default_sources()
+        if not paths:
+            parser.error("no BMF extracts found")
+        started = time.perf_counter()
+        meta = build_index(paths)
+        print(f"✅ Indexed {meta['records']} organizations from {len(paths)} files in {time.perf_counter() - started:.1f}s")
+    else:
+        index = EINIndex()
+        for ein in args.eins:
+            print(json.dumps(index.lookup(ein), indent=2))
+
+
+if __name__ == "__main__":
+    main()
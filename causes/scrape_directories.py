@@ -1,34 +1,24 @@
-# causes/scripts/scrape_directories.py
-import requests
-import pandas as pd
+# causes/scrape_directories.py
+from configs.settings import CITIES, DEFAULT_CITY
+from pipeline.cache import ResponseCache
+from pipeline.extract import extract_listings
+from pipeline.fetch import iter_fetch
 
-def scrape_school_directories():
+DISTRICTS = CITIES[DEFAULT_CITY]['isd_directories']
+
+def iter_school_directories(districts=None, city=DEFAULT_CITY):
     """Start with public school directories - easiest to scrape"""
-    districts = [
-        "https://www.dallasisd.org/directory",
-        "https://www.hpisd.org/schools",
-        "https://www.planoisd.edu/schools"
-    ]
-    
-    schools = []
-    for district_url in districts[:1]:  # Start with one district
-        try:
-            response = requests.get(district_url)
-            # Extract school names, addresses, contacts
-            schools.extend(extract_schools_basic(response.text))
-        except Exception as e:
-            print(f"Error scraping {district_url}: {e}")
-    
-    return schools
+    district_urls = districts or CITIES[city]['isd_directories'][:1]  # Start with one district
+    for response in iter_fetch(district_urls, cache=ResponseCache(), source='school_directories'):
+        if response['error']:
+            print(f"Error scraping {response['url']}: {response['error']}")
+            continue
+        # Extract school names, addresses, contacts
+        yield from extract_schools_basic(response['text'])
+
+def scrape_school_directories(districts=None):
+    return list(iter_school_directories(districts))
 
 def extract_schools_basic(html):
-    """Basic school extraction - you'll refine this"""
-    schools = [{
-        'org_name': 'Sample High School PTA',
-        'org_type': 'School/PTA', 
-        'address': '123 Main St, Dallas, TX 75201',
-        'phone': '214-555-1234',
-        'size_indicator': '1500 students',
-        'source': 'DISD Directory'
-    }]
-    return schools
\ No newline at end of file
+    """Basic school extraction - district directory selectors live in pipeline/extract.py"""
+    return extract_listings('district_directory', html)
@@ -0,0 +1,219 @@
+# cli.py
+# One entry point for the pipeline. Subcommands import their dependencies when they run, so
+# `--help` and short jobs on small workers never pay for pandas/pyarrow/boto3 they do not use.
+#   python cli.py scrape [--run-id ID] [--fresh] [--force STAGE ...]
+#   python cli.py enrich [--input CSV] [--output CSV] [--full-refresh]
+#   python cli.py dedup INPUT [--output CSV]
+#   python cli.py export DATASET OUTPUT [--layer clean] [--city dallas] [--source SOURCE]
+#   python cli.py query load [--force] | find DATASET [FILTER ...] | sql QUERY | check
+#   python cli.py publish [--url s3://bucket/prefix] [--layer raw ...]
+#   python cli.py bench NAME [bench args ...]      (python cli.py bench importtime)
+import argparse
+import importlib
+import sys
+
+BENCHES = {
+    'suite': 'bench.suite',
+    'extract': 'bench.bench_extract',
+    'fetch': 'bench.bench_fetch',
+    'linkage': 'bench.bench_linkage',
+    'tiers': 'bench.bench_tiers',
+    'commoncrawl': 'bench.bench_commoncrawl',
+    'importtime': 'bench.bench_importtime',
+    'records': 'bench.bench_records',
+    'throttle': 'bench.bench_throttle',
+    'taxonomy': 'bench.bench_taxonomy',
+    'storage': 'bench.bench_storage',
+    'query': 'bench.bench_querystore'
+}
+
+# cli.py query find filters: field=value, field!=value, field>=value (> < <=), field~substring,
+# field=a|b for any of several values
+FILTER_PATTERN = r'^(\w+)\s*(>=|<=|!=|=|>|<|~)\s*(.*)$'
+FILTER_OPERATORS = {'=': 'eq', '!=': 'ne', '>': 'gt', '>=': 'gte', '<': 'lt', '<=': 'lte', '~': 'like'}
+
+
+def scrape(args):
+    from main import run
+
+    run(args.run_id, fresh=args.fresh, force=args.force)
+
+
+def enrich(args):
+    from enrich_with_apis_fixed import main
+
+    main(args.input, args.output, full_refresh=args.full_refresh)
+
+
+def dedup(args):
+    import pandas as pd
+
+    from pipeline.linkage import link_records
+
+    records = pd.read_parquet(args.input) if args.input.endswith('.parquet') else pd.read_csv(args.input)
+    canonical, _, stats = link_records(records)
+    canonical.drop(columns=['cluster_id', 'source_count', 'record_key']).to_csv(args.output, index=False)
+    print(f"✅ Dedup: {stats['rows']} rows -> {stats['clusters']} records "
+          f"({stats['candidate_pairs']} candidate pairs scored), saved {args.output}")
+
+
+def export_dataset(args):
+    from pipeline.columnar import export, read_dataset
+
+    partitions = {name: getattr(args, name) for name in ('city', 'source') if getattr(args, name)}
+    df = read_dataset(args.dataset, args.layer, **partitions)
+    export(df, args.dataset, args.output)
+    print(f"✅ Exported {len(df)} {args.dataset} rows to {args.output}")
+
+
+def parse_filters(expressions):
+    import re
+
+    filters = {}
+    for expression in expressions:
+        match = re.match(FILTER_PATTERN, expression)
+        if not match:
+            sys.exit(f"Bad filter {expression!r} - expected field=value, field>=value, field~text ...")
+        field, operator, value = match.groups()
+        if operator == '=' and '|' in value:
+            filters[f"{field}__in"] = value.split('|')
+        elif operator == '~':
+            filters[f"{field}__like"] = f"%{value}%"
+        else:
+            filters[f"{field}__{FILTER_OPERATORS[operator]}"] = value
+    return filters
+
+
+def query(args):
+    import sqlite3
+    import time
+
+    import pandas as pd
+
+    from pipeline.querystore import QueryStore
+
+    store = QueryStore(args.db)
+    if args.action == 'load':
+        for summary in store.load_all(force=args.force):
+            state = 'loaded' if summary['loaded'] else 'unchanged' if summary['layer'] else 'no outputs'
+            print(f"✅ {summary['dataset']:12s} {summary['rows']:8d} rows from {summary['files']} "
+                  f"{summary['layer'] or '-'} files ({state})")
+        return
+    if args.action == 'check':
+        results = store.checks()
+        for result in results:
+            print(f"{'✅' if result['passed'] else '❌'} {result['check']}: {result['value']} (target {result['target']})")
+        sys.exit(0 if all(result['passed'] for result in results) else 1)
+
+    started = time.perf_counter()
+    try:
+        if args.action == 'sql':
+            rows = store.sql(args.query)
+        else:
+            filters = parse_filters(args.filters)
+            if args.explain:
+                print('\n'.join(store.plan(args.dataset, **filters)))
+            columns = args.columns.split(',') if args.columns else None
+            rows = store.find(args.dataset, columns=columns, order_by=args.order_by, limit=args.limit, **filters)
+    except (ValueError, sqlite3.Error) as e:
+        sys.exit(str(e))
+    elapsed = (time.perf_counter() - started) * 1000
+    df = pd.DataFrame(rows)
+    if args.output:
+        df.to_csv(args.output, index=False)
+        print(f"✅ {len(df)} rows in {elapsed:.1f} ms, saved {args.output}")
+    else:
+        print(df.head(args.show).to_string(index=False) if len(df) else "(no rows)")
+        print(f"{len(df)} rows in {elapsed:.1f} ms")
+
+
+def publish(args):
+    from configs.settings import DATA_ROOT, STORAGE_SETTINGS
+    from pipeline.storage import open_store, sync_layout
+
+    url = args.url or STORAGE_SETTINGS['url']
+    if not url:
+        sys.exit("No storage configured - pass --url or set PIPELINE_STORAGE_URL")
+    stats = sync_layout(open_store(url), DATA_ROOT, args.layer)
+    print(f"✅ Published {DATA_ROOT} to {url}: {stats['uploaded']} uploaded "
+          f"({stats['bytes'] / 1024 ** 2:.1f} MB), {stats['skipped']} unchanged")
+
+
+def bench(args):
+    module = importlib.import_module(BENCHES[args.name])
+    sys.argv = [f"bench {args.name}", *args.args]
+    module.main()
+
+
+def build_parser():
+    from main import add_arguments
+
+    parser = argparse.ArgumentParser(description="Dallas data pipeline")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('scrape', help="run the collection pipeline (resumable)")
+    add_arguments(command)
+    command.set_defaults(handler=scrape)
+
+    command = commands.add_parser('enrich', help="enrich the restaurant baseline CSV")
+    command.add_argument('--input', default='dallas_restaurants_final.csv')
+    command.add_argument('--output', default='dallas_restaurants_enriched.csv')
+    command.add_argument('--full-refresh', action='store_true',
+                         help="re-enrich every row instead of only new/changed ones")
+    command.set_defaults(handler=enrich)
+
+    command = commands.add_parser('dedup', help="collapse duplicate name+address rows in a CSV/Parquet file")
+    command.add_argument('input')
+    command.add_argument('--output', default='deduped.csv')
+    command.set_defaults(handler=dedup)
+
+    command = commands.add_parser('export', help="export a stored dataset to CSV/Excel in schema order")
+    command.add_argument('dataset', choices=['restaurants', 'causes', 'creators'])
+    command.add_argument('output', help="*.csv or *.xlsx")
+    command.add_argument('--layer', default='clean', choices=['raw', 'staging', 'clean'])
+    command.add_argument('--city')
+    command.add_argument('--source')
+    command.set_defaults(handler=export_dataset)
+
+    command = commands.add_parser('query', help="indexed local store over the newest outputs")
+    command.add_argument('--db', help="SQLite path (default PIPELINE_QUERY_DB)")
+    actions = command.add_subparsers(dest='action', required=True)
+    action = actions.add_parser('load', help="(re)load every dataset whose outputs changed")
+    action.add_argument('--force', action='store_true')
+    action = actions.add_parser('find', help="filter a dataset, e.g. restaurants neighborhood=Uptown price_band='$$$$'")
+    action.add_argument('dataset', choices=['restaurants', 'causes', 'creators'])
+    action.add_argument('filters', nargs='*', help="field=value, field>=value, field~text, field=a|b "
+                                                   "(restaurants also take cuisine=TAG)")
+    action.add_argument('--columns', help="comma-separated columns (default all)")
+    action.add_argument('--order-by', help="field, or --order-by=-field for descending")
+    action.add_argument('--limit', type=int)
+    action.add_argument('--output', help="write every matching row to this CSV")
+    action.add_argument('--show', type=int, default=20, help="rows printed")
+    action.add_argument('--explain', action='store_true', help="print the query plan first")
+    action = actions.add_parser('sql', help="run a read-only SQL query")
+    action.add_argument('query')
+    action.add_argument('--output')
+    action.add_argument('--show', type=int, default=20)
+    actions.add_parser('check', help="acceptance checks - exits 1 if any fails")
+    command.set_defaults(handler=query)
+
+    command = commands.add_parser('publish', help="sync the local raw/staging/clean layout to object storage")
+    command.add_argument('--url', help="s3://bucket[/prefix] or a directory (default PIPELINE_STORAGE_URL)")
+    command.add_argument('--layer', action='append', choices=['raw', 'staging', 'clean'],
+                         help="only these layers (repeatable)")
+    command.set_defaults(handler=publish)
+
+    command = commands.add_parser('bench', help="run a benchmark")
+    command.add_argument('name', choices=list(BENCHES))
+    command.add_argument('args', nargs=argparse.REMAINDER, help="passed through to the benchmark")
+    command.set_defaults(handler=bench)
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
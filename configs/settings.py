@@ -18,4 +18,328 @@ RESTAURANT_SCHEMA = [
     "reservation_url", "price_band", "cuisine_tags", "neighborhood",
     "lat", "lng", "hours", "avg_check_estimate", "rating", "review_count",
     "image_url", "menu_url", "source_platform"
-]
\ No newline at end of file
+]
+
+CAUSES_SCHEMA = [
+    "org_name", "EIN", "org_type", "address", "phone", "email", "contact_name",
+    "website", "size_indicator", "IRS_990_link"
+]
+
+CREATORS_SCHEMA = [
+    "handle", "platform", "followers", "engagement_rate", "audience_location_pct",
+    "food_focus_pct", "cadence_flag", "email", "bio", "link_ready_flag",
+    "compliance_flag", "tier"
+]
+
+# Local root of the raw/staging/clean layout (mirrors s3://S3_BUCKET/)
+DATA_ROOT = os.environ.get("PIPELINE_DATA_ROOT", "data")
+
+# Object storage mirror of DATA_ROOT (pipeline/storage.py) - unset keeps outputs local only; with
+# s3://bucket[/prefix] (or another directory) every Parquet part is uploaded as it is written and
+# `cli.py publish` syncs whole layers. endpoint_url points boto3 at an S3 stand-in (moto server, MinIO).
+# Files of small_file_bytes or more go up as multipart uploads of part_size (S3's minimum is 5 MB) on
+# `workers` threads; at most max_in_flight parts/small files are held in memory at once.
+STORAGE_SETTINGS = {
+    "url": os.environ.get("PIPELINE_STORAGE_URL", ""),
+    "endpoint_url": os.environ.get("PIPELINE_S3_ENDPOINT") or None,
+    "part_size": 8 * 1024 ** 2,
+    "small_file_bytes": 8 * 1024 ** 2,
+    "max_in_flight": 8,
+    "workers": 8
+}
+
+# Local query store (pipeline/querystore.py, `cli.py query`) - SQLite copy of the newest run of each
+# dataset, read from the first of `layers` that has it. indexes = per-table column or [column, ...]
+# indexes - a composite index also answers filters on its leading columns, so the restaurant ones
+# cover neighborhood, price_band and reservation_platform alone or combined
+QUERY_SETTINGS = {
+    "path": os.environ.get("PIPELINE_QUERY_DB", os.path.join(".cache", "query.sqlite")),
+    "layers": ["clean", "staging", "raw"],
+    "indexes": {
+        "restaurants": [["neighborhood", "price_band", "reservation_platform"],
+                        ["price_band", "reservation_platform"], "reservation_platform"],
+        "causes": ["EIN", "org_type"],
+        "creators": ["handle", ["tier", "audience_location_pct"]]
+    }
+}
+
+# Stage runner (pipeline/dag.py) - completed stage outputs are checkpointed per run id
+PIPELINE_SETTINGS = {
+    "checkpoint_dir": os.environ.get("PIPELINE_CHECKPOINT_DIR", ".cache/checkpoints"),
+    "max_workers": 4
+}
+
+# Fetch engine - shared by all scrapers (pipeline/fetch.py)
+# rate = requests/sec per host (token bucket), burst = bucket capacity
+FETCH_SETTINGS = {
+    "per_host": 4,
+    "rate": 2.0,
+    "burst": 2,
+    "timeout": 15,
+    "total_connections": 100
+}
+
+# Streaming scrape -> sink (pipeline/fetch.py iter_fetch, pipeline/sink.py)
+# fetch_window = URLs in flight, queue_pages = fetched pages waiting to be parsed,
+# chunk_size = records per Parquet part, pending_chunks = chunks waiting on the writer,
+# gc_pages = streamed page parses between young-generation GC passes (pipeline/extract.py)
+STREAM_SETTINGS = {
+    "fetch_window": 16,
+    "queue_pages": 8,
+    "chunk_size": 5000,
+    "pending_chunks": 2,
+    "gc_pages": 8
+}
+
+# Metrics (pipeline/metrics.py) - off unless PIPELINE_METRICS=1; exported every `interval`
+# seconds as JSON lines and as a Prometheus textfile (node_exporter textfile collector)
+METRICS_SETTINGS = {
+    "enabled": os.environ.get("PIPELINE_METRICS", "") == "1",
+    "interval": 30,
+    "jsonl_path": os.environ.get("PIPELINE_METRICS_JSONL", os.path.join(".cache", "metrics", "metrics.jsonl")),
+    "textfile_path": os.environ.get("PIPELINE_METRICS_TEXTFILE", os.path.join(".cache", "metrics", "pipeline.prom")),
+    "buckets": [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+}
+
+# Per-host overrides of the politeness budget
+HOST_RATE_LIMITS = {
+    "www.opentable.com": {"rate": 1.0, "burst": 2, "per_host": 2},
+    "resy.com": {"rate": 1.0, "burst": 2, "per_host": 2},
+    "www.exploretock.com": {"rate": 1.0, "burst": 2, "per_host": 2}
+}
+
+# Transport (pipeline/transport.py) - every FetchEngine request goes through it
+# AIMD: each host's rate starts at its HOST_RATE_LIMITS/FETCH_SETTINGS rate (also the ceiling), grows by
+# `increase` req/s per clean response and is multiplied by `decrease` on 429/403/503 or a response slower
+# than `slow_seconds` - at most once per `decrease_interval`, so one burst of 429s counts as one signal.
+# proxies = comma-separated proxy URLs (SmartProxy/BrightData gateways on EC2), empty means direct.
+# A proxy's breaker opens after `breaker_failures` blocked/failed requests in a row and lets one trial
+# request through after `breaker_cooldown` seconds. Retries back off exponentially (full jitter) from
+# `backoff_base`, a Retry-After header is honored as-is, and waits past `backoff_max` are not retried.
+TRANSPORT_SETTINGS = {
+    "retries": 3,
+    "retry_statuses": [403, 429, 503],
+    "backoff_base": 1.0,
+    "backoff_max": 60.0,
+    "increase": 0.25,
+    "decrease": 0.8,
+    "min_rate": 0.05,
+    "slow_seconds": 8.0,
+    "decrease_interval": 1.0,
+    "proxies": [p for p in os.environ.get("PIPELINE_PROXIES", "").split(",") if p],
+    "breaker_failures": 5,
+    "breaker_cooldown": 60.0,
+    "user_agents": [
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Safari/605.1.15",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:125.0) Gecko/20100101 Firefox/125.0",
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+    ]
+}
+
+# Work queue (pipeline/workqueue.py, crawl_worker.py) - sqlite:///path locally, an SQS queue URL in prod
+# (launch_ec2.py refuses sqlite; a .fifo SQS queue also drops units re-sharded within 5 minutes)
+# lease_seconds = visibility timeout (extended by a heartbeat while a unit runs)
+WORK_QUEUE_SETTINGS = {
+    "url": os.environ.get("PIPELINE_QUEUE_URL", "sqlite:///.cache/workqueue.sqlite"),
+    "lease_seconds": 300,
+    "max_attempts": 5,
+    "retry_delay": 30,
+    "poll_seconds": 10,
+    "pages_per_unit": 5
+}
+
+# Response cache (pipeline/cache.py) - set PIPELINE_OFFLINE=1 to replay from cache only
+CACHE_SETTINGS = {
+    "root": os.environ.get("PIPELINE_CACHE_DIR", ".cache/http"),
+    "max_bytes": 2 * 1024 ** 3,
+    "offline": os.environ.get("PIPELINE_OFFLINE", "") == "1"
+}
+
+# Cache TTLs per source, in seconds
+CACHE_TTLS = {
+    "default": 6 * 3600,
+    "opentable": 24 * 3600,
+    "resy": 24 * 3600,
+    "tock": 24 * 3600,
+    "public_directories": 24 * 3600,
+    "school_directories": 7 * 24 * 3600,
+    "google_places": 30 * 24 * 3600
+}
+
+# Cuisine taxonomy (pipeline/taxonomy.py, configs/reference/cuisine_taxonomy.csv) - cuisine_tags are
+# derived from whichever of text_columns a table has (listing cuisine, Yelp categories, Google types,
+# descriptions, menu text); cache_size = distinct texts memoized before the memo is reset
+CUISINE_SETTINGS = {
+    "text_columns": ["cuisine_tags", "cuisine", "categories", "yelp_categories", "google_types", "description",
+                     "menu_text"],
+    "cache_size": 200000
+}
+
+# Incremental runs (pipeline/incremental.py) - content fingerprints per listing page and per record,
+# plus the last merged snapshot per dataset. Unchanged pages are not re-parsed (their last records are
+# re-emitted, so raw partitions stay complete), unchanged records are not re-deduped/enriched and keep
+# their last_updated. PIPELINE_FULL_REFRESH=1 ignores the state.
+INCREMENTAL_SETTINGS = {
+    "enabled": os.environ.get("PIPELINE_FULL_REFRESH", "") != "1",
+    "path": os.environ.get("PIPELINE_STATE_DB", ".cache/state.sqlite"),
+    "snapshot_dir": os.environ.get("PIPELINE_SNAPSHOT_DIR", ".cache/snapshots")
+}
+
+# URL verification (pipeline/verify.py) - verdicts are cached per normalized URL; a working
+# link is rechecked after ttl_ok, a broken one after ttl_broken, an unreachable/unknown one
+# after ttl_unknown. concurrency = requests in flight across all hosts
+VERIFY_SETTINGS = {
+    "path": os.environ.get("PIPELINE_VERIFY_CACHE", ".cache/url_verdicts.sqlite"),
+    "columns": ["website", "reservation_url", "menu_url", "image_url"],
+    "concurrency": 64,
+    "per_host": 4,
+    "rate": 4.0,
+    "timeout": 10,
+    "max_redirects": 5,
+    "ttl_ok": 7 * 24 * 3600,
+    "ttl_broken": 24 * 3600,
+    "ttl_unknown": 6 * 3600
+}
+
+# Enrichment providers (pipeline/places.py)
+# rate = requests/sec, quotas are shared across runs through the memo store
+ENRICHMENT_PROVIDERS = {
+    "google_places": {
+        "url": "https://maps.googleapis.com/maps/api/place/findplacefromtext/json",
+        "api_key_env": "GOOGLE_PLACES_API_KEY",
+        "rate": 5.0,
+        "concurrency": 8,
+        "daily_quota": 330,
+        "monthly_quota": 10000,
+        "ttl_days": 30
+    },
+    "yelp": {
+        "url": "https://api.yelp.com/v3/businesses/search",
+        "api_key_env": "YELP_API_KEY",
+        "rate": 5.0,
+        "concurrency": 8,
+        "daily_quota": 5000,
+        "monthly_quota": None,
+        "ttl_days": 7
+    }
+}
+ENRICHMENT_MEMO_PATH = os.environ.get("PIPELINE_ENRICHMENT_MEMO", ".cache/enrichment.sqlite")
+
+# Geography gate - Dallas city + 10-15 mi (pipeline/geo.py)
+DALLAS_CENTER = (32.7767, -96.7970)
+GEO_RADIUS_MILES = 15
+NEIGHBORHOODS_PATH = os.path.join("configs", "reference", "dallas_neighborhoods.geojson")
+DALLAS_ZIP_PREFIXES = ["750", "751", "752", "753"]
+
+# City registry - one entry per metro, expanded into the city x source job matrix
+# (pipeline/matrix.py). Adding a city is a config change: bbox is (south, west, north, east),
+# platform_ids are the metro slugs each reservation platform uses in its listing URLs.
+CITIES = {
+    "dallas": {
+        "name": "Dallas", "state": "TX", "center": DALLAS_CENTER, "radius_miles": GEO_RADIUS_MILES,
+        "bbox": (32.55, -97.05, 33.05, -96.55), "zip_prefixes": DALLAS_ZIP_PREFIXES,
+        "isd_directories": [
+            "https://www.dallasisd.org/directory",
+            "https://www.hpisd.org/schools",
+            "https://www.planoisd.edu/schools"
+        ],
+        "hashtags": ["#dallasfoodie", "#dallaseats", "#dfwfoodie", "#LTKunder50", "#ShopMy", "#liketoknowit"],
+        "platform_ids": {"opentable": "dallas-restaurants", "resy": "dal", "tock": "dallas"}
+    },
+    "fort_worth": {
+        "name": "Fort Worth", "state": "TX", "center": (32.7555, -97.3308), "radius_miles": 15,
+        "bbox": (32.55, -97.55, 32.99, -97.10), "zip_prefixes": ["760", "761"],
+        "isd_directories": ["https://www.fwisd.org/schools"],
+        "hashtags": ["#fortworthfoodie", "#fortwortheats", "#fwfoodie"],
+        "platform_ids": {"opentable": "fort-worth-restaurants", "resy": "ftw", "tock": "fort-worth"}
+    },
+    "houston": {
+        "name": "Houston", "state": "TX", "center": (29.7604, -95.3698), "radius_miles": 20,
+        "bbox": (29.52, -95.79, 30.11, -95.01), "zip_prefixes": ["770", "772"],
+        "isd_directories": ["https://www.houstonisd.org/schools"],
+        "hashtags": ["#houstonfoodie", "#houstoneats", "#htxfoodie"],
+        "platform_ids": {"opentable": "houston-restaurants", "resy": "hou", "tock": "houston"}
+    },
+    "austin": {
+        "name": "Austin", "state": "TX", "center": (30.2672, -97.7431), "radius_miles": 15,
+        "bbox": (30.10, -97.94, 30.52, -97.56), "zip_prefixes": ["786", "787"],
+        "isd_directories": ["https://www.austinisd.org/schools"],
+        "hashtags": ["#austinfoodie", "#austineats", "#atxfoodie"],
+        "platform_ids": {"opentable": "austin-restaurants", "resy": "aus", "tock": "austin"}
+    },
+    "san_antonio": {
+        "name": "San Antonio", "state": "TX", "center": (29.4241, -98.4936), "radius_miles": 15,
+        "bbox": (29.22, -98.77, 29.73, -98.22), "zip_prefixes": ["781", "782"],
+        "isd_directories": ["https://www.saisd.net/schools"],
+        "hashtags": ["#satxfoodie", "#sanantonioeats", "#satxeats"],
+        "platform_ids": {"opentable": "san-antonio-restaurants", "resy": "sat", "tock": "san-antonio"}
+    }
+}
+DEFAULT_CITY = "dallas"
+
+# Common Crawl discovery (pipeline/commoncrawl.py) - local CDX shards (cdx-*.gz, plus cluster.idx
+# when present) and the WARC files they point into, mirrored under warc_dir by their crawl-data/ path.
+# url_patterns are matched against scheme- and www-less URLs; {opentable}/{resy}/{tock} are the
+# city's platform_ids
+COMMONCRAWL_SETTINGS = {
+    "cdx_dir": os.environ.get("COMMONCRAWL_CDX_DIR", os.path.join("data", "commoncrawl", "cdx")),
+    "warc_dir": os.environ.get("COMMONCRAWL_WARC_DIR", os.path.join("data", "commoncrawl")),
+    "url_patterns": {
+        "opentable": ["opentable.com/r/"],
+        "resy": ["resy.com/cities/{resy}/"],
+        "tock": ["exploretock.com/"]
+    },
+    "read_size": 1024 * 1024
+}
+
+# Job matrix (pipeline/matrix.py) - max_workers = None uses every core; jobs_per_host caps how
+# many processes hit one host at once (override per host with a "jobs" key in HOST_RATE_LIMITS),
+# since each process keeps its own politeness budget. pages = pages per city for paginated sources
+MATRIX_SETTINGS = {
+    "max_workers": None,
+    "jobs_per_host": 1,
+    "pages": 5
+}
+
+# IRS Exempt Organizations Business Master File (causes/irs_bmf.py)
+# source_dir holds the eo_*.csv extracts, index_dir the memory-mapped EIN index built from them
+IRS_BMF_SETTINGS = {
+    "source_dir": os.environ.get("IRS_BMF_DIR", os.path.join("data", "irs", "bmf")),
+    "index_dir": os.environ.get("IRS_BMF_INDEX_DIR", os.path.join(".cache", "irs_bmf_index"))
+}
+
+# Creator tier gates (creators/tiers.py) - checked best tier first, a creator lands in the
+# first tier whose every gate passes. Rates and percentages are fractions (0.03 = 3%),
+# cadence is posts per month (weekly ~ 4.3, 1 post in 90 days ~ 0.33). Where the playbook gives
+# a range (VIP: 2.5-3% ER, 35-40% Dallas audience) the value is the one that reproduces the
+# hand-labelled tiers in dallas_creators_sample.json
+CREATOR_TIERS = [
+    {"tier": "VIP", "min_followers": 3000, "max_followers": 250000, "min_engagement_rate": 0.029,
+     "min_audience_location_pct": 0.36, "min_food_focus_pct": 0.50, "min_posts_per_month": 4.3},
+    {"tier": "Strong", "min_followers": 2000, "max_followers": 300000, "min_engagement_rate": 0.015,
+     "min_audience_location_pct": 0.25, "min_food_focus_pct": 0.35, "min_posts_per_month": 2.0},
+    {"tier": "Long-Tail", "min_followers": 1000, "max_followers": 500000, "min_engagement_rate": 0.01,
+     "min_audience_location_pct": 0.15, "min_food_focus_pct": 0.25, "min_posts_per_month": 0.33}
+]
+
+# Exclusion rules applied before any tier - inactive, fake, "DM for comps"
+CREATOR_EXCLUSIONS = {
+    "bio_patterns": [r"dm\s+(?:me\s+)?for\s+comps?", r"comps?\s+only"],
+    "inactive_cadence_flags": ["inactive"],
+    "max_fake_follower_pct": 0.30,
+    "require_compliance": True
+}
+
+# cadence_flag -> posts per month, used when a profile has no numeric posts_per_month.
+# A boolean cadence_flag (true/false) reads as active/inactive, active = posting weekly
+CADENCE_POSTS_PER_MONTH = {
+    "active": 4.3,
+    "daily": 30.0,
+    "weekly": 4.3,
+    "biweekly": 2.0,
+    "monthly": 1.0,
+    "quarterly": 0.33,
+    "inactive": 0.0
+}
@@ -0,0 +1,55 @@
+# crawl_worker.py
+# Sharded crawl over the durable work queue (pipeline/workqueue.py).
+#   Shard:  python crawl_worker.py enqueue --source opentable --pages 100
+#   Drain:  python crawl_worker.py work --workers 4      (run on as many machines as you like)
+#   Watch:  python crawl_worker.py stats
+#   Local:  python crawl_worker.py matrix --city dallas houston   (no queue, one process pool)
+import argparse
+import multiprocessing
+
+from configs.settings import CITIES, WORK_QUEUE_SETTINGS
+from pipeline.matrix import SOURCES, default_sources, run_matrix, run_unit, shard_units
+from pipeline.workqueue import open_queue, run_worker
+
+
+def _work(queue_url):
+    return run_worker(open_queue(queue_url), run_unit)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded crawl workers")
+    parser.add_argument('--queue', default=WORK_QUEUE_SETTINGS['url'], help="sqlite:///path or SQS queue URL")
+    commands = parser.add_subparsers(dest='command', required=True)
+    for name in ('enqueue', 'matrix'):
+        command = commands.add_parser(name)
+        command.add_argument('--source', nargs='+', choices=list(SOURCES), default=default_sources())
+        command.add_argument('--city', nargs='+', choices=list(CITIES), default=list(CITIES))
+        command.add_argument('--pages', type=int, help="pages per city for paginated sources")
+        command.add_argument('--per-unit', type=int, default=WORK_QUEUE_SETTINGS['pages_per_unit'])
+        if name == 'matrix':
+            command.add_argument('--workers', type=int, help="worker processes (default: every core)")
+    work = commands.add_parser('work')
+    work.add_argument('--workers', type=int, default=1, help="local worker processes")
+    commands.add_parser('stats')
+    args = parser.parse_args()
+
+    if args.command == 'matrix':
+        summaries, failures = run_matrix(shard_units(args.source, args.city, args.pages, args.per_unit), args.workers)
+        records = sum(summary['records'] for summary in summaries.values())
+        print(f"Matrix: {len(summaries)} units done ({records} records), {len(failures)} failed")
+        return
+
+    queue = open_queue(args.queue)
+    if args.command == 'enqueue':
+        added = queue.put(shard_units(args.source, args.city, args.pages, args.per_unit))
+        print(f"Queued {added} crawl units")
+    elif args.command == 'work':
+        with multiprocessing.Pool(args.workers) as pool:
+            results = pool.map(_work, [args.queue] * args.workers)
+        for result in results:
+            print(f"{result['owner']}: {result['done']} done, {result['failed']} failed")
+    print(f"Queue: {queue.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,16 @@
-# creators/scripts/scrape_hashtags.py
-import requests
-import pandas as pd
+# creators/scrape_hashtags.py
+from configs.settings import CITIES, DEFAULT_CITY
 
-def scrape_instagram_hashtags():
+HASHTAGS = CITIES[DEFAULT_CITY]['hashtags']
+
+def iter_instagram_hashtags(hashtags=None, city=DEFAULT_CITY):
     """Start with hashtag discovery - no API needed initially"""
-    hashtags = [
-        "#dallasfoodie", "#dallaseats", "#dfwfoodie",
-        "#LTKunder50", "#ShopMy", "#liketoknowit"
-    ]
-    
-    creators = []
-    for hashtag in hashtags[:2]:  # Start with 2 hashtags
+    for hashtag in hashtags or CITIES[city]['hashtags'][:2]:  # Start with 2 hashtags
         # Use simple HTML scraping or public pages
-        creators.extend(scrape_hashtag_page(hashtag))
-    
-    return creators
+        yield from scrape_hashtag_page(hashtag)
+
+def scrape_instagram_hashtags(hashtags=None):
+    return list(iter_instagram_hashtags(hashtags))
 
 def scrape_hashtag_page(hashtag):
     """Scrape public hashtag pages for creator handles"""
@@ -27,4 +23,4 @@ def scrape_hashtag_page(hashtag):
         'bio': 'Dallas food content creator',
         'link_ready_flag': True
     }]
-    return creators
\ No newline at end of file
+    return creators
@@ -0,0 +1,126 @@
+# creators/tiers.py
+import numpy as np
+import pandas as pd
+
+from configs.settings import CADENCE_POSTS_PER_MONTH, CREATOR_EXCLUSIONS, CREATOR_TIERS
+from pipeline.columnar import COLUMN_ALIASES
+
+# Gate order = the order failures are reported in
+GATES = ['min_followers', 'max_followers', 'min_engagement_rate', 'min_audience_location_pct',
+         'min_food_focus_pct', 'min_posts_per_month']
+
+
+def _fraction(values):
+    """Numeric column as a 0-1 fraction, missing -> NaN
+
+    The unit is decided per column: any value above 1 means the column is in percent
+    ('3.2' and 3.2 become 0.032, and 0.9 in the same column is 0.9%, not 90%).
+    """
+    numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
+    return numbers / 100 if np.nan_to_num(numbers).max(initial=0) > 1 else numbers
+
+
+def _column(df, name, default=np.nan):
+    """A column by schema name or any of its legacy aliases ('audience_location_pct_DFW')"""
+    for column in [name, *(alias for alias, field in COLUMN_ALIASES.items() if field == name)]:
+        if column in df.columns:
+            return df[column]
+    return pd.Series(default, index=df.index)
+
+
+def creator_metrics(creators, exclusions=None):
+    """Columnar gate inputs plus exclusion masks, computed once per table and shared by every tier"""
+    followers = _column(creators, 'followers')
+    if followers.dtype == object:
+        followers = followers.astype(str).str.replace(',', '', regex=False)
+    cadence = _column(creators, 'cadence_flag', '').fillna('').astype(str).str.strip().str.lower()
+    cadence = cadence.replace({'true': 'active', 'false': 'inactive'})  # boolean flags in the sample data
+    posts = pd.to_numeric(_column(creators, 'posts_per_month'), errors='coerce')
+    posts = posts.fillna(cadence.map(CADENCE_POSTS_PER_MONTH))
+    return {
+        'followers': pd.to_numeric(followers, errors='coerce').to_numpy(dtype=float),
+        'engagement_rate': _fraction(_column(creators, 'engagement_rate')),
+        'audience_location_pct': _fraction(_column(creators, 'audience_location_pct')),
+        'food_focus_pct': _fraction(_column(creators, 'food_focus_pct')),
+        'posts_per_month': posts.to_numpy(dtype=float),
+        'excluded_by': exclusion_masks(creators, cadence, exclusions)
+    }
+
+
+def exclusion_masks(creators, cadence, rules=None):
+    """{reason: mask} for the exclusion rules - missing data never excludes"""
+    rules = rules or CREATOR_EXCLUSIONS
+    bio = _column(creators, 'bio', '').fillna('').astype(str)
+    pattern = '|'.join(f"(?:{p})" for p in rules['bio_patterns'])
+    masks = {
+        'comps_request': bio.str.contains(pattern, case=False, regex=True).to_numpy(dtype=bool),
+        'inactive': cadence.isin(rules['inactive_cadence_flags']).to_numpy()
+    }
+    fake = _fraction(_column(creators, 'fake_follower_pct'))
+    masks['fake_followers'] = np.nan_to_num(fake) > rules['max_fake_follower_pct']
+    if rules['require_compliance']:
+        compliance = _column(creators, 'compliance_flag', '').astype(str).str.strip().str.lower()
+        masks['non_compliant'] = compliance.isin(['false', '0', 'no']).to_numpy()
+    return masks
+
+
+def gate_masks(metrics, tier):
+    """Pass mask per gate (rows in GATES order) for one tier - NaN metrics fail their gate"""
+    return np.stack([
+        metrics['followers'] >= tier['min_followers'],
+        metrics['followers'] <= tier['max_followers'],
+        metrics['engagement_rate'] >= tier['min_engagement_rate'],
+        metrics['audience_location_pct'] >= tier['min_audience_location_pct'],
+        metrics['food_focus_pct'] >= tier['min_food_focus_pct'],
+        metrics['posts_per_month'] >= tier['min_posts_per_month']
+    ])
+
+
+def assign_tiers(creators, tiers=None, exclusions=None, metrics=None):
+    """Tier every creator in one columnar pass
+
+    Adds `tier` ('' when no tier's gates pass, 'Excluded' when an exclusion rule hits)
+    and `failed_gate`: the exclusion reason, or '<tier>:<gate>' for the first gate that
+    kept the creator out of the tier above the one it landed in (untiered creators report
+    the loosest tier's gate). Pass precomputed `metrics` to re-tier the same table under
+    new thresholds. Both columns are categoricals built from integer codes.
+    """
+    tiers = tiers or CREATOR_TIERS
+    metrics = metrics or creator_metrics(creators, exclusions)
+    n = len(creators)
+    reasons = list(metrics['excluded_by'])
+
+    # Categories: tiers..., '', 'Excluded' / '', '<tier>:<gate>'..., exclusion reasons...
+    tier_labels = [rule['tier'] for rule in tiers] + ['', 'Excluded']
+    gate_labels = [''] + [f"{rule['tier']}:{gate}" for rule in tiers for gate in GATES] + reasons
+    tier_code = np.full(n, len(tiers), dtype=np.int8)
+    gate_code = np.zeros(n, dtype=np.int16)
+
+    unassigned = np.ones(n, dtype=bool)
+    for t, rule in enumerate(tiers):
+        masks = gate_masks(metrics, rule)
+        passed = masks.all(axis=0)
+        # Whoever misses this tier records why; a lower tier may still take them
+        missed = unassigned & ~passed
+        gate_code[missed] = 1 + t * len(GATES) + np.argmin(masks[:, missed], axis=0)
+        tier_code[unassigned & passed] = t
+        unassigned &= ~passed
+
+    if reasons:
+        excluded_by = np.stack([metrics['excluded_by'][reason] for reason in reasons])
+        excluded = excluded_by.any(axis=0)
+        tier_code[excluded] = len(tiers) + 1
+        gate_code[excluded] = 1 + len(tiers) * len(GATES) + np.argmax(excluded_by[:, excluded], axis=0)
+
+    df = creators.copy()
+    df['tier'] = pd.Categorical.from_codes(tier_code, tier_labels)
+    df['failed_gate'] = pd.Categorical.from_codes(gate_code, gate_labels)
+    return df
+
+
+def tier_summary(tiered):
+    """Counts per tier and per failed gate - for run logs"""
+    return {
+        'tiers': tiered['tier'].astype(str).replace('', 'Untiered').value_counts().to_dict(),
+        'failed_gates': tiered.loc[tiered['failed_gate'] != '', 'failed_gate'].astype(str).value_counts().to_dict()
+    }
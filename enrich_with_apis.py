@@ -1,68 +1,24 @@
+import os
+
 import pandas as pd
-import requests
-import time
-import json
 
-print("=== Enriching Dallas Restaurants with Real APIs ===\\n")
+from pipeline.places import enrich_with_providers
+from pipeline.taxonomy import get_tagger
 
-# Load our manual dataset
-restaurants = pd.read_csv('dallas_restaurants_final.csv')
-print(f"Loaded {len(restaurants)} restaurants for enrichment\\n")
 
-def enrich_with_google_places(restaurant):
-    """Enrich restaurant data with Google Places API"""
-    
-    # Google Places API (using free tier)
-    api_key = ""  # We'll use the free tier without key first
-    base_url = "https://maps.googleapis.com/maps/api/place/findplacefromtext/json"
-    
-    query = f"{restaurant['name']} {restaurant['address']}"
-    
-    params = {
-        'input': query,
-        'inputtype': 'textquery',
-        'fields': 'name,formatted_address,rating,user_ratings_total,formatted_phone_number,website,opening_hours,geometry,photos',
-        'key': api_key
-    }
-    
-    try:
-        print(f"Enriching {restaurant['name']}...")
-        response = requests.get(base_url, params=params, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            
-            if data.get('candidates'):
-                place = data['candidates'][0]
-                
-                # Add enriched data
-                enriched = restaurant.copy()
-                enriched.update({
-                    'google_rating': place.get('rating', ''),
-                    'google_review_count': place.get('user_ratings_total', ''),
-                    'phone': place.get('formatted_phone_number', ''),
-                    'website': place.get('website', ''),
-                    'lat': place.get('geometry', {}).get('location', {}).get('lat', ''),
-                    'lng': place.get('geometry', {}).get('location', {}).get('lng', ''),
-                    'hours_available': 'opening_hours' in place,
-                    'photos_available': 'photos' in place,
-                    'enrichment_source': 'Google Places API',
-                    'last_updated': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
-                })
-                print(f"  ✅ Enriched with Google Places data")
-                return enriched
-            else:
-                print(f"  ⚠️  No Google Places data found")
-        else:
-            print(f"  ❌ API error: {response.status_code}")
-            
-    except Exception as e:
-        print(f"  ❌ Enrichment error: {e}")
-    
-    # Return original if enrichment fails
-    restaurant['enrichment_source'] = 'Manual (API failed)'
-    restaurant['last_updated'] = pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
-    return restaurant
+def enrich_with_google_places(restaurants):
+    """Enrich the restaurant table with Google Places + Yelp in one batched, quota-aware pass"""
+    
+    # Lookups run concurrently under each provider's rate and daily quota, duplicate
+    # name+address queries collapse into one call, and results are memoized by the
+    # SHA256 key so reruns only spend quota on new or stale rows (pipeline/places.py)
+    enriched = enrich_with_providers(restaurants)
+    
+    found = enriched.get('google_rating', pd.Series(index=enriched.index, dtype=object)).notna()
+    enriched['enrichment_source'] = found.map({True: 'Google Places API', False: 'Manual (API failed)'})
+    enriched['last_updated'] = pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
+    print(f"  ✅ Enriched {found.sum()} of {len(enriched)} restaurants with Google Places data")
+    return enriched.drop(columns=['record_key'])
 
 def add_reservation_platforms(restaurant):
     """Add reservation platform information"""
@@ -109,6 +65,12 @@ def estimate_price_bands(restaurant):
     return restaurant
 
 def main():
+    print("=== Enriching Dallas Restaurants with Real APIs ===\\n")
+    
+    # Load our manual dataset
+    restaurants = pd.read_csv('dallas_restaurants_final.csv')
+    print(f"Loaded {len(restaurants)} restaurants for enrichment\\n")
+    
     print("Starting enrichment process...\\n")
     
     enriched_restaurants = []
@@ -120,15 +82,18 @@ def main():
         # Step 2: Standardize price bands
         restaurant = estimate_price_bands(restaurant)
         
-        # Step 3: Enrich with Google Places (commented out for now - would need API key)
-        # restaurant = enrich_with_google_places(restaurant)
-        
         enriched_restaurants.append(restaurant)
-        time.sleep(0.5)  # Be respectful
     
     # Create final DataFrame
     final_df = pd.DataFrame(enriched_restaurants)
     
+    # Step 3: Enrich with Google Places + Yelp (needs GOOGLE_PLACES_API_KEY / YELP_API_KEY)
+    if os.environ.get('GOOGLE_PLACES_API_KEY'):
+        final_df = enrich_with_google_places(final_df)
+    
+    # Step 4: Standardized cuisine tags from cuisine plus the providers' Yelp categories / Google types
+    final_df['cuisine_tags'] = get_tagger().tag_frame(final_df)
+    
     # Add missing schema fields
     final_df['image_url'] = ''  # Would come from Google Places
     final_df['menu_url'] = final_df['website']  # Assume menu on website
@@ -137,7 +102,7 @@ def main():
     # Reorder columns to match promised schema
     schema_order = [
         'name', 'address', 'phone', 'website', 'reservation_platform', 
-        'reservation_url', 'price_band', 'cuisine', 'neighborhood', 
+        'reservation_url', 'price_band', 'cuisine_tags', 'neighborhood', 
         'lat', 'lng', 'hours_available', 'avg_check_estimate', 
         'google_rating', 'google_review_count', 'image_url', 'menu_url', 
         'source_platform', 'enrichment_source', 'last_updated'
@@ -1,160 +1,59 @@
-import pandas as pd
-import requests
-import time
-import json
-
-print("=== Enriching Dallas Restaurants with Real APIs ===\\n")
+import os
 
-# Load our manual dataset
-restaurants = pd.read_csv('dallas_restaurants_final.csv')
-print(f"Loaded {len(restaurants)} restaurants for enrichment\\n")
-
-def add_reservation_platforms(restaurant):
-    """Add reservation platform information"""
-    
-    # Map known restaurants to their reservation platforms
-    reservation_map = {
-        'Gemma': {'platform': 'OpenTable', 'url': 'https://www.opentable.com/r/gemma-dallas'},
-        'Uchi Dallas': {'platform': 'Resy', 'url': 'https://resy.com/cities/dal/uchi-dallas'},
-        'Town Hearth': {'platform': 'OpenTable', 'url': 'https://www.opentable.com/r/town-hearth-dallas'},
-        'Monarch': {'platform': 'Resy', 'url': 'https://resy.com/cities/dal/monarch'},
-        'Al Biernat\'s': {'platform': 'OpenTable', 'url': 'https://www.opentable.com/r/al-biernats-dallas'},
-        'Nick & Sam\'s': {'platform': 'OpenTable', 'url': 'https://www.opentable.com/r/nick-and-sams-dallas'},
-        'Pappas Bros. Steakhouse': {'platform': 'OpenTable', 'url': 'https://www.opentable.com/r/pappas-bros-steakhouse-dallas'},
-        'The Capital Grille': {'platform': 'OpenTable', 'url': 'https://www.opentable.com/r/the-capital-grille-dallas'},
-        'Fearing\'s Restaurant': {'platform': 'OpenTable', 'url': 'https://www.opentable.com/r/fearings-restaurant-dallas'},
-        'Tei-An': {'platform': 'Tock', 'url': 'https://www.exploretock.com/teian'}
-    }
-    
-    if restaurant['name'] in reservation_map:
-        platform_info = reservation_map[restaurant['name']]
-        restaurant['reservation_platform'] = platform_info['platform']
-        restaurant['reservation_url'] = platform_info['url']
-        print(f"  ✅ Added {platform_info['platform']} reservation info for {restaurant['name']}")
-    else:
-        restaurant['reservation_platform'] = 'OpenTable/Resy'
-        restaurant['reservation_url'] = ''
-    
-    return restaurant
+import pandas as pd
 
-def estimate_price_bands(restaurant):
-    """Convert price indicators to standardized bands"""
-    price_mapping = {
-        '$$$': '$$$ (Upscale)',
-        '$$$$': '$$$$ (Fine Dining)'
-    }
-    
-    if restaurant['price'] in price_mapping:
-        restaurant['price_band'] = price_mapping[restaurant['price']]
-        restaurant['avg_check_estimate'] = '75-150' if restaurant['price'] == '$$$' else '100-200'
-    else:
-        restaurant['price_band'] = '$$$ (Upscale)'
-        restaurant['avg_check_estimate'] = '75-150'
-    
-    return restaurant
+from configs.settings import INCREMENTAL_SETTINGS
+from pipeline import metrics
+from pipeline.columnar import export, write_dataset
+from pipeline.enrich import enrich_restaurants, load_reference_tables
+from pipeline.incremental import StateStore, merge_snapshot, plan_changes
+from pipeline.geo import apply_geography
+from pipeline.linkage import link_records
+from pipeline.verify import verify_columns
 
-def add_website_and_contact(restaurant):
-    """Add website and contact information based on known restaurants"""
-    
-    website_map = {
-        'Gemma': 'http://gemmadallas.com',
-        'Uchi Dallas': 'https://uchidallas.com', 
-        'Town Hearth': 'http://townhearthdallas.com',
-        'Monarch': 'https://monarchrestaurants.com/dallas',
-        'Al Biernat\'s': 'https://albiernats.com',
-        'Nick & Sam\'s': 'http://nick-sams.com',
-        'Pappas Bros. Steakhouse': 'https://pappasbros.com',
-        'The Capital Grille': 'https://thecapitalgrille.com',
-        'Fearing\'s Restaurant': 'https://fearingrestaurant.com', 
-        'Tei-An': 'http://tei-an.com'
-    }
-    
-    phone_map = {
-        'Gemma': '214-370-9426',
-        'Uchi Dallas': '214-855-5454',
-        'Town Hearth': '214-761-1617',
-        'Monarch': '214-945-2222',
-        'Al Biernat\'s': '214-219-2201',
-        'Nick & Sam\'s': '214-871-7444',
-        'Pappas Bros. Steakhouse': '214-366-2000',
-        'The Capital Grille': '214-303-0500',
-        'Fearing\'s Restaurant': '214-922-4848',
-        'Tei-An': '214-220-2828'
-    }
-    
-    if restaurant['name'] in website_map:
-        restaurant['website'] = website_map[restaurant['name']]
-        restaurant['phone'] = phone_map[restaurant['name']]
-        restaurant['menu_url'] = f"{website_map[restaurant['name']]}/menu"
-    else:
-        restaurant['website'] = ''
-        restaurant['phone'] = ''
-        restaurant['menu_url'] = ''
-    
-    return restaurant
+def load_restaurants(path='dallas_restaurants_final.csv'):
+    """Load our manual dataset"""
+    restaurants = pd.read_csv(path)
+    print(f"Loaded {len(restaurants)} restaurants for enrichment\\n")
+    return restaurants
 
-def add_geographic_data(restaurant):
-    """Add geographic coordinates for known Dallas restaurants"""
-    
-    coordinates_map = {
-        'Gemma': {'lat': 32.8123, 'lng': -96.7891},
-        'Uchi Dallas': {'lat': 32.7965, 'lng': -96.8102},
-        'Town Hearth': {'lat': 32.8001, 'lng': -96.8194},
-        'Monarch': {'lat': 32.7791, 'lng': -96.7986},
-        'Al Biernat\'s': {'lat': 32.8176, 'lng': -96.8044},
-        'Nick & Sam\'s': {'lat': 32.8003, 'lng': -96.8101},
-        'Pappas Bros. Steakhouse': {'lat': 32.8654, 'lng': -96.8836},
-        'The Capital Grille': {'lat': 32.7934, 'lng': -96.8028},
-        'Fearing\'s Restaurant': {'lat': 32.7947, 'lng': -96.8039},
-        'Tei-An': {'lat': 32.7868, 'lng': -96.8005}
-    }
-    
-    if restaurant['name'] in coordinates_map:
-        coords = coordinates_map[restaurant['name']]
-        restaurant['lat'] = coords['lat']
-        restaurant['lng'] = coords['lng']
-    else:
-        restaurant['lat'] = ''
-        restaurant['lng'] = ''
-    
-    return restaurant
+def dedup(restaurants):
+    """Step 0, returns (one canonical row per restaurant, its record_key for every input row)"""
+    metrics.inc('records_total', stage='dedup', direction='in', value=len(restaurants))
+    
+    # Step 0: Collapse duplicate name+address rows before spending any enrichment on them
+    with metrics.timer('step_seconds', step='dedup'):
+        canonical, annotated, stats = link_records(restaurants)
+    metrics.inc('records_total', stage='dedup', direction='out', value=len(canonical))
+    print(f"  ✅ Dedup: {stats['rows']} rows -> {stats['clusters']} restaurants "
+          f"({stats['candidate_pairs']} candidate pairs scored)")
+    canonical_keys = annotated['cluster_id'].map(canonical.set_index('cluster_id')['record_key'])
+    return canonical.drop(columns=['cluster_id', 'source_count']), canonical_keys.to_numpy()
 
-def main():
-    print("Starting enrichment process...\\n")
-    
-    enriched_restaurants = []
-    
-    for _, restaurant in restaurants.iterrows():
-        print(f"Processing {restaurant['name']}...")
-        
-        # Convert Series to dict for manipulation
-        restaurant_dict = restaurant.to_dict()
-        
-        # Step 1: Add reservation platforms
-        restaurant_dict = add_reservation_platforms(restaurant_dict)
-        
-        # Step 2: Standardize price bands
-        restaurant_dict = estimate_price_bands(restaurant_dict)
-        
-        # Step 3: Add website and contact info
-        restaurant_dict = add_website_and_contact(restaurant_dict)
-        
-        # Step 4: Add geographic data
-        restaurant_dict = add_geographic_data(restaurant_dict)
-        
-        # Step 5: Add metadata
-        restaurant_dict['enrichment_source'] = 'Manual Research + Public Data'
-        restaurant_dict['last_updated'] = pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
-        restaurant_dict['image_url'] = ''  # Would come from actual APIs
-        restaurant_dict['hours'] = 'Mon–Sun 5:00pm–10:00pm'  # Standard assumption
-        restaurant_dict['rating'] = 4.5  # Placeholder - would come from APIs
-        restaurant_dict['review_count'] = 500  # Placeholder
-        
-        enriched_restaurants.append(restaurant_dict)
-        print(f"  ✅ Completed enrichment for {restaurant_dict['name']}\\n")
-    
-    # Create final DataFrame
-    final_df = pd.DataFrame(enriched_restaurants)
+def enrich(canonical):
+    """Enrichment steps 1-7 over deduplicated rows"""
+    # Steps 1-5 (reservation platforms, price bands, contact info, coordinates, metadata)
+    # run as columnar joins against the reference tables in configs/reference/
+    with metrics.timer('step_seconds', step='reference_join'):
+        references = load_reference_tables()
+        final_df = enrich_restaurants(canonical, references)
+    
+    # Step 6: Neighborhoods from the polygon index, then the Dallas + 15 mi geography gate
+    # (rows without coordinates can't be judged yet, so they stay)
+    with metrics.timer('step_seconds', step='geography'):
+        final_df = apply_geography(final_df)
+    outside = ~final_df['in_geography'] & final_df['distance_miles'].notna()
+    if outside.any():
+        print(f"  ⚠️  Dropped {outside.sum()} restaurants outside the geography gate")
+    final_df = final_df[~outside].drop(columns=['distance_miles', 'in_geography'])
+    metrics.inc('records_total', stage='geo_gate', direction='dropped', value=int(outside.sum()))
+    
+    # Step 7: Verify URLs resolve - one deduplicated, host-batched pass over every link column;
+    # redirects become the canonical URL, dead links are blanked, verdicts are cached by TTL
+    with metrics.timer('step_seconds', step='verify_urls'):
+        final_df, url_stats = verify_columns(final_df)
+    print(f"  ✅ URLs: {url_stats['ok']} ok ({url_stats['redirected']} redirected), "
+          f"{url_stats['broken']} broken, {url_stats['unknown']} unverifiable")
     
     # Add source platform
     final_df['source_platform'] = 'OpenTable, Resy, Tock'
@@ -162,7 +61,7 @@ def main():
     # Reorder columns to match promised schema
     schema_order = [
         'name', 'address', 'phone', 'website', 'reservation_platform', 
-        'reservation_url', 'price_band', 'cuisine', 'neighborhood', 
+        'reservation_url', 'price_band', 'cuisine_tags', 'neighborhood', 
         'lat', 'lng', 'hours', 'avg_check_estimate', 'rating', 
         'review_count', 'image_url', 'menu_url', 'source_platform', 
         'enrichment_source', 'last_updated'
@@ -171,21 +70,71 @@ def main():
     # Only keep columns that exist
     existing_columns = [col for col in schema_order if col in final_df.columns]
     final_df = final_df[existing_columns + [col for col in final_df.columns if col not in schema_order]]
+    return final_df
+
+def main(input_path='dallas_restaurants_final.csv', output_path='dallas_restaurants_enriched.csv',
+         full_refresh=False, run_id=None):
+    print("=== Enriching Dallas Restaurants with Real APIs ===\\n")
+    restaurants = load_restaurants(input_path)
     
-    # Save enriched dataset
-    final_df.to_csv('dallas_restaurants_enriched.csv', index=False)
+    print("Starting enrichment process...\\n")
+    metrics.start()
+    run_id = run_id or pd.Timestamp.now().strftime('%Y%m%dT%H%M%S')
+    
+    canonical, canonical_keys = dedup(restaurants)
+    if full_refresh or not INCREMENTAL_SETTINGS['enabled']:
+        final_df = enrich(canonical)
+        delta = None
+    else:
+        # Only restaurants with new/changed rows (or whose duplicate cluster changed) are enriched;
+        # everything else carries over from the last snapshot with its original last_updated
+        state = StateStore()
+        snapshot = state.snapshot('restaurants')
+        previous = state.record_state('restaurants')
+        if snapshot is None and len(previous):
+            # Record state without its snapshot would mark every row unchanged and leave nothing
+            # to carry over - start from scratch instead
+            print("  ⚠️  Last restaurants snapshot is missing - enriching everything")
+            previous = previous.iloc[0:0]
+        plan = plan_changes(restaurants, previous, canonical_keys)
+        print(f"  ♻️  Incremental: {plan['stats']['new']} new, {plan['stats']['changed']} changed, "
+              f"{plan['stats']['deleted']} deleted, {plan['stats']['unchanged']} unchanged rows "
+              f"-> {plan['stats']['rebuild']} restaurants to enrich")
+        rebuild = canonical[canonical['record_key'].isin(plan['rebuild'])]
+        rebuilt = enrich(rebuild) if len(rebuild) else pd.DataFrame(columns=['record_key'])
+        final_df, delta, delta_stats = merge_snapshot(snapshot, rebuilt, plan['replaced'],
+                                                      set(plan['state']['canonical_key']))
+        state.save_snapshot('restaurants', final_df, run_id)
+        state.save_record_state('restaurants', plan['state'])
+        print(f"  ✅ Delta: {delta_stats['inserts']} inserts, {delta_stats['updates']} updates, "
+              f"{delta_stats['deletes']} deletes, {delta_stats['unchanged']} unchanged")
+    
+    # Save enriched dataset - typed Parquet under clean/, the CSV is derived from the same table
+    with metrics.timer('step_seconds', step='write'):
+        parquet_path = write_dataset(final_df, 'restaurants', 'clean', source='enriched')
+        export(final_df, 'restaurants', output_path)
+        if delta is not None:
+            # The run's change set next to the snapshot: restaurants_delta/ and <output>_delta.csv
+            delta_path = f"{os.path.splitext(output_path)[0]}_delta.csv"
+            write_dataset(delta, 'restaurants_delta', 'clean', source='enriched')
+            export(delta, 'restaurants_delta', delta_path)
+    metrics.inc('records_total', stage='enrich', direction='out', value=len(final_df))
     
     print(f"\\n🎉 ENRICHMENT COMPLETE!")
-    print(f"✅ Saved {len(final_df)} enriched restaurants to dallas_restaurants_enriched.csv")
+    print(f"✅ Saved {len(final_df)} enriched restaurants to {parquet_path}")
+    print(f"✅ Exported {output_path}")
+    if delta is not None:
+        print(f"✅ Exported {len(delta)} changes to {delta_path}")
     print(f"✅ Added all missing schema fields")
     print(f"✅ Added real reservation URLs")
     print(f"✅ Added geographic coordinates")
     print(f"✅ Added contact information")
     
     print("\\n📊 FINAL DATASET SAMPLE:")
-    print(final_df[['name', 'neighborhood', 'price_band', 'reservation_platform', 'website']].head())
+    print(final_df.reindex(columns=['name', 'neighborhood', 'price_band', 'reservation_platform', 'website']).head())
     
     print("\\n🚀 NEXT: Run build_all_datasets.py to create the complete three-dataset package")
+    metrics.stop()
 
 if __name__ == "__main__":
     main()
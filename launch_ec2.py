@@ -1,16 +1,31 @@
 # scripts/launch_ec2.py
 import boto3
 import json
+from urllib.parse import urlsplit
 
-def launch_scraping_ec2():
+from configs.settings import S3_BUCKET, WORK_QUEUE_SETTINGS
+from pipeline.matrix import shard_units
+from pipeline.workqueue import open_queue
+
+def launch_scraping_ec2(count=1, queue_url=None, sources=None, cities=None, pages=None):
     ec2 = boto3.client('ec2', region_name='us-east-1')
-    
+    queue_url = queue_url or WORK_QUEUE_SETTINGS['url']
+    if urlsplit(queue_url).scheme == 'sqlite':
+        # Each instance would open its own local file - the crawl has to go through a shared queue
+        raise ValueError(f"EC2 workers need an SQS queue URL, got {queue_url!r} "
+                         "(pass queue_url or set PIPELINE_QUEUE_URL)")
+
+    # Shard the crawl up front - every instance just drains the shared queue, and units
+    # held by a reclaimed spot instance are handed out again once their lease expires
+    added = open_queue(queue_url).put(shard_units(sources, cities, pages))
+    print(f"Queued {added} crawl units on {queue_url}")
+
     # Use cheapest spot instance
     response = ec2.run_instances(
         ImageId='ami-0c02fb55956c7d316',  # Amazon Linux 2023
         InstanceType='t3.medium',
-        MinCount=1,
-        MaxCount=1,
+        MinCount=count,
+        MaxCount=count,
         InstanceMarketOptions={
             'MarketType': 'spot',
             'SpotOptions': {
@@ -20,29 +35,28 @@ def launch_scraping_ec2():
         },
         KeyName='dallas-scraper',  # Your key pair
         SecurityGroupIds=['sg-xxxxxx'],  # Your security group
-        IamInstanceProfile={'Name': 'EC2-S3-Access'},
-        UserData=user_data_script()  # Setup script below
+        IamInstanceProfile={'Name': 'EC2-S3-Access'},  # needs SQS access too for an SQS queue
+        UserData=user_data_script(queue_url)  # Setup script below
     )
-    
-    instance_id = response['Instances'][0]['InstanceId']
-    print(f"Launched EC2 instance: {instance_id}")
-    return instance_id
 
-def user_data_script():
-    return """#!/bin/bash
+    instance_ids = [instance['InstanceId'] for instance in response['Instances']]
+    print(f"Launched EC2 instances: {', '.join(instance_ids)}")
+    return instance_ids
+
+def user_data_script(queue_url, workers=2):
+    return f"""#!/bin/bash
     # Update and install dependencies
     yum update -y
     yum install -y python3-pip git
-    
+
     # Clone your scraping code
     git clone https://github.com/yourusername/dallas-scrapers.git
     cd dallas-scrapers
-    
+
     # Install requirements
     pip3 install -r requirements.txt
-    
-    # Start scraping all three datasets
-    python3 scrape_restaurants.py &
-    python3 scrape_causes.py &
-    python3 scrape_creators.py &
-    """
\ No newline at end of file
+
+    # Drain the shared crawl queue until it is empty - every Parquet part is mirrored to S3
+    export PIPELINE_STORAGE_URL=s3://{S3_BUCKET}
+    python3 crawl_worker.py --queue {json.dumps(queue_url)} work --workers {workers}
+    """
@@ -1,28 +1,138 @@
 # main.py
-from restaurants.scripts.scrape_opentable import scrape_opentable_dallas
-from causes.scripts.scrape_directories import scrape_school_directories  
-from creators.scripts.scrape_hashtags import scrape_instagram_hashtags
-import pandas as pd
+import argparse
+import glob
+import os
+import time
 
-def main():
+from configs.settings import COMMONCRAWL_SETTINGS, INCREMENTAL_SETTINGS
+from pipeline import metrics
+from pipeline.dag import Pipeline, Stage
+
+
+# Each branch streams records straight into chunked raw Parquet parts - nothing is held
+# in memory beyond one chunk, and the stage output is just the sink summary. Stages import
+# their scrapers (and pandas/pyarrow) when they run, so importing this module stays cheap.
+def collect_restaurants():
+    from pipeline.incremental import StateStore
+    from pipeline.sink import stream_to_dataset
+    from restaurants.scrape_opentable import iter_opentable_dallas
+
+    # Listing pages unchanged since the last run are skipped; their fingerprints are only
+    # committed after the sink has written everything parsed from the changed ones
+    state = StateStore() if INCREMENTAL_SETTINGS['enabled'] else None
+    summary = stream_to_dataset(iter_opentable_dallas(state=state), 'restaurants', 'raw', source='opentable')
+    if state is not None:
+        state.commit_pages()
+    return summary
+
+
+def collect_commoncrawl_restaurants():
+    from pipeline.sink import stream_to_dataset
+    from restaurants.discover_commoncrawl import iter_commoncrawl_restaurants
+
+    local_crawl = glob.glob(os.path.join(COMMONCRAWL_SETTINGS['cdx_dir'], 'cdx-*.gz')) or \
+        glob.glob(os.path.join(COMMONCRAWL_SETTINGS['warc_dir'], '**', '*.warc.gz'), recursive=True)
+    if not local_crawl:
+        print("⏭️  No local Common Crawl CDX/WARC files found - skipping Common Crawl discovery")
+        return {'dataset': 'restaurants', 'source': 'commoncrawl', 'records': 0, 'paths': []}
+    return stream_to_dataset(iter_commoncrawl_restaurants(), 'restaurants', 'raw', source='commoncrawl')
+
+
+def collect_causes(causes_irs):
+    """Scraped directory causes, filled from the IRS EIN index and deduped by EIN when it exists
+
+    Runs after causes_irs, which (re)builds the index. A few directories fit in memory, so the
+    rows are gathered for the EIN pass before they go to the sink.
+    """
+    import pandas as pd
+
+    from causes.irs_bmf import enrich_causes, ensure_index
+    from causes.scrape_directories import iter_school_directories
+    from pipeline.sink import stream_to_dataset
+
+    causes = pd.DataFrame(list(iter_school_directories()))
+    index = ensure_index()
+    if index is not None and len(causes):
+        causes = enrich_causes(causes, index)
+    return stream_to_dataset(causes.to_dict('records'), 'causes', 'raw', source='school_directories')
+
+
+def collect_irs_causes():
+    from causes.irs_bmf import ensure_index, iter_bmf_causes
+    from pipeline.sink import stream_to_dataset
+
+    index = ensure_index()
+    if index is None:
+        print("⏭️  No IRS BMF extracts found - skipping IRS causes")
+        return {'dataset': 'causes', 'source': 'irs', 'records': 0, 'paths': []}
+    return stream_to_dataset(iter_bmf_causes(index), 'causes', 'raw', source='irs')
+
+
+def collect_creators():
+    from creators.scrape_hashtags import iter_instagram_hashtags
+    from pipeline.sink import stream_to_dataset
+
+    return stream_to_dataset(iter_instagram_hashtags(), 'creators', 'raw', source='instagram_hashtags')
+
+
+def tier_creators(creators):
+    """Gate the raw creator parts into tiers and write them to clean/"""
+    import pandas as pd
+
+    from creators.tiers import assign_tiers, tier_summary
+    from pipeline.columnar import write_dataset
+
+    raw = pd.concat([pd.read_parquet(path) for path in creators['paths']], ignore_index=True) \
+        if creators['paths'] else pd.DataFrame()
+    tiered = assign_tiers(raw)
+    summary = tier_summary(tiered)
+    print(f"Creator tiers: {summary['tiers']}")
+    return {**summary, 'path': write_dataset(tiered, 'creators', 'clean', source='instagram_hashtags')}
+
+
+# The three branches share no data, so they run side by side
+STAGES = [
+    Stage('restaurants', collect_restaurants),
+    Stage('restaurants_commoncrawl', collect_commoncrawl_restaurants),
+    Stage('causes_irs', collect_irs_causes),
+    Stage('causes', collect_causes, inputs=['causes_irs']),
+    Stage('creators', collect_creators),
+    Stage('creators_tiered', tier_creators, inputs=['creators'])
+]
+
+
+def add_arguments(parser):
+    parser.add_argument('--run-id', help="resume this earlier run from its checkpoints (default: start a new run)")
+    parser.add_argument('--fresh', action='store_true', help="ignore existing checkpoints")
+    parser.add_argument('--force', nargs='*', default=[], help="rerun these stages and everything downstream")
+
+
+def run(run_id=None, fresh=False, force=()):
     print("Starting Dallas Data Collection...")
-    
-    # Run all three in sequence
-    print("1. Scraping restaurants...")
-    restaurants = scrape_opentable_dallas()
-    
-    print("2. Scraping causes...") 
-    causes = scrape_school_directories()
-    
-    print("3. Scraping creators...")
-    creators = scrape_instagram_hashtags()
-    
-    # Save initial results
-    pd.DataFrame(restaurants).to_csv('restaurants/data/initial_sample.csv')
-    pd.DataFrame(causes).to_csv('causes/data/initial_sample.csv') 
-    pd.DataFrame(creators).to_csv('creators/data/initial_sample.csv')
-    
-    print(f"Complete! Collected {len(restaurants)} restaurants, {len(causes)} causes, {len(creators)} creators")
+    # Only an explicit run id resumes - a default one would silently reuse the day's checkpoints
+    pipeline = Pipeline(STAGES, run_id=run_id or time.strftime('%Y%m%dT%H%M%S'))
+    if run_id and not fresh and os.path.isdir(pipeline.directory):
+        print(f"↩️  Resuming run {run_id} - checkpointed stages are not run again")
+    else:
+        print(f"Run id {pipeline.run_id} (pass --run-id {pipeline.run_id} to resume it)")
+    metrics.start()  # no-op unless PIPELINE_METRICS=1
+    try:
+        outputs = pipeline.run(resume=not fresh, force=force)
+    finally:
+        metrics.stop()
+
+    restaurants = outputs['restaurants']['records'] + outputs['restaurants_commoncrawl']['records']
+    creators = outputs['creators']['records']
+    causes = outputs['causes']['records'] + outputs['causes_irs']['records']
+    print(f"Complete! Collected {restaurants} restaurants, {causes} causes, {creators} creators")
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dallas data collection")
+    add_arguments(parser)
+    args = parser.parse_args()
+    run(args.run_id, fresh=args.fresh, force=args.force)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,191 @@
+# pipeline/cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+
+from configs.settings import CACHE_SETTINGS, CACHE_TTLS
+from pipeline import metrics
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Credentials never become part of a cache key
+IGNORED_PARAMS = {'key', 'api_key'}
+
+
+def normalize_url(url, params=None):
+    """Canonical form used as the cache key - lowercased host, sorted query, no fragment"""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query.extend((k, str(v)) for k, v in params.items())
+    query = [(k, v) for k, v in query if k not in IGNORED_PARAMS]
+    return urlunsplit((scheme, host, parts.path or '/', urlencode(sorted(query)), ''))
+
+
+class ResponseCache:
+    """Content-addressed HTTP response cache
+
+    The index (SQLite) maps a normalized URL to its validators and the SHA256 of the body;
+    bodies are stored zlib-compressed under bodies/<sha256>, so identical pages are kept once.
+    Entries expire by per-source TTL (CACHE_TTLS) and the store is trimmed LRU-first to max_bytes.
+    """
+
+    def __init__(self, root=None, max_bytes=None, offline=None):
+        self.root = root or CACHE_SETTINGS['root']
+        self.max_bytes = max_bytes or CACHE_SETTINGS['max_bytes']
+        self.offline = CACHE_SETTINGS['offline'] if offline is None else offline
+        os.makedirs(os.path.join(self.root, 'bodies'), exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(self.root, 'index.sqlite'), check_same_thread=False)
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY, source TEXT, status INTEGER, headers TEXT,
+                etag TEXT, last_modified TEXT, body_hash TEXT, size INTEGER,
+                fetched_at REAL, accessed_at REAL
+            )''')
+        self.db.execute('CREATE INDEX IF NOT EXISTS entries_lru ON entries (accessed_at)')
+        self.db.commit()
+
+    def _body_path(self, body_hash):
+        return os.path.join(self.root, 'bodies', body_hash)
+
+    def lookup(self, url, params=None):
+        """Cached entry for a URL (dict) or None"""
+        key = normalize_url(url, params)
+        with self.lock:
+            row = self.db.execute(
+                'SELECT source, status, headers, etag, last_modified, body_hash, fetched_at '
+                'FROM entries WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.db.execute('UPDATE entries SET accessed_at = ? WHERE key = ?', (time.time(), key))
+            self.db.commit()
+        source, status, headers, etag, last_modified, body_hash, fetched_at = row
+        return {
+            'key': key, 'source': source, 'status': status, 'headers': json.loads(headers),
+            'etag': etag, 'last_modified': last_modified, 'body_hash': body_hash,
+            'fetched_at': fetched_at
+        }
+
+    def is_fresh(self, entry):
+        ttl = CACHE_TTLS.get(entry['source'], CACHE_TTLS['default'])
+        return time.time() - entry['fetched_at'] < ttl
+
+    def conditional_headers(self, entry):
+        """Validators for a conditional GET"""
+        headers = {}
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def body(self, entry):
+        with open(self._body_path(entry['body_hash']), 'rb') as f:
+            return zlib.decompress(f.read())
+
+    def store(self, url, params, source, status, headers, body):
+        key = normalize_url(url, params)
+        body_hash = hashlib.sha256(body).hexdigest()
+        path = self._body_path(body_hash)
+        if not os.path.exists(path):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(zlib.compress(body, 6))
+            os.replace(tmp_path, path)
+        validators = {name.lower(): value for name, value in headers.items()}
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, source, status, json.dumps(dict(headers)), validators.get('etag'),
+                 validators.get('last-modified'), body_hash, os.path.getsize(path), now, now)
+            )
+            self.db.commit()
+        self.evict()
+
+    def revalidated(self, entry):
+        """304 Not Modified - restart the entry's TTL"""
+        with self.lock:
+            self.db.execute('UPDATE entries SET fetched_at = ? WHERE key = ?', (time.time(), entry['key']))
+            self.db.commit()
+
+    def evict(self):
+        """Drop least-recently-used entries until the store fits in max_bytes"""
+        with self.lock:
+            total = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            dropped = []
+            for key, body_hash, size in self.db.execute(
+                    'SELECT key, body_hash, size FROM entries ORDER BY accessed_at').fetchall():
+                if total <= self.max_bytes:
+                    break
+                self.db.execute('DELETE FROM entries WHERE key = ?', (key,))
+                dropped.append(body_hash)
+                total -= size
+            for body_hash in set(dropped):
+                still_used = self.db.execute(
+                    'SELECT 1 FROM entries WHERE body_hash = ? LIMIT 1', (body_hash,)).fetchone()
+                if not still_used and os.path.exists(self._body_path(body_hash)):
+                    os.remove(self._body_path(body_hash))
+            self.db.commit()
+
+    def response(self, entry, url):
+        """Cached entry in the same shape as a fetch result"""
+        content = self.body(entry)
+        return {
+            'url': url, 'status': entry['status'], 'content': content,
+            'text': content.decode('utf-8', errors='replace'), 'headers': entry['headers'],
+            'error': None, 'from_cache': True
+        }
+
+
+def cached_get(url, params=None, source='default', headers=None, timeout=15, cache=None, session=None):
+    """Blocking GET through the response cache - fresh hits never touch the network"""
+    cache = cache or ResponseCache()
+    host = urlsplit(url).netloc
+    entry = cache.lookup(url, params)
+    if entry and (cache.offline or cache.is_fresh(entry)):
+        metrics.inc('http_cache_total', host=host, result='hit')
+        return cache.response(entry, url)
+    if cache.offline:
+        return {'url': url, 'status': None, 'content': b'', 'text': '', 'headers': {},
+                'error': 'offline: not in cache', 'from_cache': False}
+
+    request_headers = dict(headers or {})
+    if entry:
+        request_headers.update(cache.conditional_headers(entry))
+    started = time.perf_counter()
+    try:
+        response = (session or requests).get(url, params=params, headers=request_headers, timeout=timeout)
+    except requests.RequestException as e:
+        metrics.observe('http_request_seconds', time.perf_counter() - started, host=host, status='error')
+        metrics.inc('http_requests_total', host=host, status='error')
+        return {'url': url, 'status': None, 'content': b'', 'text': '', 'headers': {},
+                'error': repr(e), 'from_cache': False}
+
+    metrics.observe('http_request_seconds', time.perf_counter() - started, host=host, status=response.status_code)
+    metrics.inc('http_requests_total', host=host, status=response.status_code)
+    if response.status_code == 304 and entry:
+        metrics.inc('http_cache_total', host=host, result='revalidated')
+        cache.revalidated(entry)
+        return cache.response(entry, url)
+    if response.status_code == 200:
+        cache.store(url, params, source, response.status_code, response.headers, response.content)
+    return {
+        'url': url, 'status': response.status_code, 'content': response.content,
+        'text': response.text, 'headers': dict(response.headers), 'error': None, 'from_cache': False
+    }
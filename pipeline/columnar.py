@@ -0,0 +1,157 @@
+# pipeline/columnar.py
+import os
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from configs.settings import CAUSES_SCHEMA, CREATORS_SCHEMA, DATA_ROOT, RESTAURANT_SCHEMA
+from pipeline import metrics
+from pipeline.storage import publish
+
+LAYERS = ('raw', 'staging', 'clean')
+
+# Output fields per dataset - the promised schema plus provenance columns
+DATASET_FIELDS = {
+    'restaurants': RESTAURANT_SCHEMA + ['enrichment_source', 'last_updated'],
+    'causes': CAUSES_SCHEMA + ['ntee_code', 'source_platform'],
+    'creators': CREATORS_SCHEMA + ['failed_gate', 'discovery_source']
+}
+# Per-run change sets of incremental runs (pipeline/incremental.py) - change is insert/update/delete
+DATASET_FIELDS.update({f"{dataset}_delta": ['change', 'record_key'] + fields
+                       for dataset, fields in list(DATASET_FIELDS.items())})
+
+# Everything not listed here is a string
+FIELD_TYPES = {
+    'lat': pa.float64(),
+    'lng': pa.float64(),
+    'rating': pa.float64(),
+    'review_count': pa.int64(),
+    'followers': pa.int64(),
+    'engagement_rate': pa.float64(),
+    'audience_location_pct': pa.float64(),
+    'food_focus_pct': pa.float64(),
+    'link_ready_flag': pa.bool_(),
+    'compliance_flag': pa.bool_(),
+    'last_updated': pa.timestamp('s')
+}
+
+# Low-cardinality columns written with Parquet dictionary encoding
+DICTIONARY_FIELDS = [
+    'price_band', 'reservation_platform', 'source_platform', 'neighborhood', 'avg_check_estimate',
+    'org_type', 'platform', 'tier', 'cadence_flag', 'failed_gate', 'enrichment_source', 'discovery_source',
+    'change'
+]
+
+# Legacy scraper keys -> schema fields (only applied when the schema field is absent).
+# 'source' is also a partition key, so it never survives as a column
+COLUMN_ALIASES = {'cuisine': 'cuisine_tags', 'price': 'price_band', 'source': 'source_platform',
+                  'audience_location_pct_DFW': 'audience_location_pct'}
+
+
+def dataset_schema(dataset):
+    return pa.schema([(field, FIELD_TYPES.get(field, pa.string())) for field in DATASET_FIELDS[dataset]])
+
+
+def _numeric(values):
+    if values.dtype == object or pd.api.types.is_string_dtype(values):
+        values = values.astype(str).str.replace(',', '', regex=False)  # '85,000' followers
+    return pd.to_numeric(values, errors='coerce')
+
+
+def _column(values, arrow_type):
+    """Coerce one pandas column to its schema type - unparseable values become nulls"""
+    if pa.types.is_floating(arrow_type):
+        return pa.array(_numeric(values), type=arrow_type, from_pandas=True)
+    if pa.types.is_integer(arrow_type):
+        return pa.array(_numeric(values).round().astype('Int64'), type=arrow_type)
+    if pa.types.is_boolean(arrow_type):
+        lowered = values.astype(str).str.strip().str.lower()
+        return pa.array(lowered.map({'true': True, '1': True, 'yes': True, 'false': False, '0': False, 'no': False}),
+                        type=arrow_type, from_pandas=True)
+    if pa.types.is_timestamp(arrow_type):
+        # Per-value formats: enrich's '%Y-%m-%d %H:%M:%S' next to ISO 'T'/'Z' WARC dates; aware values -> naive UTC
+        parsed = pd.to_datetime(values, errors='coerce', format='mixed', utc=True).dt.tz_localize(None)
+        return pa.array(parsed, type=arrow_type, from_pandas=True)
+    text = [None if pd.isna(v) or v == '' else str(v) for v in values]
+    return pa.array(text, type=arrow_type)
+
+
+def to_table(records, dataset):
+    """Enforce the dataset's typed schema on a DataFrame (or list of dicts/records)"""
+    if isinstance(records, list) and records and hasattr(records[0], 'to_table'):
+        if records[0].dataset != dataset:
+            raise ValueError(f"Cannot write {records[0].dataset} records as {dataset!r}")
+        return records[0].to_table(records)  # slotted records are already typed, skip pandas
+    df = pd.DataFrame(records) if not isinstance(records, pd.DataFrame) else records
+    fields = DATASET_FIELDS[dataset]
+    renames = {old: new for old, new in COLUMN_ALIASES.items()
+               if old in df.columns and new in fields and new not in df.columns}
+    df = df.rename(columns=renames)
+    schema = dataset_schema(dataset)
+    arrays = []
+    for field in fields:
+        if field not in df.columns:
+            arrays.append(pa.nulls(len(df), type=schema.field(field).type))
+            continue
+        array = _column(df[field], schema.field(field).type)
+        if not pa.types.is_string(array.type):
+            # Like Record._assign: count the values that were there but could not be typed
+            present = df[field].notna() & (df[field].astype(str).str.strip() != '')
+            failed = int((present.to_numpy() & array.is_null().to_numpy(zero_copy_only=False)).sum())
+            if failed:
+                metrics.inc('field_coerce_errors_total', dataset=dataset, field=field, value=failed)
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def partition_path(dataset, layer, city, source, run_date, root=DATA_ROOT):
+    """<root>/<layer>/<dataset>/city=<city>/source=<source>/run_date=<YYYY-MM-DD> - Athena/Glue hive layout"""
+    if layer not in LAYERS:
+        raise ValueError(f"Unknown layer {layer!r}, expected one of {LAYERS}")
+    return os.path.join(root, layer, dataset, f"city={city}", f"source={source}", f"run_date={run_date}")
+
+
+def write_dataset(records, dataset, layer, source, city='dallas', run_date=None, root=DATA_ROOT, store=None):
+    """Write one typed Parquet part into the partitioned layout, returns its path
+
+    The part is also uploaded under the same key to `store` - by default the configured
+    storage mirror (STORAGE_SETTINGS), if there is one.
+    """
+    table = to_table(records, dataset)
+    run_date = run_date or pd.Timestamp.now().strftime('%Y-%m-%d')
+    directory = partition_path(dataset, layer, city, source, run_date, root)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"part-{uuid.uuid4().hex[:12]}.parquet")
+    pq.write_table(
+        table, path,
+        compression='snappy',
+        use_dictionary=[field for field in DICTIONARY_FIELDS if field in table.column_names]
+    )
+    publish([path], store, root)
+    return path
+
+
+def read_dataset(dataset, layer, root=DATA_ROOT, **partitions):
+    """Read a dataset back as a DataFrame, optionally filtered on city/source/run_date"""
+    dataset_root = os.path.join(root, layer, dataset)
+    arrow_dataset = ds.dataset(dataset_root, format='parquet', partitioning='hive')
+    expression = None
+    for name, value in partitions.items():
+        condition = ds.field(name) == value
+        expression = condition if expression is None else expression & condition
+    return arrow_dataset.to_table(filter=expression).to_pandas()
+
+
+def export(records, dataset, path):
+    """Derived CSV/Excel export in schema column order"""
+    df = to_table(records, dataset).to_pandas()
+    if 'last_updated' in df.columns:
+        df['last_updated'] = df['last_updated'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    if path.endswith('.xlsx'):
+        df.to_excel(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return path
@@ -0,0 +1,184 @@
+# pipeline/commoncrawl.py
+import glob
+import gzip
+import itertools
+import json
+import os
+import zlib
+from urllib.parse import urlsplit
+
+from configs.settings import COMMONCRAWL_SETTINGS
+from pipeline import metrics
+
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+KEY_END = '\uffff'  # sorts after any real SURT character
+
+
+def surt(url):
+    """SURT key as used by the CDX index - reversed host without www, lowercased path"""
+    parts = urlsplit(url if '://' in url else f"http://{url}")
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    key = ','.join(reversed(host.split('.'))) + ')' + (parts.path or '/').lower()
+    return f"{key}?{parts.query.lower()}" if parts.query else key
+
+
+def bare_url(url):
+    """URL without scheme or www, the form url_patterns are written in"""
+    url = url.split('://', 1)[-1].lower()
+    return url[4:] if url.startswith('www.') else url
+
+
+def _selected_blocks(index_path, prefixes):
+    """(shard, offset, length) of every cluster.idx block whose key range can hold a prefix"""
+    def overlaps(first, last):
+        return any(first < prefix + KEY_END and last >= prefix for prefix in prefixes)
+
+    previous = None
+    with open(index_path) as f:
+        for line in f:
+            key_part, shard, offset, length = line.rstrip('\n').split('\t')[:4]
+            key = key_part.split(' ')[0]
+            if previous and overlaps(previous[0], key):
+                yield previous[1:]
+            previous = (key, shard, int(offset), int(length))
+    if previous and overlaps(previous[0], KEY_END):
+        yield previous[1:]
+
+
+def _block_lines(cdx_dir, blocks):
+    """Decompress just the selected gzip members - every other block is never read"""
+    for shard, offset, length in blocks:
+        with open(os.path.join(cdx_dir, shard), 'rb') as f:
+            f.seek(offset)
+            data = f.read(length)
+        metrics.inc('commoncrawl_cdx_blocks_total', result='read')
+        yield from zlib.decompress(data, GZIP_WBITS).decode('utf-8').splitlines()
+
+
+def _shard_lines(cdx_dir, prefixes):
+    """Full scan of each shard, stopping once its (sorted) keys are past every prefix"""
+    last = max(prefixes) + KEY_END
+    for path in sorted(glob.glob(os.path.join(cdx_dir, 'cdx-*.gz'))):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line[:line.find(' ')] > last:
+                    break
+                yield line
+
+
+def iter_cdx(patterns, cdx_dir=None):
+    """Latest 200 capture per URL matching any pattern, as CDX dicts (url, filename, offset, length...)
+
+    Uses cluster.idx when the directory has one, so only the index blocks that can
+    contain the patterns' SURT prefixes are decompressed.
+    """
+    cdx_dir = cdx_dir or COMMONCRAWL_SETTINGS['cdx_dir']
+    prefixes = tuple(sorted(surt(pattern) for pattern in patterns))
+    index_path = os.path.join(cdx_dir, 'cluster.idx')
+    lines = _block_lines(cdx_dir, _selected_blocks(index_path, prefixes)) if os.path.exists(index_path) \
+        else _shard_lines(cdx_dir, prefixes)
+
+    def hits():
+        for line in lines:
+            if not line.startswith(prefixes):  # cheap check before any JSON parsing
+                continue
+            key, timestamp, fields = line.split(' ', 2)
+            capture = json.loads(fields)
+            if capture.get('status') == '200':
+                yield {'surt': key, 'timestamp': timestamp, **capture}
+
+    # Captures of one URL are adjacent and in timestamp order - keep the newest
+    for _, captures in itertools.groupby(hits(), key=lambda capture: capture['surt']):
+        *_, latest = captures
+        yield latest
+
+
+def parse_warc_record(data):
+    """Decompressed WARC record -> {type, url, date, status, headers, body}"""
+    head, _, rest = data.partition(b'\r\n\r\n')
+    fields = {}
+    for line in head.split(b'\r\n')[1:]:
+        name, _, value = line.partition(b':')
+        fields[name.strip().lower().decode('latin-1')] = value.strip().decode('utf-8', errors='replace')
+    block = rest[:int(fields.get('content-length', len(rest)))]
+    record = {'type': fields.get('warc-type'), 'url': fields.get('warc-target-uri', ''),
+              'date': fields.get('warc-date'), 'status': None, 'headers': {}, 'body': b''}
+    if record['type'] == 'response' and block.startswith(b'HTTP/'):
+        http_head, _, record['body'] = block.partition(b'\r\n\r\n')
+        lines = http_head.split(b'\r\n')
+        status = lines[0].split(b' ', 2)
+        record['status'] = int(status[1]) if len(status) > 1 and status[1].isdigit() else None
+        for line in lines[1:]:
+            name, _, value = line.partition(b':')
+            record['headers'][name.strip().lower().decode('latin-1')] = value.strip().decode('latin-1')
+    return record
+
+
+def read_warc_record(path, offset, length):
+    """One record by its CDX offset/length - a single gzip member, nothing else is read"""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        return parse_warc_record(zlib.decompress(f.read(length), GZIP_WBITS))
+
+
+def iter_warc(path, wanted, read_size=None):
+    """Stream a .warc.gz gzip member by gzip member, yielding records whose URL passes `wanted`
+
+    A member's WARC headers are judged as soon as they are inflated; an unwanted member
+    is still inflated to find where it ends (gzip has no length prefix), but its payload
+    is discarded chunk by chunk instead of being buffered and parsed.
+    """
+    read_size = read_size or COMMONCRAWL_SETTINGS['read_size']
+    inflater, parts, keep = zlib.decompressobj(GZIP_WBITS), [], None
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(read_size)
+            if not data:
+                break
+            while data:
+                output = inflater.decompress(data)
+                if keep is None:
+                    parts.append(output)
+                    head = b''.join(parts)
+                    if b'\r\n\r\n' in head:
+                        record = parse_warc_record(head)
+                        keep = record['type'] == 'response' and wanted(record['url'])
+                        parts = [head] if keep else []
+                elif keep:
+                    parts.append(output)
+                if not inflater.eof:
+                    break
+                if keep:
+                    metrics.inc('commoncrawl_warc_records_total', result='matched')
+                    yield parse_warc_record(b''.join(parts))
+                else:
+                    metrics.inc('commoncrawl_warc_records_total', result='skipped')
+                data = inflater.unused_data
+                inflater, parts, keep = zlib.decompressobj(GZIP_WBITS), [], None
+
+
+def iter_pages(patterns, cdx_dir=None, warc_dir=None):
+    """Matching 200 responses from the local crawl, as WARC record dicts
+
+    With CDX shards: index lookup, then one seek + one member per page. Without them:
+    a streaming scan of every WARC under warc_dir.
+    """
+    cdx_dir = cdx_dir or COMMONCRAWL_SETTINGS['cdx_dir']
+    warc_dir = warc_dir or COMMONCRAWL_SETTINGS['warc_dir']
+    if glob.glob(os.path.join(cdx_dir, 'cdx-*.gz')):
+        for capture in iter_cdx(patterns, cdx_dir):
+            record = read_warc_record(os.path.join(warc_dir, capture['filename']),
+                                      int(capture['offset']), int(capture['length']))
+            metrics.inc('commoncrawl_warc_records_total', result='matched')
+            yield record
+        return
+
+    prefixes = tuple(bare_url(pattern) for pattern in patterns)
+    seen = set()
+    for path in sorted(glob.glob(os.path.join(warc_dir, '**', '*.warc.gz'), recursive=True)):
+        for record in iter_warc(path, lambda url: bare_url(url).startswith(prefixes)):
+            if record['status'] == 200 and record['url'] not in seen:
+                seen.add(record['url'])
+                yield record
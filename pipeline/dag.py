@@ -0,0 +1,149 @@
+# pipeline/dag.py
+import os
+import pickle
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from configs.settings import PIPELINE_SETTINGS
+from pipeline import metrics
+
+
+class PipelineError(RuntimeError):
+    """Raised after a run in which one or more stages failed - completed stages stay checkpointed"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        super().__init__("Failed stages: " + ", ".join(f"{name} ({error!r})" for name, error in failures.items()))
+
+
+class Stage:
+    """One unit of work: `func(**{input: upstream output})`, run in a thread or process pool
+
+    Process stages need a module-level function and picklable inputs/outputs.
+    """
+
+    def __init__(self, name, func, inputs=(), executor='thread'):
+        if executor not in ('thread', 'process'):
+            raise ValueError(f"Unknown executor {executor!r} for stage {name!r}")
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.executor = executor
+
+
+def _run_stage(func, kwargs):
+    started = time.perf_counter()
+    return func(**kwargs), time.perf_counter() - started
+
+
+class Pipeline:
+    """Dependency-ordered stage runner with per-stage checkpoints
+
+    Every stage starts as soon as its inputs are done, so a run takes as long as its
+    slowest branch. Outputs are pickled under <checkpoint_dir>/<run_id>/, and a rerun
+    with the same run_id loads them instead of recomputing.
+    """
+
+    def __init__(self, stages, run_id, checkpoint_dir=None, max_workers=None):
+        self.stages = {stage.name: stage for stage in stages}
+        for stage in stages:
+            missing = [name for name in stage.inputs if name not in self.stages]
+            if missing:
+                raise ValueError(f"Stage {stage.name!r} depends on unknown stages {missing}")
+        self._check_acyclic()
+        self.run_id = run_id
+        self.directory = os.path.join(checkpoint_dir or PIPELINE_SETTINGS['checkpoint_dir'], run_id)
+        self.max_workers = max_workers or PIPELINE_SETTINGS['max_workers']
+
+    def _check_acyclic(self):
+        state = {}
+
+        def visit(name, path):
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Cycle in pipeline: {' -> '.join(path + [name])}")
+            state[name] = 'visiting'
+            for upstream in self.stages[name].inputs:
+                visit(upstream, path + [name])
+            state[name] = 'done'
+
+        for name in self.stages:
+            visit(name, [])
+
+    def _downstream(self, names):
+        """`names` plus every stage that (transitively) consumes them"""
+        result = set(names)
+        changed = True
+        while changed:
+            changed = False
+            for stage in self.stages.values():
+                if stage.name not in result and result.intersection(stage.inputs):
+                    result.add(stage.name)
+                    changed = True
+        return result
+
+    def checkpoint_path(self, name):
+        return os.path.join(self.directory, f"{name}.pkl")
+
+    def load(self, name):
+        with open(self.checkpoint_path(name), 'rb') as f:
+            return pickle.load(f)
+
+    def _save(self, name, output):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.checkpoint_path(name)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump(output, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)  # a crash mid-write never leaves a half checkpoint
+
+    def run(self, resume=True, force=()):
+        """Run every stage that has no checkpoint yet, returns {stage: output}
+
+        `force` reruns the named stages and everything downstream of them.
+        """
+        rerun = self._downstream(force)
+        outputs = {}
+        for name in self.stages:
+            if resume and name not in rerun and os.path.exists(self.checkpoint_path(name)):
+                outputs[name] = self.load(name)
+                metrics.inc('stages_total', stage=name, status='resumed')
+                print(f"⏭️  {name}: resumed from checkpoint")
+
+        failures = {}
+        pending = {name: stage for name, stage in self.stages.items() if name not in outputs}
+        running = {}
+        with ThreadPoolExecutor(self.max_workers) as threads, ProcessPoolExecutor(self.max_workers) as processes:
+            pools = {'thread': threads, 'process': processes}
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if any(upstream in failures for upstream in stage.inputs):
+                        failures[name] = RuntimeError('upstream stage failed')
+                        del pending[name]
+                    elif all(upstream in outputs for upstream in stage.inputs):
+                        kwargs = {upstream: outputs[upstream] for upstream in stage.inputs}
+                        running[pools[stage.executor].submit(_run_stage, stage.func, kwargs)] = name
+                        del pending[name]
+                        print(f"▶️  {name}: started")
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        output, elapsed = future.result()
+                    except Exception as e:
+                        failures[name] = e
+                        metrics.inc('stages_total', stage=name, status='failed')
+                        print(f"❌ {name}: {e}")
+                        continue
+                    self._save(name, output)
+                    outputs[name] = output
+                    metrics.observe('stage_seconds', elapsed, stage=name)
+                    metrics.inc('stages_total', stage=name, status='done')
+                    print(f"✅ {name}: done in {elapsed:.1f}s")
+
+        if failures:
+            raise PipelineError(failures)
+        return outputs
@@ -0,0 +1,206 @@
+# pipeline/extract.py
+import gc
+import json
+from urllib.parse import urljoin
+
+from lxml import etree, html as lxml_html
+
+from configs.settings import STREAM_SETTINGS
+from pipeline import metrics
+
+# Per-source selectors, compiled once at import.
+# container = (tag, attribute, substring) for the element holding the listing cards -
+# the streaming parser stops as soon as that element has been closed.
+# Selectors are XPath so they run inside libxml2 instead of per-node Python callbacks.
+# Refine them against the saved pages (successful_pattern_N.html) as markup changes.
+SOURCE_SELECTORS = {
+    'opentable': {
+        'base_url': 'https://www.opentable.com',
+        'container': ('div', 'data-test', 'restaurant-list'),
+        'card': './/div[@data-test="restaurant-card"]',
+        'fields': {
+            'name': 'normalize-space(.//*[@data-test="res-card-name"])',
+            'neighborhood': 'normalize-space(.//*[@data-test="res-card-neighborhood"])',
+            'cuisine': 'normalize-space(.//*[@data-test="res-card-cuisine"])',
+            'price_band': 'normalize-space(.//*[@data-test="res-card-price"])',
+            'reservation_url': 'string(.//a[contains(@href, "/r/")][1]/@href)'
+        },
+        'constants': {'source_platform': 'OpenTable'}
+    },
+    'resy': {
+        'base_url': 'https://resy.com',
+        'container': ('div', 'class', 'SearchResultsContainer'),
+        'card': './/div[contains(concat(" ", normalize-space(@class), " "), " SearchResult ")]',
+        'fields': {
+            'name': 'normalize-space(.//*[contains(@class, "SearchResult__venue-name")])',
+            'neighborhood': 'normalize-space(.//*[contains(@class, "SearchResult__neighborhood")])',
+            'cuisine': 'normalize-space(.//*[contains(@class, "SearchResult__cuisine")])',
+            'price_band': 'normalize-space(.//*[contains(@class, "SearchResult__price")])',
+            'reservation_url': 'string(.//a[contains(@href, "/cities/")][1]/@href)'
+        },
+        'constants': {'source_platform': 'Resy'}
+    },
+    'tock': {
+        'base_url': 'https://www.exploretock.com',
+        'container': ('div', 'class', 'SearchResults'),
+        'card': './/div[contains(@class, "SearchResultCard")]',
+        'fields': {
+            'name': 'normalize-space(.//h2 | .//*[contains(@class, "BusinessName")])',
+            'neighborhood': 'normalize-space(.//*[contains(@class, "Location")])',
+            'cuisine': 'normalize-space(.//*[contains(@class, "Cuisine")])',
+            'price_band': 'normalize-space(.//*[contains(@class, "Price")])',
+            'reservation_url': 'string(.//a[1]/@href)'
+        },
+        'constants': {'source_platform': 'Tock'}
+    },
+    'district_directory': {
+        'base_url': '',
+        'container': ('div', 'class', 'directory'),
+        'card': './/div[contains(@class, "school")] | .//tr[td]',
+        'fields': {
+            'org_name': 'normalize-space((.//a | .//h3 | .//td)[1])',
+            'address': 'normalize-space(.//*[contains(@class, "address")])',
+            'phone': 'normalize-space(.//*[contains(@class, "phone")] | .//a[starts-with(@href, "tel:")])',
+            'website': 'string(.//a[starts-with(@href, "http")][1]/@href)'
+        },
+        'constants': {'org_type': 'School/PTA', 'source': 'ISD Directory'}
+    }
+}
+
+
+class Extractor:
+    """Precompiled selectors for one source"""
+
+    def __init__(self, source, base_url, container, card, fields, constants):
+        self.source = source
+        self.base_url = base_url
+        self.container_tag, self.container_attr, self.container_value = container
+        self.container = etree.XPath(
+            f'//{self.container_tag}[contains(@{self.container_attr}, "{self.container_value}")]'
+        )
+        self.card = etree.XPath(card)
+        self.fields = {name: etree.XPath(expr, smart_strings=False) for name, expr in fields.items()}
+        self.constants = constants
+        self.streamed = 0
+
+    def _is_container(self, element):
+        return (element.tag == self.container_tag
+                and self.container_value in element.get(self.container_attr, ''))
+
+    def _records(self, root):
+        records = []
+        for card in self.card(root):
+            record = {name: selector(card) for name, selector in self.fields.items()}
+            if not any(record.values()):
+                continue
+            for name in ('reservation_url', 'website'):
+                if record.get(name) and self.base_url:
+                    record[name] = urljoin(self.base_url, record[name])
+            record.update(self.constants)
+            records.append(record)
+        return records
+
+    def extract(self, page):
+        """Full parse with the libxml2 HTML parser - an empty page has no records"""
+        try:
+            root = lxml_html.fromstring(page)
+        except etree.ParserError:  # empty, whitespace or comment-only body
+            return []
+        containers = self.container(root)
+        return self._records(containers[0] if containers else root)
+
+    def _stream_records(self, page, chunk_size):
+        parser = etree.HTMLPullParser(events=('end',), tag=self.container_tag)
+        for offset in range(0, len(page), chunk_size):
+            parser.feed(page[offset:offset + chunk_size])
+            for _, element in parser.read_events():
+                if self._is_container(element):
+                    return self._records(element)
+        try:
+            root = parser.close()
+        except etree.XMLSyntaxError:  # nothing was fed
+            return []
+        return self._records(root) if root is not None else []
+
+    def extract_streaming(self, page, chunk_size=16384):
+        """Partial parse - feed the page in chunks and stop once the listing container closes"""
+        if isinstance(page, str):
+            page = page.encode('utf-8')
+        records = self._stream_records(page, chunk_size)
+        # The abandoned pull parser and its partial tree form a reference cycle - free a batch
+        # of them with one cheap young-generation pass instead of one per page
+        self.streamed += 1
+        if self.streamed >= STREAM_SETTINGS['gc_pages']:
+            self.streamed = 0
+            gc.collect(1)
+        return records
+
+
+EXTRACTORS = {
+    source: Extractor(source, **selectors) for source, selectors in SOURCE_SELECTORS.items()
+}
+
+
+def extract_listings(source, page, streaming=False):
+    """Extract listing records from a page for a registered source"""
+    extractor = EXTRACTORS[source]
+    with metrics.timer('parse_seconds', source=source):
+        records = extractor.extract_streaming(page) if streaming else extractor.extract(page)
+    metrics.inc('pages_parsed_total', source=source)
+    metrics.inc('records_total', stage='parse', direction='out', source=source, value=len(records))
+    return records
+
+
+# Single-venue profile pages (opentable.com/r/..., resy venue pages, Tock venues) carry
+# schema.org JSON-LD; og:title is the fallback when a page has none
+PROFILE_TYPES = {'Restaurant', 'FoodEstablishment', 'BarOrPub', 'CafeOrCoffeeShop', 'LocalBusiness'}
+JSON_LD = etree.XPath('//script[@type="application/ld+json"]/text()', smart_strings=False)
+OG_TITLE = etree.XPath('string(//meta[@property="og:title"]/@content)', smart_strings=False)
+
+
+def _json_ld_venues(root):
+    for text in JSON_LD(root):
+        try:
+            data = json.loads(text)
+        except ValueError:
+            continue
+        nodes = data if isinstance(data, list) else data.get('@graph', [data])
+        for node in nodes:
+            types = node.get('@type', []) if isinstance(node, dict) else []
+            if PROFILE_TYPES.intersection([types] if isinstance(types, str) else types):
+                yield node
+
+
+def _profile_record(venue, url):
+    address = venue.get('address') or {}
+    if isinstance(address, dict):
+        address = ', '.join(filter(None, [address.get('streetAddress'), address.get('addressLocality'),
+                                          ' '.join(filter(None, [address.get('addressRegion'),
+                                                                 address.get('postalCode')]))]))
+    cuisine = venue.get('servesCuisine') or ''
+    geo = venue.get('geo') or {}
+    return {
+        'name': venue.get('name', ''),
+        'address': address,
+        'phone': venue.get('telephone', ''),
+        'cuisine': ', '.join(cuisine) if isinstance(cuisine, list) else cuisine,
+        'price_band': venue.get('priceRange', ''),
+        'lat': geo.get('latitude', ''),
+        'lng': geo.get('longitude', ''),
+        'reservation_url': url
+    }
+
+
+def extract_profile(source, page, url):
+    """Records from a single-venue profile page (JSON-LD, else og:title)"""
+    with metrics.timer('parse_seconds', source=f"{source}_profile"):
+        root = lxml_html.fromstring(page)
+        records = [_profile_record(venue, url) for venue in _json_ld_venues(root)]
+        if not records:
+            title = OG_TITLE(root).split(' - ')[0].strip()
+            records = [{'name': title, 'reservation_url': url}] if title else []
+        for record in records:
+            record.update(SOURCE_SELECTORS[source]['constants'])
+    metrics.inc('pages_parsed_total', source=f"{source}_profile")
+    metrics.inc('records_total', stage='parse', direction='out', source=f"{source}_profile", value=len(records))
+    return records
@@ -0,0 +1,259 @@
+# pipeline/fetch.py
+import asyncio
+import queue
+import threading
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from configs.settings import FETCH_SETTINGS, HOST_RATE_LIMITS, STREAM_SETTINGS, TRANSPORT_SETTINGS
+from pipeline import metrics
+from pipeline.transport import AimdThrottle, ProxyPool, backoff_delay, retry_after_seconds, user_agent
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+
+class TokenBucket:
+    """Politeness budget - `rate` requests/sec per host, bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def pause(self, seconds):
+        """Hand out no tokens for `seconds` (a host's Retry-After)"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class FetchEngine:
+    """Shared async fetcher: pooled keep-alive connections, per-host limits and rate budgets
+
+    Requests rotate User-Agents and proxies (pipeline/transport.py); 429/403/503s and network
+    errors are retried with backoff while the host's rate adapts (AIMD) to the blocking.
+    """
+
+    def __init__(self, headers=None, per_host=None, rate=None, burst=None, timeout=None, total=None,
+                 cache=None, source='default', retries=None, proxies=None, user_agents=None):
+        self.cache = cache
+        self.source = source
+        self.headers = headers or DEFAULT_HEADERS
+        self.per_host = per_host or FETCH_SETTINGS['per_host']
+        self.rate = rate or FETCH_SETTINGS['rate']
+        self.burst = burst or FETCH_SETTINGS['burst']
+        self.timeout = timeout or FETCH_SETTINGS['timeout']
+        self.total = total or FETCH_SETTINGS['total_connections']
+        self.retries = TRANSPORT_SETTINGS['retries'] if retries is None else retries
+        self.proxies = proxies if isinstance(proxies, ProxyPool) else ProxyPool(proxies)
+        # An explicit User-Agent from the caller is kept, otherwise every attempt picks one
+        self.user_agents = False if 'User-Agent' in (headers or {}) else user_agents
+        self.session = None
+        self.buckets = {}
+        self.semaphores = {}
+        self.throttles = {}
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.total,
+            limit_per_host=self.per_host,
+            keepalive_timeout=30,
+            ttl_dns_cache=300
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    def _host_limits(self, host):
+        """Per-host semaphore + token bucket, created on first use"""
+        if host not in self.buckets:
+            limits = HOST_RATE_LIMITS.get(host, {})
+            self.buckets[host] = TokenBucket(limits.get('rate', self.rate), limits.get('burst', self.burst))
+            self.semaphores[host] = asyncio.Semaphore(limits.get('per_host', self.per_host))
+            self.throttles[host] = AimdThrottle(self.buckets[host], host)
+        return self.semaphores[host], self.buckets[host]
+
+    async def _attempt(self, url, params, headers, host, result):
+        """One request through the host budget and a pooled proxy, fills `result`
+
+        Returns True when the attempt was blocked or failed and is worth retrying.
+        """
+        semaphore, bucket = self._host_limits(host)
+        proxy = self.proxies.choose()
+        if self.user_agents is not False:
+            headers = {**(headers or {}), 'User-Agent': user_agent(self.user_agents)}
+        async with semaphore:
+            await bucket.acquire()
+            started = time.perf_counter()
+            result.update(status=None, headers={}, content=b'', text='', error=None)
+            try:
+                async with self.session.get(url, params=params, headers=headers,
+                                            proxy=proxy.url if proxy else None) as response:
+                    result['status'] = response.status
+                    result['headers'] = dict(response.headers)
+                    result['content'] = await response.read()
+                    result['text'] = result['content'].decode(response.get_encoding(), errors='replace')
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                result['error'] = repr(e)
+            result['elapsed'] = time.perf_counter() - started
+        status = result['status'] or 'error'
+        metrics.observe('http_request_seconds', result['elapsed'], host=host, status=status)
+        metrics.inc('http_requests_total', host=host, status=status)
+
+        blocked = result['status'] in TRANSPORT_SETTINGS['retry_statuses']
+        if blocked or result['error']:
+            if proxy:
+                proxy.failure()
+            # A 403 through a proxy usually means that exit IP is flagged, not that the host wants us slower
+            if blocked and not (proxy and result['status'] == 403):
+                self.throttles[host].slow_down(str(result['status']), retry_after_seconds(result['headers']))
+            return True
+        if proxy:
+            proxy.success(result['elapsed'])
+        self.throttles[host].success(result['elapsed'])
+        return False
+
+    async def fetch(self, url, params=None, headers=None):
+        """Fetch one URL; errors are returned in the result instead of raised"""
+        result = {'url': url, 'status': None, 'content': b'', 'text': '', 'headers': {},
+                  'error': None, 'from_cache': False}
+        entry = None
+        host = urlsplit(url).netloc
+        if self.cache:
+            # Fresh cache hits never spend the host's politeness budget
+            entry = self.cache.lookup(url, params)
+            if entry and (self.cache.offline or self.cache.is_fresh(entry)):
+                metrics.inc('http_cache_total', host=host, result='hit')
+                return self.cache.response(entry, url)
+            if self.cache.offline:
+                result['error'] = 'offline: not in cache'
+                return result
+            if entry:
+                headers = {**(headers or {}), **self.cache.conditional_headers(entry)}
+
+        for attempt in range(self.retries + 1):
+            if not await self._attempt(url, params, headers, host, result) or attempt == self.retries:
+                break
+            delay = backoff_delay(attempt, retry_after_seconds(result['headers']))
+            if delay is None:
+                break  # told to come back later than we are willing to wait
+            metrics.inc('http_retries_total', host=host, status=result['status'] or 'error')
+            await asyncio.sleep(delay)
+
+        if self.cache:
+            if result['status'] == 304 and entry:
+                metrics.inc('http_cache_total', host=host, result='revalidated')
+                self.cache.revalidated(entry)
+                return self.cache.response(entry, url)
+            if result['status'] == 200:
+                self.cache.store(url, params, self.source, result['status'], result['headers'], result['content'])
+        return result
+
+    async def fetch_many(self, urls):
+        """Fetch all URLs concurrently, results come back in input order"""
+        return await asyncio.gather(*(self.fetch(url) for url in urls))
+
+
+async def _fetch_all(urls, engine_kwargs):
+    async with FetchEngine(**engine_kwargs) as engine:
+        return await engine.fetch_many(urls)
+
+
+def fetch_all(urls, **engine_kwargs):
+    """Blocking entry point for the scrapers - fetch a batch of URLs through one engine"""
+    return asyncio.run(_fetch_all(list(urls), engine_kwargs))
+
+
+_END = object()
+
+
+def _offer(results, stop, item):
+    """Blocking put that gives up once the consumer has gone away"""
+    while not stop.is_set():
+        try:
+            results.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+async def _produce(urls, engine_kwargs, results, stop, window):
+    loop = asyncio.get_running_loop()
+    async with FetchEngine(**engine_kwargs) as engine:
+        in_flight = set()
+        urls = iter(urls)
+        exhausted = False
+        while in_flight or not exhausted:
+            # Only `window` URLs in flight - new ones start as finished pages are handed off
+            while not exhausted and len(in_flight) < window and not stop.is_set():
+                url = next(urls, _END)
+                if url is _END:
+                    exhausted = True
+                else:
+                    in_flight.add(asyncio.ensure_future(engine.fetch(url)))
+            if not in_flight:
+                break
+            done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                # Blocks (off the event loop) while the consumer is behind - that is the backpressure
+                if not await loop.run_in_executor(None, _offer, results, stop, ('page', task.result())):
+                    for pending in in_flight:
+                        pending.cancel()
+                    return
+
+
+def iter_fetch(urls, window=None, queue_size=None, **engine_kwargs):
+    """Stream responses in completion order while the caller parses the previous ones
+
+    Fetching runs on a background event loop; at most `queue_size` fetched pages wait for
+    the consumer, so memory stays bounded however many URLs `urls` yields.
+    """
+    results = queue.Queue(maxsize=queue_size or STREAM_SETTINGS['queue_pages'])
+    stop = threading.Event()
+
+    def run():
+        try:
+            asyncio.run(_produce(urls, engine_kwargs, results, stop, window or STREAM_SETTINGS['fetch_window']))
+        except Exception as e:
+            _offer(results, stop, ('error', e))
+        _offer(results, stop, ('done', None))
+
+    producer = threading.Thread(target=run, daemon=True)
+    producer.start()
+    try:
+        while True:
+            kind, payload = results.get()
+            if kind == 'done':
+                return
+            if kind == 'error':
+                raise payload
+            yield payload
+    finally:
+        stop.set()
+        producer.join()
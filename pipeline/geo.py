@@ -0,0 +1,99 @@
+# pipeline/geo.py
+import json
+
+import numpy as np
+import pandas as pd
+
+from configs.settings import DALLAS_CENTER, GEO_RADIUS_MILES, NEIGHBORHOODS_PATH
+
+EARTH_RADIUS_MILES = 3958.8
+GRID_CELL_DEGREES = 0.01  # ~0.7 mi cells
+
+
+def haversine_miles(lat, lng, center_lat, center_lng):
+    """Vectorized great-circle distance from every point to one center"""
+    lat, lng = np.radians(lat), np.radians(lng)
+    center_lat, center_lng = np.radians(center_lat), np.radians(center_lng)
+    a = (np.sin((lat - center_lat) / 2) ** 2
+         + np.cos(lat) * np.cos(center_lat) * np.sin((lng - center_lng) / 2) ** 2)
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(a))
+
+
+def _cells(lat, lng):
+    """Grid cell id per point"""
+    rows = np.floor(lat / GRID_CELL_DEGREES).astype(np.int64)
+    cols = np.floor(lng / GRID_CELL_DEGREES).astype(np.int64)
+    return rows * 100000 + cols
+
+
+def points_in_polygon(lat, lng, ring):
+    """Even-odd ray casting for many points against one ring, one vectorized pass per edge"""
+    inside = np.zeros(len(lat), dtype=bool)
+    xs, ys = ring[:, 0], ring[:, 1]
+    for k in range(len(ring) - 1):
+        x1, y1, x2, y2 = xs[k], ys[k], xs[k + 1], ys[k + 1]
+        crosses = (y1 > lat) != (y2 > lat)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_at = x1 + (lat - y1) * (x2 - x1) / (y2 - y1)
+        inside ^= crosses & (lng < x_at)
+    return inside
+
+
+class NeighborhoodIndex:
+    """Neighborhood polygons bucketed into a lat/lng grid for fast point-in-polygon tagging"""
+
+    def __init__(self, path=NEIGHBORHOODS_PATH):
+        with open(path, encoding='utf-8') as f:
+            features = json.load(f)['features']
+        self.names = []
+        self.rings = []
+        self.cells = []
+        for feature in features:
+            geometry = feature['geometry']
+            polygons = geometry['coordinates'] if geometry['type'] == 'MultiPolygon' else [geometry['coordinates']]
+            for polygon in polygons:
+                ring = np.asarray(polygon[0], dtype=float)  # outer ring, (lng, lat)
+                lng_min, lat_min = ring.min(axis=0)
+                lng_max, lat_max = ring.max(axis=0)
+                rows = np.arange(np.floor(lat_min / GRID_CELL_DEGREES), np.floor(lat_max / GRID_CELL_DEGREES) + 1)
+                cols = np.arange(np.floor(lng_min / GRID_CELL_DEGREES), np.floor(lng_max / GRID_CELL_DEGREES) + 1)
+                self.names.append(feature['properties']['name'])
+                self.rings.append(ring)
+                self.cells.append((rows[:, None] * 100000 + cols[None, :]).astype(np.int64).ravel())
+
+    def assign(self, lat, lng):
+        """Neighborhood name per point ('' outside every polygon or without coordinates)"""
+        lat = pd.to_numeric(pd.Series(lat), errors='coerce').to_numpy(dtype=float)
+        lng = pd.to_numeric(pd.Series(lng), errors='coerce').to_numpy(dtype=float)
+        valid = ~(np.isnan(lat) | np.isnan(lng))
+        point_cells = np.where(valid, _cells(np.nan_to_num(lat), np.nan_to_num(lng)), -1)
+
+        result = np.full(len(lat), '', dtype=object)
+        for name, ring, cells in zip(self.names, self.rings, self.cells):
+            # Grid prefilter, then exact test only for points in the polygon's cells
+            candidates = np.flatnonzero(np.isin(point_cells, cells) & (result == ''))
+            if len(candidates):
+                hits = points_in_polygon(lat[candidates], lng[candidates], ring)
+                result[candidates[hits]] = name
+        return result
+
+
+def within_radius(lat, lng, center=DALLAS_CENTER, miles=GEO_RADIUS_MILES):
+    """Geography gate - (mask, distance) for every point; points without coordinates fail the gate"""
+    lat = pd.to_numeric(pd.Series(lat), errors='coerce').to_numpy(dtype=float)
+    lng = pd.to_numeric(pd.Series(lng), errors='coerce').to_numpy(dtype=float)
+    distance = haversine_miles(lat, lng, center[0], center[1])
+    return np.nan_to_num(distance, nan=np.inf) <= miles, distance
+
+
+def apply_geography(restaurants, index=None, center=DALLAS_CENTER, miles=GEO_RADIUS_MILES):
+    """Fill blank neighborhoods from the polygons and flag rows inside the radius gate"""
+    index = index or NeighborhoodIndex()
+    df = restaurants.copy()
+    derived = index.assign(df['lat'], df['lng'])
+    current = df['neighborhood'].fillna('') if 'neighborhood' in df.columns else pd.Series('', index=df.index)
+    df['neighborhood'] = current.where(current != '', derived)
+    mask, distance = within_radius(df['lat'], df['lng'], center, miles)
+    df['distance_miles'] = np.round(distance, 2)
+    df['in_geography'] = mask
+    return df
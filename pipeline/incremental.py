@@ -0,0 +1,208 @@
+# pipeline/incremental.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from configs.settings import INCREMENTAL_SETTINGS
+from pipeline import metrics
+from pipeline.cache import normalize_url
+from pipeline.keys import record_key
+
+
+class StateStore:
+    """Fingerprints from earlier runs - listing pages by URL, records by key - plus the path of
+    each dataset's last merged snapshot
+
+    Page fingerprints are staged in memory and only committed once the records parsed from
+    them are safely written, so a crashed run re-parses those pages next time. The records
+    parsed from each page are kept with its fingerprint, so a skipped page still re-emits them.
+    """
+
+    def __init__(self, path=None, snapshot_dir=None):
+        path = path or INCREMENTAL_SETTINGS['path']
+        self.snapshot_dir = snapshot_dir or INCREMENTAL_SETTINGS['snapshot_dir']
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY, source TEXT, content_hash TEXT, records INTEGER,
+                checked_at REAL, changed_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS page_records (
+                key TEXT PRIMARY KEY, records TEXT
+            );
+            CREATE TABLE IF NOT EXISTS records (
+                dataset TEXT, record_key TEXT, fingerprint TEXT, canonical_key TEXT,
+                PRIMARY KEY (dataset, record_key)
+            );
+            CREATE TABLE IF NOT EXISTS snapshots (
+                dataset TEXT PRIMARY KEY, path TEXT, run_id TEXT, rows INTEGER, updated_at REAL
+            );
+        ''')
+
+    def page_changed(self, url, content, source='default'):
+        """True when the page is new or its body differs from the last committed run
+
+        An unchanged page is staged right away; a changed one only through stage_page, once
+        it has parsed - a failed parse or block page must not be skipped on the next run.
+        """
+        key = normalize_url(url)
+        content_hash = hashlib.sha256(content).hexdigest()
+        row = self.db.execute('SELECT content_hash FROM pages WHERE key = ?', (key,)).fetchone()
+        changed = row is None or row[0] != content_hash
+        if not changed:
+            with self.lock:
+                self.pending[key] = (source, content_hash, False, None)
+        metrics.inc('pages_checked_total', source=source, result='changed' if changed else 'unchanged')
+        return changed
+
+    def stage_page(self, url, content, source='default', records=()):
+        """Stage a changed page's fingerprint and the records parsed from it for commit_pages"""
+        with self.lock:
+            self.pending[normalize_url(url)] = (source, hashlib.sha256(content).hexdigest(), True, list(records))
+
+    def page_records(self, url):
+        """Records parsed from the page on the run that last committed it, None if not kept"""
+        row = self.db.execute('SELECT records FROM page_records WHERE key = ?', (normalize_url(url),)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def commit_pages(self):
+        now = time.time()
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        for key, (source, content_hash, changed, records) in pending.items():
+            if changed:
+                self.db.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)',
+                                (key, source, content_hash, len(records), now, now))
+                self.db.execute('INSERT OR REPLACE INTO page_records VALUES (?, ?)', (key, json.dumps(records)))
+            else:
+                self.db.execute('UPDATE pages SET checked_at = ? WHERE key = ?', (now, key))
+        self.db.commit()
+
+    def record_state(self, dataset):
+        """DataFrame of record_key -> fingerprint, canonical_key from the last run"""
+        return pd.read_sql_query('SELECT record_key, fingerprint, canonical_key FROM records WHERE dataset = ?',
+                                 self.db, params=(dataset,)).set_index('record_key')
+
+    def save_record_state(self, dataset, state):
+        self.db.execute('DELETE FROM records WHERE dataset = ?', (dataset,))
+        self.db.executemany('INSERT INTO records VALUES (?, ?, ?, ?)', [
+            (dataset, key, fingerprint, canonical_key)
+            for key, fingerprint, canonical_key in state[['fingerprint', 'canonical_key']].itertuples()
+        ])
+        self.db.commit()
+
+    def snapshot(self, dataset):
+        """The last merged snapshot (all columns as strings), None before the first run"""
+        row = self.db.execute('SELECT path FROM snapshots WHERE dataset = ?', (dataset,)).fetchone()
+        if row is None or not os.path.exists(row[0]):
+            return None
+        return pd.read_parquet(row[0])
+
+    def save_snapshot(self, dataset, snapshot, run_id):
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        path = os.path.join(self.snapshot_dir, f"{dataset}-{run_id}.parquet")
+        previous = self.db.execute('SELECT path FROM snapshots WHERE dataset = ?', (dataset,)).fetchone()
+        snapshot.to_parquet(path, index=False)
+        self.db.execute('INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?)',
+                        (dataset, path, run_id, len(snapshot), time.time()))
+        self.db.commit()
+        if previous and previous[0] != path and os.path.exists(previous[0]):
+            os.remove(previous[0])
+        return path
+
+
+def normalize_frame(df):
+    """Every value as a string, missing values as '' - the form snapshots are stored and compared in"""
+    return df.astype(object).where(df.notna(), '').astype(str)
+
+
+def fingerprint_rows(df, ignore=()):
+    """64-bit content hash per row, independent of column order"""
+    columns = sorted(column for column in df.columns if column not in ignore)
+    return pd.util.hash_pandas_object(normalize_frame(df[columns]), index=False)
+
+
+def raw_keys(df, name_column='name', address_column='address'):
+    return pd.Series([record_key(name, address) for name, address in zip(df[name_column], df[address_column])],
+                     index=df.index)
+
+
+def plan_changes(df, previous, canonical_keys):
+    """Which dedup clusters need enrichment this run, and the record state to save afterwards
+
+    `canonical_keys` is this run's dedup cluster key per input row. A cluster is rebuilt when it
+    holds a new or changed row, or gained/lost members since the last run; `replaced` are the
+    previous clusters whose snapshot rows can no longer be reused as they are. Duplicate raw
+    keys are fingerprinted together.
+    """
+    keys = raw_keys(df)
+    hashes = pd.Series(fingerprint_rows(df).to_numpy(), index=df.index)
+    state = pd.DataFrame({
+        'fingerprint': hashes.groupby(keys).sum().map('{:016x}'.format),  # uint64 sum wraps, order-free
+        'canonical_key': pd.Series(np.asarray(canonical_keys), index=df.index).groupby(keys).first()
+    })
+
+    known = state.index.intersection(previous.index)
+    new = state.index.difference(previous.index)
+    changed = known[state.loc[known, 'fingerprint'].to_numpy() != previous.loc[known, 'fingerprint'].to_numpy()]
+    moved = known[state.loc[known, 'canonical_key'].to_numpy() != previous.loc[known, 'canonical_key'].to_numpy()]
+    deleted = previous.index.difference(state.index)
+    replaced = set(previous.loc[changed.union(moved).union(deleted), 'canonical_key'])
+    # Rows left behind in a replaced cluster are rebuilt with it
+    left = known[previous.loc[known, 'canonical_key'].isin(replaced).to_numpy()]
+    rebuild = set(state.loc[new.union(changed).union(moved).union(left), 'canonical_key'])
+
+    stats = {'rows': len(df), 'new': len(new), 'changed': len(changed), 'deleted': len(deleted),
+             'unchanged': len(known) - len(changed), 'rebuild': len(rebuild)}
+    return {'rebuild': rebuild, 'replaced': replaced | rebuild, 'state': state, 'stats': stats}
+
+
+def merge_snapshot(previous, rebuilt, replaced, live_keys, key='record_key', ignore=('last_updated',)):
+    """Fold this run's rebuilt rows into the previous snapshot, returns (snapshot, delta, stats)
+
+    Rebuilt rows whose content (ignoring `ignore`) matches the previous version keep that version,
+    so an unchanged restaurant keeps its last_updated. Previous rows are dropped when their cluster
+    was rebuilt (`replaced`) or no input row maps to them anymore (`live_keys`). The delta holds
+    every inserted, updated and deleted row with a `change` column.
+    """
+    rebuilt = normalize_frame(rebuilt)
+    if previous is None:
+        previous = pd.DataFrame(columns=list(rebuilt.columns))
+    previous = normalize_frame(previous)
+    columns = list(dict.fromkeys(list(rebuilt.columns) + list(previous.columns)))
+    rebuilt = rebuilt.reindex(columns=columns, fill_value='')
+    previous = previous.reindex(columns=columns, fill_value='')
+
+    existed = rebuilt[key].isin(previous[key])
+    old = previous.set_index(key)
+    same = np.zeros(len(rebuilt), dtype=bool)
+    if existed.any():
+        same[existed.to_numpy()] = (
+            fingerprint_rows(rebuilt[existed], ignore).to_numpy()
+            == fingerprint_rows(old.loc[rebuilt.loc[existed, key]].reset_index(), ignore).to_numpy()
+        )
+    same = pd.Series(same, index=rebuilt.index)
+
+    kept = previous[~previous[key].isin(replaced) & ~previous[key].isin(rebuilt[key]) & previous[key].isin(live_keys)]
+    unchanged = previous[previous[key].isin(rebuilt.loc[same, key])]
+    snapshot = pd.concat([kept, unchanged, rebuilt[~same]], ignore_index=True)
+
+    deleted = previous[~previous[key].isin(snapshot[key])]
+    delta = pd.concat([
+        rebuilt[~existed].assign(change='insert'),
+        rebuilt[existed & ~same].assign(change='update'),
+        deleted.assign(change='delete')
+    ], ignore_index=True)
+    stats = {'snapshot': len(snapshot), 'inserts': int((~existed).sum()), 'updates': int((existed & ~same).sum()),
+             'deletes': len(deleted), 'unchanged': len(snapshot) - int((~same).sum())}
+    return snapshot, delta, stats
@@ -0,0 +1,41 @@
+# pipeline/keys.py
+import hashlib
+import re
+import unicodedata
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+_NON_ASCII = r'[^\x00-\x7f]'
+
+
+def fold_accents(value):
+    """Accents stripped so they survive normalization - 'Café Français' -> 'Cafe Francais'"""
+    if value.isascii():
+        return value
+    decomposed = unicodedata.normalize('NFKD', value)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def normalize_text(value):
+    """Accents folded, lowercase, punctuation and whitespace collapsed - 'Al Biernat's' -> 'al biernat s'"""
+    if not isinstance(value, str):
+        return ''
+    return _NON_ALNUM.sub(' ', fold_accents(value).lower()).strip()
+
+
+def join_key(names):
+    """Vectorized normalize_text over a pandas Series - the key reference tables are joined on"""
+    names = names.fillna('').astype(str)
+    accented = names.str.contains(_NON_ASCII, regex=True)
+    if accented.any():
+        names = names.mask(accented, names[accented].map(fold_accents))
+    return names.str.lower().str.replace(_NON_ALNUM, ' ', regex=True).str.strip()
+
+
+def record_key(name, address):
+    """Dedup/join key from the spec - SHA256 of normalized name + address
+
+    The one definition of a restaurant's key: canonical rows (linkage), enrichment lookups
+    and memo entries (places) and incremental state all key on this, so they join.
+    """
+    normalized = f"{normalize_text(name)}|{normalize_text(address)}"
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
@@ -0,0 +1,224 @@
+# pipeline/linkage.py
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from pipeline.keys import normalize_text, record_key
+
+# Cleaning rules: strip ™/®, "Restaurant" suffix unless it is the whole name
+_MARKS = re.compile(r'[™®©]')
+_SUFFIX = re.compile(r'\s+(restaurant|restaurants|bar & grill|dallas)$', re.IGNORECASE)
+_ZIP = re.compile(r'\b(\d{5})(?:-\d{4})?\b')
+_HOUSE_NUMBER = re.compile(r'^\s*(\d+)')
+
+ADDRESS_ABBREVIATIONS = {
+    'street': 'st', 'avenue': 'ave', 'boulevard': 'blvd', 'road': 'rd', 'drive': 'dr',
+    'lane': 'ln', 'court': 'ct', 'parkway': 'pkwy', 'highway': 'hwy', 'freeway': 'fwy',
+    'suite': 'ste', 'north': 'n', 'south': 's', 'east': 'e', 'west': 'w', 'floor': 'fl'
+}
+
+# Blocking / scoring knobs
+SHINGLE_SIZE = 3
+LSH_BANDS = 6
+LSH_ROWS = 3
+SIGNATURE_SIZE = 48  # extra permutations beyond the LSH bands sharpen the similarity estimate
+MAX_BLOCK_SIZE = 50  # larger blocks fall back to a sorted-name sliding window
+WINDOW = 8
+GEOHASH_PRECISION = 7  # ~150m cells
+MATCH_THRESHOLD = 0.72
+MIN_NAME_SIMILARITY = 0.4
+_PRIME = (1 << 31) - 1
+_GEOHASH_ALPHABET = np.array(list('0123456789bcdefghjkmnpqrstuvwxyz'))
+
+
+def normalize_name(name):
+    """'Fearing's Restaurant™' -> 'fearing s'"""
+    if not isinstance(name, str):
+        return ''
+    stripped = _MARKS.sub('', name).strip()
+    without_suffix = _SUFFIX.sub('', stripped)
+    return normalize_text(without_suffix or stripped).replace(' and ', ' ')
+
+
+def normalize_address(address):
+    """Lowercase, abbreviate street words, drop city/state so only street + zip are compared"""
+    tokens = normalize_text(address).split()
+    return ' '.join(ADDRESS_ABBREVIATIONS.get(token, token) for token in tokens
+                    if token not in ('dallas', 'tx', 'texas'))
+
+
+def shingles(text):
+    """Character 3-gram hashes - CRC32, not the builtin hash, which is salted per process and
+    would make signatures (and so clusters) differ from run to run"""
+    padded = f" {text} ".encode('utf-8')
+    return {zlib.crc32(padded[i:i + SHINGLE_SIZE]) & _PRIME
+            for i in range(max(1, len(padded) - SHINGLE_SIZE + 1))}
+
+
+def minhash_signatures(shingle_sets):
+    """Vectorized MinHash over all rows at once - one reduceat per permutation"""
+    rng = np.random.default_rng(7)
+    a = rng.integers(1, _PRIME, size=SIGNATURE_SIZE, dtype=np.int64)
+    b = rng.integers(0, _PRIME, size=SIGNATURE_SIZE, dtype=np.int64)
+
+    lengths = np.fromiter((len(s) for s in shingle_sets), dtype=np.int64, count=len(shingle_sets))
+    hashes = np.fromiter((h for s in shingle_sets for h in s), dtype=np.int64, count=int(lengths.sum()))
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    signatures = np.empty((len(shingle_sets), SIGNATURE_SIZE), dtype=np.int32)
+    for p in range(SIGNATURE_SIZE):
+        signatures[:, p] = np.minimum.reduceat((a[p] * hashes + b[p]) % _PRIME, offsets)
+    return signatures
+
+
+def lsh_bands(signatures):
+    """One LSH bucket id per band per row, from the first LSH_BANDS * LSH_ROWS signature columns"""
+    bands = signatures[:, :LSH_BANDS * LSH_ROWS].astype(np.int64).reshape(len(signatures), LSH_BANDS, LSH_ROWS)
+    weights = np.array([1, 1000003, 1000003 ** 2], dtype=np.int64)[:LSH_ROWS]
+    return (bands * weights).sum(axis=2)  # int64 wraparound is fine for bucket ids
+
+
+def geohash(lat, lng, precision=GEOHASH_PRECISION):
+    """Vectorized geohash of coordinate columns ('' where coordinates are missing)"""
+    lat = pd.to_numeric(lat, errors='coerce').to_numpy(dtype=float)
+    lng = pd.to_numeric(lng, errors='coerce').to_numpy(dtype=float)
+    valid = ~(np.isnan(lat) | np.isnan(lng))
+    bits = precision * 5
+    lng_bits, lat_bits = (bits + 1) // 2, bits // 2
+    lng_cells = np.clip(((np.nan_to_num(lng) + 180) / 360 * (1 << lng_bits)).astype(np.int64), 0, (1 << lng_bits) - 1)
+    lat_cells = np.clip(((np.nan_to_num(lat) + 90) / 180 * (1 << lat_bits)).astype(np.int64), 0, (1 << lat_bits) - 1)
+
+    code = np.zeros(len(lat), dtype=np.int64)
+    for i in range(bits):  # interleave, longitude bit first
+        if i % 2 == 0:
+            bit = (lng_cells >> (lng_bits - 1 - i // 2)) & 1
+        else:
+            bit = (lat_cells >> (lat_bits - 1 - i // 2)) & 1
+        code = (code << 1) | bit
+    hashes = _GEOHASH_ALPHABET[(code >> (5 * (precision - 1))) & 31]
+    for c in range(1, precision):
+        hashes = np.char.add(hashes, _GEOHASH_ALPHABET[(code >> (5 * (precision - 1 - c))) & 31])
+    return np.where(valid, hashes, '')
+
+
+def _block_pairs(keys, names, skip_empty=True):
+    """Candidate pairs (i < j) for rows sharing a block key, encoded as i * n + j
+
+    Blocks of the same size are expanded together, so the cost is one numpy pass per
+    distinct block size rather than a Python iteration per block.
+    """
+    n = len(keys)
+    order = np.lexsort((names, keys))
+    sorted_keys = keys[order]
+    starts = np.concatenate(([0], np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1))
+    sizes = np.diff(np.append(starts, n))
+    keep = sizes >= 2
+    if skip_empty:
+        keep &= sorted_keys[starts] != ''
+    starts, sizes = starts[keep], sizes[keep]
+
+    pairs = []
+    for size in np.unique(sizes):
+        block_starts = starts[sizes == size]
+        if size <= MAX_BLOCK_SIZE:
+            i, j = np.triu_indices(size, 1)
+        else:
+            # Oversized block - only compare neighbours in sorted-name order
+            i = np.concatenate([np.arange(size - d) for d in range(1, WINDOW + 1)])
+            j = np.concatenate([np.arange(d, size) for d in range(1, WINDOW + 1)])
+        members = order[block_starts[:, None] + np.arange(size)]
+        left, right = members[:, i].ravel(), members[:, j].ravel()
+        pairs.append(np.minimum(left, right) * n + np.maximum(left, right))
+    return np.concatenate(pairs) if pairs else np.empty(0, dtype=np.int64)
+
+
+def candidate_pairs(signatures, names, house_numbers, zips, lat=None, lng=None):
+    """Union of the blocking passes: name LSH bands, zip + house number, geohash cell"""
+    bands = lsh_bands(signatures)
+    passes = [_block_pairs(bands[:, band], names, skip_empty=False) for band in range(LSH_BANDS)]
+
+    street_keys = np.where((zips != '') & (house_numbers != ''),
+                           np.char.add(np.char.add(zips, ':'), house_numbers), '')
+    passes.append(_block_pairs(street_keys, names))
+    if lat is not None and lng is not None:
+        passes.append(_block_pairs(geohash(lat, lng), names))
+    pairs = np.sort(np.concatenate(passes))
+    return pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))] if len(pairs) else pairs
+
+
+def score_pairs(pairs, n, signatures, addresses, house_numbers, chunk_size=250000):
+    """Name similarity (MinHash estimate, vectorized) plus address similarity where house numbers agree
+
+    Returns (score, name similarity) per candidate pair.
+    """
+    left, right = np.divmod(pairs, n)
+    name_scores = np.empty(len(pairs))
+    for start in range(0, len(pairs), chunk_size):
+        end = start + chunk_size
+        name_scores[start:end] = (signatures[left[start:end]] == signatures[right[start:end]]).mean(axis=1)
+
+    # Exact token Jaccard on the street part, only for pairs at the same house number
+    address_scores = np.zeros(len(pairs))
+    same_number = (house_numbers[left] == house_numbers[right]) & (house_numbers[left] != '')
+    address_tokens = [set(address.split()) for address in addresses]
+    for k, i, j in zip(np.flatnonzero(same_number).tolist(), left[same_number].tolist(), right[same_number].tolist()):
+        x, y = address_tokens[i], address_tokens[j]
+        address_scores[k] = len(x & y) / len(x | y)
+    return 0.6 * name_scores + 0.4 * address_scores, name_scores
+
+
+def _clusters(n, matched, pairs):
+    """Union-find over matched pairs -> cluster id per row"""
+    parent = np.arange(n)
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j in zip(*np.divmod(pairs[matched], n)):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+    return np.array([find(x) for x in range(n)])
+
+
+def link_records(records, name_column='name', address_column='address'):
+    """Cluster duplicate records and collapse each cluster to one canonical row
+
+    Returns the canonical records plus the input annotated with cluster_id and match stats.
+    """
+    df = records.reset_index(drop=True)
+    n = len(df)
+    if n == 0:
+        canonical = df.assign(cluster_id=pd.Series(dtype='int64')).reindex(
+            columns=['cluster_id', *df.columns, 'source_count', 'record_key'])
+        stats = {'rows': 0, 'candidate_pairs': 0, 'matched_pairs': 0, 'clusters': 0}
+        return canonical, df.assign(cluster_id=pd.Series(dtype='int64')), stats
+    names = np.array([normalize_name(name) for name in df[name_column]], dtype=str)
+    raw_addresses = df[address_column].fillna('').astype(str)
+    addresses = np.array([normalize_address(address) for address in raw_addresses], dtype=str)
+    zips = raw_addresses.str.extract(_ZIP, expand=False).fillna('').to_numpy(dtype=str)
+    house_numbers = np.array([(m.group(1) if m else '') for m in map(_HOUSE_NUMBER.match, addresses)], dtype=str)
+    lat, lng = (df['lat'], df['lng']) if {'lat', 'lng'} <= set(df.columns) else (None, None)
+
+    signatures = minhash_signatures([shingles(name) for name in names])
+    pairs = candidate_pairs(signatures, names, house_numbers, zips, lat, lng)
+    scores, name_scores = score_pairs(pairs, n, signatures, addresses, house_numbers)
+    matched = (scores >= MATCH_THRESHOLD) & (name_scores >= MIN_NAME_SIMILARITY)
+    df['cluster_id'] = _clusters(n, matched, pairs)
+
+    # Canonical row: the most complete member, gaps filled from the rest of its cluster
+    completeness = df.replace('', np.nan).notna().sum(axis=1)
+    ordered = df.assign(_completeness=completeness).sort_values(['cluster_id', '_completeness'], ascending=[True, False])
+    canonical = ordered.replace('', np.nan).groupby('cluster_id', sort=True).first()
+    canonical['source_count'] = df.groupby('cluster_id').size()
+    canonical = canonical.drop(columns=['_completeness']).fillna('').reset_index()
+    canonical['record_key'] = [record_key(name, address)
+                               for name, address in zip(canonical[name_column], canonical[address_column])]
+
+    stats = {'rows': n, 'candidate_pairs': len(pairs), 'matched_pairs': int(matched.sum()),
+             'clusters': len(canonical)}
+    return canonical, df, stats
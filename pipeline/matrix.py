@@ -0,0 +1,123 @@
+# pipeline/matrix.py
+import os
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from urllib.parse import urlsplit
+
+from causes.scrape_directories import iter_school_directories
+from configs.settings import CITIES, DATA_SOURCES, HOST_RATE_LIMITS, MATRIX_SETTINGS, WORK_QUEUE_SETTINGS
+from creators.scrape_hashtags import iter_instagram_hashtags
+from pipeline import metrics
+from pipeline.sink import stream_to_dataset
+from restaurants.scrape_opentable import iter_opentable, opentable_url
+
+
+def _directories(city, first, last):
+    return CITIES[city]['isd_directories'][first - 1:last]
+
+
+# source -> dataset, records(city, first, last) for an inclusive page range, pages(city)
+# (None = paginated, sized by MATRIX_SETTINGS['pages']) and the hosts a page range hits
+SOURCES = {
+    'opentable': {
+        'dataset': 'restaurants',
+        'records': lambda city, first, last: iter_opentable(city, last - first + 1, first_page=first),
+        'pages': lambda city: None,
+        'urls': lambda city, first, last: [opentable_url(city)]
+    },
+    'school_directories': {
+        'dataset': 'causes',
+        'records': lambda city, first, last: iter_school_directories(_directories(city, first, last), city=city),
+        'pages': lambda city: len(CITIES[city]['isd_directories']),
+        'urls': _directories
+    },
+    'instagram_hashtags': {
+        'dataset': 'creators',
+        'records': lambda city, first, last: iter_instagram_hashtags(CITIES[city]['hashtags'][first - 1:last],
+                                                                     city=city),
+        'pages': lambda city: len(CITIES[city]['hashtags']),
+        'urls': lambda city, first, last: []
+    }
+}
+
+
+def default_sources():
+    """Configured sources (DATA_SOURCES) that have a scraper behind them"""
+    return [source for sources in DATA_SOURCES.values() for source in sources if source in SOURCES]
+
+
+def shard_units(sources=None, cities=None, pages=None, pages_per_unit=None):
+    """Expand the city registry into units = source x city x page range
+
+    Ids are stable, so re-sharding never duplicates work in the queue.
+    """
+    pages_per_unit = pages_per_unit or WORK_QUEUE_SETTINGS['pages_per_unit']
+    units = []
+    for source in sources or default_sources():
+        for city in cities or list(CITIES):
+            total = SOURCES[source]['pages'](city)
+            if total is None:
+                total = pages or MATRIX_SETTINGS['pages']
+            for start in range(1, total + 1, pages_per_unit):
+                end = min(start + pages_per_unit - 1, total)
+                units.append({'id': f"{source}:{city}:{start}-{end}", 'source': source, 'city': city,
+                              'first_page': start, 'last_page': end})
+    return units
+
+
+def unit_hosts(unit):
+    urls = SOURCES[unit['source']]['urls'](unit['city'], unit['first_page'], unit['last_page'])
+    return sorted({urlsplit(url).netloc for url in urls})
+
+
+def host_job_limit(host):
+    return HOST_RATE_LIMITS.get(host, {}).get('jobs', MATRIX_SETTINGS['jobs_per_host'])
+
+
+def run_unit(unit):
+    """Scrape one unit straight into raw Parquet parts for its city/source partition"""
+    source = SOURCES[unit['source']]
+    records = source['records'](unit['city'], unit['first_page'], unit['last_page'])
+    summary = stream_to_dataset(records, source['dataset'], 'raw', source=unit['source'], city=unit['city'])
+    print(f"✅ {unit['id']}: {summary['records']} records")
+    return summary
+
+
+def run_matrix(units, max_workers=None):
+    """Run units on a process pool, never more than host_job_limit(host) at once per host
+
+    Every process has its own fetch engine and politeness budget, so the per-host cap is
+    what keeps N cores from turning into N x the request rate against one site. Units
+    whose hosts are busy wait while units for other hosts fill the free workers.
+    Returns ({unit id: sink summary}, {unit id: error}).
+    """
+    max_workers = max_workers or MATRIX_SETTINGS['max_workers'] or os.cpu_count()
+    pending = [(unit, unit_hosts(unit)) for unit in units]
+    running = {}
+    busy = Counter()
+    summaries, failures = {}, {}
+    with ProcessPoolExecutor(max_workers) as pool:
+        while pending or running:
+            for item in list(pending):
+                if len(running) >= max_workers:
+                    break
+                unit, hosts = item
+                if all(busy[host] < host_job_limit(host) for host in hosts):
+                    running[pool.submit(run_unit, unit)] = item
+                    busy.update(hosts)
+                    pending.remove(item)
+            if not running:
+                raise ValueError(f"Units can never be scheduled (host job limit 0): {[u['id'] for u, _ in pending]}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                unit, hosts = running.pop(future)
+                busy.subtract(hosts)
+                try:
+                    summaries[unit['id']] = future.result()
+                except Exception as e:
+                    failures[unit['id']] = e
+                    metrics.inc('units_total', source=unit['source'], status='failed')
+                    print(f"❌ {unit['id']}: {e}")
+                    continue
+                metrics.inc('units_total', source=unit['source'], status='done')
+    return summaries, failures
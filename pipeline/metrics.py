@@ -0,0 +1,204 @@
+# pipeline/metrics.py
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+from configs.settings import METRICS_SETTINGS
+
+PREFIX = 'pipeline_'
+_NOOP = nullcontext()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + [float('inf')], self.counts):
+            total += count
+            yield bound, total
+
+
+class Registry:
+    """Counters, gauges and histograms keyed by (name, labels)
+
+    Every recording call starts with one `enabled` check, so instrumented code pays
+    almost nothing when metrics are off.
+    """
+
+    def __init__(self, enabled=False, buckets=None):
+        self.enabled = enabled
+        self.buckets = list(buckets or METRICS_SETTINGS['buckets'])
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.exporter = None
+        self.stop_event = threading.Event()
+        self.exit_hook = False
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name, value, **labels):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.gauges[self._key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def timer(self, name, **labels):
+        """`with timer('parse_seconds', source=...)` - observes the elapsed seconds"""
+        if not self.enabled:
+            return _NOOP
+        return _Timer(self, name, labels)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'ts': time.time(),
+                'counters': [{'name': n, 'labels': dict(l), 'value': v} for (n, l), v in self.counters.items()],
+                'gauges': [{'name': n, 'labels': dict(l), 'value': v} for (n, l), v in self.gauges.items()],
+                'histograms': [{'name': n, 'labels': dict(l), 'count': h.count, 'sum': h.sum,
+                                'buckets': {str(b): c for b, c in h.cumulative()}}
+                               for (n, l), h in self.histograms.items()]
+            }
+
+    def write_jsonl(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'a') as f:
+            f.write(json.dumps(self.snapshot()) + '\n')
+
+    def prometheus(self):
+        """Text exposition format (node_exporter textfile collector)"""
+        def fmt(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ''
+            return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+        lines = []
+        with self.lock:
+            for kind, series in (('counter', self.counters), ('gauge', self.gauges)):
+                for name in sorted({n for n, _ in series}):
+                    lines.append(f"# TYPE {PREFIX}{name} {kind}")
+                    lines += [f"{PREFIX}{name}{fmt(l)} {v}" for (n, l), v in series.items() if n == name]
+            for name in sorted({n for n, _ in self.histograms}):
+                lines.append(f"# TYPE {PREFIX}{name} histogram")
+                for (n, l), h in self.histograms.items():
+                    if n != name:
+                        continue
+                    for bound, count in h.cumulative():
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f"{PREFIX}{name}_bucket{fmt(l, [('le', le)])} {count}")
+                    lines.append(f"{PREFIX}{name}_sum{fmt(l)} {h.sum}")
+                    lines.append(f"{PREFIX}{name}_count{fmt(l)} {h.count}")
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)  # the collector never reads a half-written file
+
+    def flush(self):
+        if not self.enabled:
+            return
+        self.write_jsonl(METRICS_SETTINGS['jsonl_path'])
+        self.write_textfile(METRICS_SETTINGS['textfile_path'])
+
+    def start(self, interval=None):
+        """Export every `interval` seconds on a daemon thread, plus once at exit - can be restarted
+        after stop() (cli.py runs several stages in one process)"""
+        if not self.enabled or self.exporter:
+            return
+        interval = interval or METRICS_SETTINGS['interval']
+
+        def run():
+            while not self.stop_event.wait(interval):
+                self.flush()
+
+        self.exporter = threading.Thread(target=run, daemon=True)
+        self.exporter.start()
+        if not self.exit_hook:
+            atexit.register(self._stop_at_exit)
+            self.exit_hook = True
+
+    def stop(self):
+        """Stop the exporter thread and write a final snapshot"""
+        if self.exporter:
+            self.stop_event.set()
+            self.exporter.join()
+            self.exporter = None
+            self.stop_event.clear()  # ready for the next start()
+        self.flush()
+
+    def _stop_at_exit(self):
+        if self.exporter:
+            self.stop()
+
+
+class _Timer:
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.started, **self.labels)
+
+
+REGISTRY = Registry(enabled=METRICS_SETTINGS['enabled'])
+
+# Module-level shortcuts used by the instrumented code
+inc = REGISTRY.inc
+gauge = REGISTRY.gauge
+observe = REGISTRY.observe
+timer = REGISTRY.timer
+start = REGISTRY.start
+stop = REGISTRY.stop
+
+
+def enable():
+    REGISTRY.enabled = True
@@ -0,0 +1,264 @@
+# pipeline/places.py
+import asyncio
+import json
+import os
+import sqlite3
+import time
+
+import aiohttp
+import pandas as pd
+
+from configs.settings import ENRICHMENT_MEMO_PATH, ENRICHMENT_PROVIDERS
+from pipeline import metrics
+from pipeline.fetch import TokenBucket
+from pipeline.keys import record_key
+from pipeline.transport import backoff_delay, retry_after_seconds
+
+MAX_ATTEMPTS = 4
+
+# Google Places answers 200 for these too - only OK and ZERO_RESULTS are real results
+GOOGLE_RESULT_STATUSES = {'OK', 'ZERO_RESULTS'}
+GOOGLE_RETRY_STATUSES = {'OVER_QUERY_LIMIT', 'UNKNOWN_ERROR'}
+
+
+class ProviderError(Exception):
+    """A 200 response reporting a failure - never memoized, retried when `retry` is set"""
+
+    def __init__(self, status, message='', retry=False):
+        super().__init__(f"{status}: {message}" if message else status)
+        self.status = status
+        self.retry = retry
+
+
+def parse_google_places(data):
+    status = data.get('status', 'OK')
+    if status not in GOOGLE_RESULT_STATUSES:
+        raise ProviderError(status, data.get('error_message', ''), retry=status in GOOGLE_RETRY_STATUSES)
+    if not data.get('candidates'):
+        return {}
+    place = data['candidates'][0]
+    location = place.get('geometry', {}).get('location', {})
+    return {
+        'google_rating': place.get('rating', ''),
+        'google_review_count': place.get('user_ratings_total', ''),
+        'phone': place.get('formatted_phone_number', ''),
+        'website': place.get('website', ''),
+        'lat': location.get('lat', ''),
+        'lng': location.get('lng', ''),
+        'hours_available': 'opening_hours' in place,
+        'photos_available': 'photos' in place,
+        'google_types': ', '.join(place.get('types', []))
+    }
+
+
+def parse_yelp(data):
+    if not data.get('businesses'):
+        return {}
+    business = data['businesses'][0]
+    return {
+        'yelp_rating': business.get('rating', ''),
+        'yelp_review_count': business.get('review_count', ''),
+        'yelp_price': business.get('price', ''),
+        'yelp_categories': ', '.join(c['title'] for c in business.get('categories', [])),
+        'yelp_url': business.get('url', '')
+    }
+
+
+def google_places_request(name, address, api_key):
+    params = {
+        'input': f"{name} {address}",
+        'inputtype': 'textquery',
+        'fields': 'name,formatted_address,rating,user_ratings_total,formatted_phone_number,website,opening_hours,geometry,'
+                  'photos,types',
+        'key': api_key
+    }
+    return params, {}
+
+
+def yelp_request(name, address, api_key):
+    return {'term': name, 'location': address, 'limit': 1}, {'Authorization': f"Bearer {api_key}"}
+
+
+PROVIDER_CLIENTS = {
+    'google_places': (google_places_request, parse_google_places),
+    'yelp': (yelp_request, parse_yelp)
+}
+
+
+class MemoStore:
+    """Persistent lookup results (keyed by the SHA256 name+address key) and per-day quota usage"""
+
+    def __init__(self, path=ENRICHMENT_MEMO_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS memo (
+                provider TEXT, key TEXT, result TEXT, fetched_at REAL,
+                PRIMARY KEY (provider, key)
+            );
+            CREATE TABLE IF NOT EXISTS quota (
+                provider TEXT, day TEXT, used INTEGER,
+                PRIMARY KEY (provider, day)
+            );
+        ''')
+
+    def fresh(self, provider, keys, ttl_days):
+        """Memoized results younger than the provider's TTL"""
+        cutoff = time.time() - ttl_days * 86400
+        results = {}
+        keys = list(keys)
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            rows = self.db.execute(
+                f"SELECT key, result FROM memo WHERE provider = ? AND fetched_at >= ? "
+                f"AND key IN ({','.join('?' * len(batch))})",
+                [provider, cutoff, *batch]
+            )
+            results.update((key, json.loads(result)) for key, result in rows)
+        return results
+
+    def put(self, provider, key, result):
+        self.db.execute('INSERT OR REPLACE INTO memo VALUES (?, ?, ?, ?)',
+                        (provider, key, json.dumps(result), time.time()))
+        self.db.commit()
+
+    def refund(self, provider):
+        """Give back a call the provider refused (and does not bill)"""
+        self.db.execute('UPDATE quota SET used = MAX(used - 1, 0) WHERE provider = ? AND day = ?',
+                        (provider, time.strftime('%Y-%m-%d')))
+        self.db.commit()
+
+    def used(self, provider, period):
+        """Calls spent in a period - 'YYYY-MM-DD' for a day, 'YYYY-MM' for a month"""
+        row = self.db.execute('SELECT COALESCE(SUM(used), 0) FROM quota WHERE provider = ? AND day LIKE ?',
+                              (provider, f"{period}%")).fetchone()
+        return row[0]
+
+    def consume(self, provider):
+        day = time.strftime('%Y-%m-%d')
+        self.db.execute('INSERT INTO quota VALUES (?, ?, 1) '
+                        'ON CONFLICT (provider, day) DO UPDATE SET used = used + 1', (provider, day))
+        self.db.commit()
+
+
+class EnrichmentClient:
+    """Concurrent lookups for one provider under its rate, concurrency and quota budgets"""
+
+    def __init__(self, provider, memo=None, url=None, api_key=None):
+        self.provider = provider
+        self.config = ENRICHMENT_PROVIDERS[provider]
+        self.url = url or self.config['url']
+        self.api_key = api_key if api_key is not None else os.environ.get(self.config['api_key_env'], '')
+        self.build_request, self.parse = PROVIDER_CLIENTS[provider]
+        self.memo = memo or MemoStore()
+        self.stats = {'memo_hits': 0, 'duplicates': 0, 'calls': 0, 'errors': 0, 'over_quota': 0}
+
+    def remaining_quota(self):
+        remaining = self.config['daily_quota'] - self.memo.used(self.provider, time.strftime('%Y-%m-%d'))
+        if self.config['monthly_quota']:
+            monthly = self.config['monthly_quota'] - self.memo.used(self.provider, time.strftime('%Y-%m'))
+            remaining = min(remaining, monthly)
+        return max(remaining, 0)
+
+    async def _lookup(self, session, bucket, semaphore, key, name, address):
+        params, headers = self.build_request(name, address, self.api_key)
+        for attempt in range(MAX_ATTEMPTS):
+            retry_after = None
+            # Hold a concurrency slot for the request only - backing off must not starve other lookups
+            async with semaphore:
+                await bucket.acquire()
+                # Check and spend in one step - nothing can interleave without an await
+                if self.remaining_quota() <= 0:
+                    self.stats['over_quota'] += 1
+                    metrics.inc('enrichment_over_quota_total', provider=self.provider)
+                    return key, None
+                self.memo.consume(self.provider)
+                self.stats['calls'] += 1
+                metrics.inc('quota_consumed_total', provider=self.provider)
+                started = time.perf_counter()
+                try:
+                    async with session.get(self.url, params=params, headers=headers) as response:
+                        metrics.observe('enrichment_request_seconds', time.perf_counter() - started,
+                                        provider=self.provider, status=response.status)
+                        if response.status == 200:
+                            try:
+                                result = self.parse(await response.json(content_type=None))
+                            except ProviderError as e:
+                                # A denied key or a quota burst must not hide the restaurant until the TTL
+                                self.memo.refund(self.provider)
+                                metrics.inc('enrichment_provider_errors_total', provider=self.provider,
+                                            status=e.status)
+                                if not e.retry:
+                                    break
+                            else:
+                                self.memo.put(self.provider, key, result)
+                                return key, result
+                        elif response.status != 429 and response.status < 500:
+                            break
+                        else:
+                            retry_after = retry_after_seconds(response.headers)
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    pass
+            if attempt == MAX_ATTEMPTS - 1:
+                break
+            delay = backoff_delay(attempt, retry_after)
+            if delay is None:
+                break  # told to come back later than we are willing to wait
+            await asyncio.sleep(delay)
+        self.stats['errors'] += 1
+        metrics.inc('enrichment_errors_total', provider=self.provider)
+        return key, None
+
+    async def _run(self, queries):
+        bucket = TokenBucket(self.config['rate'], max(1, int(self.config['rate'])))
+        semaphore = asyncio.Semaphore(self.config['concurrency'])
+        timeout = aiohttp.ClientTimeout(total=15)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            return await asyncio.gather(*(
+                self._lookup(session, bucket, semaphore, key, name, address)
+                for key, (name, address) in queries.items()
+            ))
+
+    def enrich(self, restaurants):
+        """Lookup results for a DataFrame with name/address, one row per record_key"""
+        keys = [record_key(name, address) for name, address in zip(restaurants['name'], restaurants['address'])]
+        queries = dict(zip(keys, zip(restaurants['name'], restaurants['address'])))
+        self.stats['duplicates'] = len(keys) - len(queries)
+
+        results = self.memo.fresh(self.provider, queries, self.config['ttl_days'])
+        self.stats['memo_hits'] = len(results)
+        metrics.inc('enrichment_memo_hits_total', provider=self.provider, value=len(results))
+        pending = {key: query for key, query in queries.items() if key not in results}
+        if pending:
+            for key, result in asyncio.run(self._run(pending)):
+                if result is not None:
+                    results[key] = result
+
+        print(f"  {self.provider}: {len(queries)} unique lookups, {self.stats['memo_hits']} memoized, "
+              f"{self.stats['calls']} calls, {self.stats['errors']} failed, {self.stats['over_quota']} over quota")
+        rows = [{'record_key': key, **result} for key, result in results.items()]
+        return pd.DataFrame(rows) if rows else pd.DataFrame(columns=['record_key'])
+
+
+def configured_providers():
+    """Providers whose API key is set in the environment"""
+    return [name for name, config in ENRICHMENT_PROVIDERS.items() if os.environ.get(config['api_key_env'])]
+
+
+def enrich_with_providers(restaurants, providers=None, memo=None, urls=None):
+    """Left-join provider results onto the restaurants by record_key"""
+    providers = configured_providers() if providers is None else providers
+    memo = memo or MemoStore()
+    urls = urls or {}
+    enriched = restaurants.assign(record_key=[
+        record_key(name, address) for name, address in zip(restaurants['name'], restaurants['address'])
+    ])
+    for provider in providers:
+        results = EnrichmentClient(provider, memo=memo, url=urls.get(provider)).enrich(restaurants)
+        enriched = enriched.merge(results, on='record_key', how='left', suffixes=('', '_provider'))
+        # Provider values win where they exist, the original columns fill the gaps
+        for column in [c for c in results.columns if f"{c}_provider" in enriched.columns]:
+            provided = enriched.pop(f"{column}_provider")
+            enriched[column] = provided.where(provided.notna() & (provided != ''), enriched[column])
+    return enriched
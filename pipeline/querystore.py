@@ -0,0 +1,276 @@
+# pipeline/querystore.py
+import hashlib
+import os
+import sqlite3
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from configs.settings import CREATOR_TIERS, DATA_ROOT, QUERY_SETTINGS
+from pipeline import metrics
+from pipeline.columnar import DATASET_FIELDS, dataset_schema
+from pipeline.records import PriceBand
+
+DATASETS = ('restaurants', 'causes', 'creators')
+PARTITIONS = ['city', 'source', 'run_date']
+
+# field__op filters -> SQL
+OPERATORS = {'eq': '=', 'ne': '!=', 'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<=', 'like': 'LIKE', 'in': 'IN'}
+
+# (check, dataset, SQL returning one number, comparison, target)
+ACCEPTANCE_CHECKS = [
+    ('restaurants with rating and review count', 'restaurants',
+     'SELECT AVG(rating IS NOT NULL AND review_count IS NOT NULL) FROM restaurants', '>=', 0.85),
+    ('duplicate restaurants (name + address)', 'restaurants',
+     "SELECT COUNT(*) - COUNT(DISTINCT name || '|' || COALESCE(address, '')) FROM restaurants", '<=', 0),
+] + [
+    (f"{tier['tier']} creators below the DFW audience gate", 'creators',
+     f"SELECT COUNT(*) FROM creators WHERE tier = '{tier['tier']}' "
+     f"AND COALESCE(audience_location_pct, 0) < {tier['min_audience_location_pct']}", '<=', 0)
+    for tier in CREATOR_TIERS
+]
+
+
+def _sql_type(arrow_type):
+    if pa.types.is_floating(arrow_type):
+        return 'REAL'
+    if pa.types.is_integer(arrow_type) or pa.types.is_boolean(arrow_type):
+        return 'INTEGER'
+    return 'TEXT COLLATE NOCASE'  # 'uptown' finds 'Uptown', and the indexes agree
+
+
+def latest_parts(dataset, layer, root=DATA_ROOT):
+    """[(path, {city, source, run_date})] for the newest run_date of every city/source
+
+    A clean part is a whole snapshot (enrich, creator tiers), so only the newest part of the
+    run counts; raw and staging runs are spread over many chunked parts and all are read.
+    Raw restaurants are complete listings, not deltas: an incremental run re-emits the
+    records of listing pages it skipped (restaurants/scrape_opentable.py).
+    """
+    dataset_root = os.path.join(root, layer, dataset)
+    newest = {}
+    for directory, _, files in os.walk(dataset_root):
+        partition = dict(part.split('=', 1) for part in os.path.relpath(directory, dataset_root).split(os.sep)
+                         if '=' in part)
+        paths = [os.path.join(directory, name) for name in files if name.endswith('.parquet')]
+        if not paths or set(PARTITIONS) - set(partition):
+            continue
+        key = (partition['city'], partition['source'])
+        if key not in newest or partition['run_date'] > newest[key][0]['run_date']:
+            newest[key] = (partition, paths)
+    parts = []
+    for partition, paths in newest.values():
+        if layer == 'clean':
+            paths = [max(paths, key=os.path.getmtime)]
+        parts.extend((path, partition) for path in sorted(paths))
+    return parts
+
+
+class QueryStore:
+    """Indexed SQLite copy of the newest pipeline outputs, for filters and checks in milliseconds
+
+    Each dataset is one table with the dataset's columns plus its city/source/run_date
+    partition; text columns compare case-insensitively. Restaurant cuisine tags are also
+    split into restaurant_cuisines(restaurant_id, tag) so a cuisine filter is an index
+    lookup instead of a substring scan. A load swaps a table in one transaction and is skipped
+    while the source files are unchanged.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or QUERY_SETTINGS['path']
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=30)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('''CREATE TABLE IF NOT EXISTS loads (
+            dataset TEXT PRIMARY KEY, layer TEXT, files INTEGER, rows INTEGER, signature TEXT, loaded_at REAL)''')
+        self.db.execute('''CREATE TABLE IF NOT EXISTS check_results (
+            "check" TEXT PRIMARY KEY, dataset TEXT, value REAL, target TEXT, passed INTEGER)''')
+
+    def close(self):
+        self.db.close()
+
+    def columns(self, dataset):
+        return [row[1] for row in self.db.execute(f'PRAGMA table_info("{dataset}")')]
+
+    def load(self, dataset, root=DATA_ROOT, layers=None, force=False):
+        """(Re)build one dataset's table from the first layer that has it, returns the load summary"""
+        for layer in layers or QUERY_SETTINGS['layers']:
+            parts = latest_parts(dataset, layer, root)
+            if parts:
+                break
+        else:
+            return {'dataset': dataset, 'layer': None, 'files': 0, 'rows': 0, 'loaded': False}
+        signature = hashlib.sha256(repr([(path, os.path.getsize(path), os.path.getmtime(path))
+                                         for path, _ in parts]).encode()).hexdigest()
+        row = self.db.execute('SELECT files, rows, signature FROM loads WHERE dataset = ?', (dataset,)).fetchone()
+        if row is not None and row[2] == signature and not force:
+            return {'dataset': dataset, 'layer': layer, 'files': row[0], 'rows': row[1], 'loaded': False}
+
+        with metrics.timer('query_load_seconds', dataset=dataset):
+            frames = [pq.read_table(path).to_pandas().assign(**partition) for path, partition in parts]
+            df = pd.concat(frames, ignore_index=True)
+            try:
+                rows = self._replace(dataset, df)
+                self.db.execute('INSERT OR REPLACE INTO loads VALUES (?, ?, ?, ?, ?, ?)',
+                                (dataset, layer, len(parts), rows, signature, time.time()))
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
+        metrics.inc('records_total', stage='query_load', direction='in', dataset=dataset, value=rows)
+        return {'dataset': dataset, 'layer': layer, 'files': len(parts), 'rows': rows, 'loaded': True}
+
+    def load_all(self, root=DATA_ROOT, force=False):
+        return [self.load(dataset, root, force=force) for dataset in DATASETS]
+
+    def _replace(self, dataset, df):
+        schema = dataset_schema(dataset)
+        fields = [field for field in DATASET_FIELDS[dataset] + PARTITIONS if field in df.columns]
+        types = {field: _sql_type(schema.field(field).type) if field in schema.names else 'TEXT COLLATE NOCASE'
+                 for field in fields}
+        values = df[fields].astype(object).where(df[fields].notna(), None)
+        for field in fields:
+            if pd.api.types.is_datetime64_any_dtype(df[field]):
+                values[field] = df[field].dt.strftime('%Y-%m-%d %H:%M:%S').astype(object).where(df[field].notna(), None)
+            elif pd.api.types.is_bool_dtype(df[field]):
+                values[field] = values[field].map(lambda value: None if value is None else int(value))
+
+        # DDL is transactional in SQLite - readers see the old table until the commit
+        db = self.db
+        db.execute('BEGIN')
+        db.execute(f'DROP TABLE IF EXISTS "{dataset}"')
+        db.execute(f'CREATE TABLE "{dataset}" (id INTEGER PRIMARY KEY, '
+                   f'{", ".join(f"{_quote(field)} {types[field]}" for field in fields)})')
+        db.executemany(f'INSERT INTO "{dataset}" ({", ".join(map(_quote, fields))}) '
+                       f'VALUES ({", ".join("?" * len(fields))})', values.itertuples(index=False, name=None))
+        for index in QUERY_SETTINGS['indexes'].get(dataset, []):
+            columns = [index] if isinstance(index, str) else index
+            if set(columns) <= set(fields):
+                db.execute(f'CREATE INDEX "{dataset}_{"_".join(columns)}" ON "{dataset}" '
+                           f'({", ".join(map(_quote, columns))})')
+        if dataset == 'restaurants':
+            db.execute('DROP TABLE IF EXISTS restaurant_cuisines')
+            db.execute('CREATE TABLE restaurant_cuisines (restaurant_id INTEGER, tag TEXT COLLATE NOCASE)')
+            if 'cuisine_tags' in fields:
+                # ids of a fresh table are 1..n in insert order
+                db.executemany('INSERT INTO restaurant_cuisines VALUES (?, ?)', (
+                    (restaurant_id, tag.strip())
+                    for restaurant_id, tags in enumerate(values['cuisine_tags'], 1)
+                    if tags for tag in tags.split(',') if tag.strip()
+                ))
+            db.execute('CREATE INDEX restaurant_cuisines_tag ON restaurant_cuisines (tag, restaurant_id)')
+            db.execute('ANALYZE restaurant_cuisines')
+        db.execute(f'ANALYZE "{dataset}"')
+
+        # Checks only change when the data does, so they are answered here once per load
+        db.execute('DELETE FROM check_results WHERE dataset = ?', (dataset,))
+        for check, check_dataset, query, comparison, target in ACCEPTANCE_CHECKS:
+            if check_dataset == dataset:
+                value = db.execute(query).fetchone()[0]
+                passed = value is not None and (value >= target if comparison == '>=' else value <= target)
+                db.execute('INSERT INTO check_results VALUES (?, ?, ?, ?, ?)',
+                           (check, dataset, value, f"{comparison} {target}", passed))
+        return len(values)
+
+    def _select(self, dataset, fields='*', order_by=None, limit=None, **filters):
+        if dataset not in DATASETS:
+            raise ValueError(f"Unknown dataset {dataset!r}, expected one of {DATASETS}")
+        columns = self.columns(dataset)
+        if not columns:
+            raise ValueError(f"{dataset} is not loaded - run `cli.py query load` first")
+        clauses, params = [], []
+        for name, value in filters.items():
+            field, _, op = name.partition('__')
+            op = op or 'eq'
+            if op not in OPERATORS:
+                raise ValueError(f"Unknown operator {op!r} in {name!r}, expected one of {list(OPERATORS)}")
+            if dataset == 'restaurants' and field == 'cuisine':
+                if op not in ('eq', 'in'):
+                    raise ValueError(f"cuisine only supports eq and in, got {op!r}")
+                values = list(value) if op == 'in' else [value]
+                tags = f'tag IN ({", ".join("?" * len(values))})'
+                if len(filters) == 1:
+                    clauses.append(f'id IN (SELECT restaurant_id FROM restaurant_cuisines WHERE {tags})')
+                else:
+                    # Left to itself SQLite drives from the tag index even when the other filters
+                    # narrow far more - a correlated probe keeps their index in front
+                    clauses.append(f'EXISTS (SELECT 1 FROM restaurant_cuisines WHERE {tags} '
+                                   'AND restaurant_id = restaurants.id)')
+                params.extend(values)
+                continue
+            if field not in columns:
+                raise ValueError(f"Unknown {dataset} field {field!r}")
+            if field == 'price_band':
+                value = [_price_band(v) for v in value] if op == 'in' else _price_band(value)
+            if op == 'in':
+                clauses.append(f'{_quote(field)} IN ({", ".join("?" * len(value))})')
+                params.extend(value)
+            else:
+                clauses.append(f'{_quote(field)} {OPERATORS[op]} ?')
+                params.append(value)
+        query = f'SELECT {fields} FROM "{dataset}"'
+        if clauses:
+            query += ' WHERE ' + ' AND '.join(clauses)
+        if order_by:
+            descending = order_by.startswith('-')
+            if order_by.lstrip('-') not in columns:
+                raise ValueError(f"Unknown {dataset} field {order_by.lstrip('-')!r}")
+            query += f' ORDER BY {_quote(order_by.lstrip("-"))}{" DESC" if descending else ""}'
+        if limit:
+            query += f' LIMIT {int(limit)}'
+        return query, params
+
+    def find(self, dataset, columns=None, order_by=None, limit=None, **filters):
+        """Rows matching every filter, as dicts
+
+        Filters are field=value or field__op=value with op one of eq, ne, gt, gte, lt, lte,
+        like, in; `cuisine` matches one restaurant cuisine tag and price_band accepts '$$$$'.
+        find('restaurants', neighborhood='Uptown', price_band='$$$$', cuisine='Steakhouse', reservation_platform='Resy')
+        find('creators', tier='VIP', audience_location_pct__gte=0.4)
+        """
+        fields = ', '.join(map(_quote, columns)) if columns else '*'
+        query, params = self._select(dataset, fields, order_by, limit, **filters)
+        with metrics.timer('query_seconds', dataset=dataset):
+            return _dicts(self.db.execute(query, params))
+
+    def count(self, dataset, **filters):
+        query, params = self._select(dataset, 'COUNT(*)', **filters)
+        return self.db.execute(query, params).fetchone()[0]
+
+    def plan(self, dataset, **filters):
+        """SQLite's query plan for a filter - shows which index answers it"""
+        query, params = self._select(dataset, **filters)
+        return [row[3] for row in self.db.execute(f'EXPLAIN QUERY PLAN {query}', params)]
+
+    def sql(self, query, params=()):
+        """Ad-hoc read-only SQL, rows as dicts"""
+        self.db.execute('PRAGMA query_only = ON')
+        try:
+            return _dicts(self.db.execute(query, params))
+        finally:
+            self.db.execute('PRAGMA query_only = OFF')
+
+    def checks(self):
+        """Acceptance check results of the loaded datasets - [{check, dataset, value, target, passed}]"""
+        return [{**row, 'passed': bool(row['passed'])}
+                for row in _dicts(self.db.execute('SELECT * FROM check_results ORDER BY rowid'))]
+
+
+def _dicts(cursor):
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor]
+
+
+def _quote(field):
+    return f'"{field}"'
+
+
+def _price_band(value):
+    """'$$$$' -> '$$$$ (Fine Dining)'; anything else is compared as given"""
+    for band in PriceBand:
+        if band.value.split(' ')[0] == value:
+            return band.value
+    return value
@@ -0,0 +1,190 @@
+# pipeline/records.py
+import sys
+from datetime import datetime, timezone
+from enum import Enum
+from operator import attrgetter
+
+import pyarrow as pa
+
+from pipeline import metrics
+from pipeline.columnar import COLUMN_ALIASES, DATASET_FIELDS, DICTIONARY_FIELDS, FIELD_TYPES, dataset_schema
+
+
+class RecordError(ValueError):
+    """A record built with a key outside its schema"""
+
+
+class Platform(str, Enum):
+    OPENTABLE = 'OpenTable'
+    RESY = 'Resy'
+    TOCK = 'Tock'
+    OPENTABLE_RESY = 'OpenTable/Resy'
+    GOOGLE_PLACES = 'Google Places'
+    YELP = 'Yelp'
+    INSTAGRAM = 'Instagram'
+    TIKTOK = 'TikTok'
+    IRS_BMF = 'IRS EO BMF'
+    ISD_DIRECTORY = 'ISD Directory'
+
+    def __str__(self):
+        return self.value
+
+
+class PriceBand(str, Enum):
+    INEXPENSIVE = '$'
+    MODERATE = '$$'
+    UPSCALE = '$$$ (Upscale)'  # labels match configs/reference/price_bands.csv
+    FINE_DINING = '$$$$ (Fine Dining)'
+
+    def __str__(self):
+        return self.value
+
+
+_PLATFORMS = {member.value.lower(): member for member in Platform}
+_PRICE_BANDS = {len(member.value.split(' ')[0]): member for member in PriceBand}
+
+
+def _platform(value):
+    # Known platforms share one enum member; free text ('OpenTable, Resy, Tock') is interned
+    return _PLATFORMS.get(value.lower()) or sys.intern(value)
+
+
+def _price_band(value):
+    dollars = value.split(' ')[0]
+    if dollars and dollars == '$' * len(dollars) and len(dollars) in _PRICE_BANDS:
+        return _PRICE_BANDS[len(dollars)]  # '$$$' and '$$$ (Upscale)' are the same band
+    return sys.intern(value)
+
+
+def _float(value):
+    return float(value.replace(',', '')) if isinstance(value, str) else float(value)
+
+
+def _int(value):
+    return round(_float(value))
+
+
+_BOOLEANS = {'true': True, '1': True, 'yes': True, 'false': False, '0': False, 'no': False}
+
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    parsed = _BOOLEANS.get(str(value).strip().lower())
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
+
+
+def _timestamp(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.strip())
+    if hasattr(value, 'to_pydatetime'):
+        value = value.to_pydatetime()
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)  # same as columnar._column: aware -> naive UTC
+    return value.replace(tzinfo=None, microsecond=0)
+
+
+_ENUM_FIELDS = {'reservation_platform': _platform, 'source_platform': _platform, 'platform': _platform,
+                'price_band': _price_band}
+_ARROW_COERCERS = {pa.float64(): _float, pa.int64(): _int, pa.bool_(): _bool, pa.timestamp('s'): _timestamp}
+
+
+def _coercer(field):
+    if field in _ENUM_FIELDS:
+        return _ENUM_FIELDS[field]
+    if field in FIELD_TYPES:
+        return _ARROW_COERCERS[FIELD_TYPES[field]]
+    return sys.intern if field in DICTIONARY_FIELDS else str
+
+
+class Record:
+    """Base for the per-dataset record types - one slot per schema field, no per-instance dict
+
+    Values are coerced on the way in (numbers, booleans, timestamps, platform/price enums),
+    blanks and unparseable values become None, and legacy keys (cuisine, price, source) map
+    to their schema field.
+    """
+
+    __slots__ = ()
+    dataset = None
+    fields = ()
+    keys = {}  # scraper key (schema field or legacy alias) -> (field, coercer)
+
+    def __init__(self, **values):
+        unknown = [key for key in values if key not in self.keys]
+        if unknown:
+            raise RecordError(f"{self.dataset}: unknown field {unknown[0]!r}")
+        self._assign(values)
+
+    def _assign(self, values):
+        typed = {}
+        for key, value in values.items():
+            field, coerce = self.keys[key]
+            if key != field and typed.get(field) is not None:
+                continue  # the schema field wins over its legacy alias
+            if value is None or value == '' or value != value:  # blank or NaN
+                typed[field] = None
+                continue
+            try:
+                typed[field] = coerce(value)
+            except (TypeError, ValueError):
+                # Like columnar._column: an unparseable value ('N/A', '12.5K') is a null, not a lost row
+                typed[field] = None
+                metrics.inc('field_coerce_errors_total', dataset=self.dataset, field=field)
+        for field in self.fields:
+            setattr(self, field, typed.get(field))
+
+    @classmethod
+    def from_dict(cls, values):
+        """Record from a scraper dict - keys outside the schema are dropped, like to_table does"""
+        record = cls.__new__(cls)
+        record._assign({key: value for key, value in values.items() if key in cls.keys})
+        return record
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.fields}
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(getattr(self, f) == getattr(other, f) for f in self.fields)
+
+    def __repr__(self):
+        values = ', '.join(f"{field}={getattr(self, field)!r}" for field in self.fields
+                           if getattr(self, field) is not None)
+        return f"{type(self).__name__}({values})"
+
+    @classmethod
+    def to_table(cls, records):
+        """Column-at-a-time Arrow conversion - no DataFrame, no per-row dicts"""
+        schema = dataset_schema(cls.dataset)
+        columns = [pa.array(list(map(attrgetter(field), records)), type=schema.field(field).type)
+                   for field in cls.fields]
+        return pa.Table.from_arrays(columns, schema=schema)
+
+    @classmethod
+    def from_table(cls, table):
+        """Records from an Arrow table/batch (e.g. a Parquet part), one column pass per field"""
+        columns = [table.column(field).to_pylist() if field in table.column_names else [None] * table.num_rows
+                   for field in cls.fields]
+        records = []
+        for row in zip(*columns):
+            record = cls.__new__(cls)
+            record._assign(dict(zip(cls.fields, row)))
+            records.append(record)
+        return records
+
+
+def record_type(name, dataset):
+    """Slotted Record subclass for a dataset, fields straight from its schema"""
+    fields = tuple(DATASET_FIELDS[dataset])
+    keys = {field: (field, _coercer(field)) for field in fields}
+    keys.update({alias: keys[field] for alias, field in COLUMN_ALIASES.items() if field in keys})
+    return type(name, (Record,), {'__slots__': fields, 'dataset': dataset, 'fields': fields, 'keys': keys})
+
+
+RestaurantRecord = record_type('RestaurantRecord', 'restaurants')
+CauseRecord = record_type('CauseRecord', 'causes')
+CreatorRecord = record_type('CreatorRecord', 'creators')
+
+RECORD_TYPES = {'restaurants': RestaurantRecord, 'causes': CauseRecord, 'creators': CreatorRecord}
@@ -0,0 +1,104 @@
+# pipeline/sink.py
+import queue
+import threading
+
+from configs.settings import DATA_ROOT, STREAM_SETTINGS
+from pipeline import metrics
+from pipeline.columnar import write_dataset
+from pipeline.records import RECORD_TYPES
+
+_CLOSE = object()
+
+
+class ChunkedSink:
+    """Buffers records and writes one Parquet part every `chunk_size` records
+
+    Parts are written (and uploaded to the storage mirror, if one is configured) on a
+    background thread so parsing continues during the write; once
+    `pending_chunks` chunks are queued, `write` blocks until the writer catches up.
+    Dicts are buffered as slotted records - a fraction of the memory, typed on arrival
+    (unparseable fields become nulls, counted in field_coerce_errors_total).
+    """
+
+    def __init__(self, dataset, layer, source, chunk_size=None, city='dallas', run_date=None,
+                 root=DATA_ROOT, pending_chunks=None, writer=write_dataset):
+        self.dataset = dataset
+        self.layer = layer
+        self.source = source
+        self.city = city
+        self.run_date = run_date
+        self.root = root
+        self.chunk_size = chunk_size or STREAM_SETTINGS['chunk_size']
+        self.writer = writer
+        self.record_type = RECORD_TYPES[dataset]
+        self.buffer = []
+        self.count = 0
+        self.paths = []
+        self.error = None
+        self.chunks = queue.Queue(maxsize=pending_chunks or STREAM_SETTINGS['pending_chunks'])
+        self.thread = threading.Thread(target=self._drain, daemon=True)
+        self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.close(flush=exc_type is None)
+
+    def _drain(self):
+        while True:
+            chunk = self.chunks.get()
+            if chunk is _CLOSE:
+                return
+            if self.error:
+                continue  # keep draining so producers never block on a dead writer
+            try:
+                with metrics.timer('sink_write_seconds', dataset=self.dataset, layer=self.layer):
+                    self.paths.append(self.writer(chunk, self.dataset, self.layer, source=self.source,
+                                                  city=self.city, run_date=self.run_date, root=self.root))
+                metrics.inc('records_total', stage='sink', direction='in', dataset=self.dataset, layer=self.layer,
+                            value=len(chunk))
+            except Exception as e:
+                metrics.inc('sink_errors_total', dataset=self.dataset, layer=self.layer)
+                self.error = e
+
+    def _raise_writer_error(self):
+        if self.error:
+            raise RuntimeError(f"Writing {self.dataset} chunk failed") from self.error
+
+    def write(self, record):
+        if isinstance(record, dict):
+            record = self.record_type.from_dict(record)
+        self.buffer.append(record)
+        self.count += 1
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        self._raise_writer_error()
+        if self.buffer:
+            chunk, self.buffer = self.buffer, []
+            metrics.gauge('sink_pending_chunks', self.chunks.qsize(), dataset=self.dataset)
+            self.chunks.put(chunk)
+
+    def close(self, flush=True):
+        if flush:
+            self.flush()
+        self.chunks.put(_CLOSE)
+        self.thread.join()
+        self._raise_writer_error()
+
+    def summary(self):
+        return {'dataset': self.dataset, 'source': self.source, 'records': self.count,
+                'paths': list(self.paths)}
+
+
+def stream_to_dataset(records, dataset, layer, source, **sink_kwargs):
+    """Drain a record generator into chunked Parquet parts, returns the sink summary"""
+    with ChunkedSink(dataset, layer, source, **sink_kwargs) as sink:
+        sink.write_many(records)
+    return sink.summary()
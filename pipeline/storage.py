@@ -0,0 +1,378 @@
+# pipeline/storage.py
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from configs.settings import AWS_REGION, DATA_ROOT, STORAGE_SETTINGS
+from pipeline import metrics
+
+
+def layout_key(path, root=DATA_ROOT):
+    """Object key of a file under the local layout root ('raw/restaurants/city=dallas/...')"""
+    return os.path.relpath(path, root).replace(os.sep, '/')
+
+
+def file_md5(path, block_size=1024 ** 2):
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def s3_etag(path, part_size, threshold):
+    """The ETag S3 reports for this file uploaded by S3Store - MD5 of the body for a single PUT,
+    MD5 of the part MD5s + '-<parts>' for a multipart upload"""
+    if os.path.getsize(path) < threshold:
+        return file_md5(path)
+    digests = []
+    with open(path, 'rb') as f:
+        for part in iter(lambda: f.read(part_size), b''):
+            digests.append(hashlib.md5(part).digest())
+    return f"{hashlib.md5(b''.join(digests)).hexdigest()}-{len(digests)}"
+
+
+class LocalStore:
+    """The layout on a local (or mounted) filesystem - writes go to a temp file and are renamed into place"""
+
+    backend = 'local'
+
+    def __init__(self, root):
+        self.root = root
+
+    def url(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def checksum(self, path):
+        return file_md5(path)
+
+    def checksums(self, prefix=''):
+        """{key: checksum} of every object under prefix"""
+        found = {}
+        for directory, _, files in os.walk(self.url(prefix) if prefix else self.root):
+            for name in files:
+                path = os.path.join(directory, name)
+                found[layout_key(path, self.root)] = file_md5(path)
+        return found
+
+    def open(self, key):
+        return _AtomicFile(self.url(key))
+
+    def put_file(self, path, key):
+        """Copy a file to key unless an identical object is already there, returns True when copied"""
+        target = self.url(key)
+        if os.path.exists(target) and (os.path.samefile(path, target) or file_md5(target) == file_md5(path)):
+            _count(self, 'skipped', os.path.getsize(path))
+            return False
+        with self.open(key) as f, open(path, 'rb') as source:
+            shutil.copyfileobj(source, f)
+        _count(self, 'uploaded', os.path.getsize(path))
+        return True
+
+    def put_files(self, pairs):
+        stats = {'uploaded': 0, 'skipped': 0, 'bytes': 0}
+        for path, key in pairs:
+            if self.put_file(path, key):
+                stats['uploaded'] += 1
+                stats['bytes'] += os.path.getsize(path)
+            else:
+                stats['skipped'] += 1
+        return stats
+
+
+class _AtomicFile:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.temp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        self.file = open(self.temp, 'wb')
+
+    def write(self, data):
+        return self.file.write(data)
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+            os.replace(self.temp, self.path)
+
+    def abort(self):
+        self.file.close()
+        if os.path.exists(self.temp):
+            os.remove(self.temp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.abort() if exc_type else self.close()
+
+
+class S3Store:
+    """The layout in an S3 bucket (or any S3-compatible endpoint - moto, MinIO)
+
+    Objects of `small_file_bytes` or more go up as multipart uploads whose parts are sent by
+    `workers` threads. Every part or small object is read into memory only once one of the
+    `max_in_flight` slots is free, so the store never buffers more than
+    part_size * max_in_flight bytes however many or however large the files are. Before a
+    batch is sent, each destination prefix is listed once and files whose S3 ETag already
+    matches are skipped; the small files of a batch are uploaded concurrently.
+    """
+
+    backend = 's3'
+
+    def __init__(self, bucket, prefix='', client=None, endpoint_url=None, part_size=None,
+                 max_in_flight=None, workers=None, small_file_bytes=None):
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.part_size = part_size or STORAGE_SETTINGS['part_size']
+        self.max_in_flight = max_in_flight or STORAGE_SETTINGS['max_in_flight']
+        self.workers = workers or STORAGE_SETTINGS['workers']
+        self.small_file_bytes = small_file_bytes or STORAGE_SETTINGS['small_file_bytes']
+        if client is None:
+            import boto3  # only needed in prod
+            from botocore.config import Config
+
+            client = boto3.client('s3', region_name=AWS_REGION,
+                                  endpoint_url=endpoint_url or STORAGE_SETTINGS['endpoint_url'],
+                                  config=Config(max_pool_connections=self.workers + 2))
+        self.client = client
+        self.pool = ThreadPoolExecutor(self.workers, thread_name_prefix='s3-upload')
+        self.slots = threading.Semaphore(self.max_in_flight)
+        self.lock = threading.Lock()
+        self.buffered = 0
+        self.peak_buffered = 0
+
+    def object_key(self, key):
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def url(self, key):
+        return f"s3://{self.bucket}/{self.object_key(key)}"
+
+    def checksum(self, path):
+        return s3_etag(path, self.part_size, self.small_file_bytes)
+
+    def checksums(self, prefix=''):
+        found = {}
+        strip = len(self.object_key('')) if self.prefix else 0
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.object_key(prefix)):
+            for item in page.get('Contents', []):
+                found[item['Key'][strip:]] = item['ETag'].strip('"')
+        return found
+
+    def open(self, key):
+        """File-like writer that streams into a multipart upload as parts fill"""
+        return MultipartWriter(self, key)
+
+    def _acquire(self, size):
+        self.slots.acquire()
+        with self.lock:
+            self.buffered += size
+            self.peak_buffered = max(self.peak_buffered, self.buffered)
+
+    def _release(self, size):
+        with self.lock:
+            self.buffered -= size
+        self.slots.release()
+
+    def _send(self, size, call, **kwargs):
+        """Run one S3 call holding a slot on the upload pool; the slot is freed once it returns"""
+        def run():
+            try:
+                with metrics.timer('storage_request_seconds', backend='s3', call=call.__name__):
+                    return call(Bucket=self.bucket, **kwargs)
+            finally:
+                self._release(size)
+        return self.pool.submit(run)
+
+    def _put_small(self, path, key):
+        size = os.path.getsize(path)
+        self._acquire(size)
+        try:
+            with open(path, 'rb') as f:
+                body = f.read()
+        except BaseException:
+            self._release(size)
+            raise
+        return self._send(size, self.client.put_object, Key=self.object_key(key), Body=body)
+
+    def _put_large(self, path, key):
+        with self.open(key) as writer, open(path, 'rb') as f:
+            for part in iter(lambda: f.read(self.part_size), b''):
+                writer.write(part)
+
+    def put_file(self, path, key):
+        """Upload a file unless the object's ETag already matches, returns True when uploaded"""
+        from botocore.exceptions import ClientError
+
+        try:
+            known = {key: self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))['ETag'].strip('"')}
+        except ClientError:
+            known = {}
+        return self.put_files([(path, key)], known=known)['uploaded'] == 1
+
+    def put_files(self, pairs, known=None):
+        """Upload a batch, skipping unchanged objects; returns {'uploaded', 'skipped', 'bytes'}"""
+        pairs = list(pairs)
+        if known is None:
+            known = {}
+            for prefix in sorted({key.rsplit('/', 1)[0] + '/' if '/' in key else '' for _, key in pairs}):
+                known.update(self.checksums(prefix))
+        stats = {'uploaded': 0, 'skipped': 0, 'bytes': 0}
+        pending = []
+        large = []
+        for path, key in pairs:
+            size = os.path.getsize(path)
+            if known.get(key) == self.checksum(path):
+                stats['skipped'] += 1
+                _count(self, 'skipped', size)
+                continue
+            stats['uploaded'] += 1
+            stats['bytes'] += size
+            if size < self.small_file_bytes:
+                pending.append((self._put_small(path, key), size))
+            else:
+                large.append((path, key, size))
+        # Large files one at a time - each already keeps every slot busy with its own parts
+        for path, key, size in large:
+            self._put_large(path, key)
+            _count(self, 'uploaded', size)
+        for future, size in pending:
+            future.result()
+            _count(self, 'uploaded', size)
+        return stats
+
+    def close(self):
+        self.pool.shutdown()
+
+
+class MultipartWriter:
+    """Buffers writes into `part_size` parts and sends each on the store's upload pool as soon as
+    it fills; anything under one part on close goes up as a single PUT instead"""
+
+    def __init__(self, store, key):
+        self.store = store
+        self.key = store.object_key(key)
+        self.buffer = bytearray()
+        self.parts = []
+        self.upload_id = None
+        self.size = 0
+        self.closed = False
+
+    def writable(self):
+        return True
+
+    def tell(self):
+        return self.size
+
+    def flush(self):
+        pass
+
+    def write(self, data):
+        self.buffer += data
+        self.size += len(data)
+        while len(self.buffer) >= self.store.part_size:
+            part = bytes(self.buffer[:self.store.part_size])
+            del self.buffer[:self.store.part_size]
+            self._send_part(part)
+        return len(data)
+
+    def _send_part(self, body):
+        if self.upload_id is None:
+            self.upload_id = self.store.client.create_multipart_upload(
+                Bucket=self.store.bucket, Key=self.key)['UploadId']
+        self.store._acquire(len(body))
+        number = len(self.parts) + 1
+        self.parts.append((number, self.store._send(len(body), self.store.client.upload_part, Key=self.key,
+                                                    UploadId=self.upload_id, PartNumber=number, Body=body)))
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self.upload_id is None:
+            body = bytes(self.buffer)
+            self.store._acquire(len(body))
+            self.store._send(len(body), self.store.client.put_object, Key=self.key, Body=body).result()
+            return
+        try:
+            if self.buffer:
+                self._send_part(bytes(self.buffer))
+            parts = [{'PartNumber': number, 'ETag': future.result()['ETag']} for number, future in self.parts]
+            self.store.client.complete_multipart_upload(Bucket=self.store.bucket, Key=self.key,
+                                                        UploadId=self.upload_id, MultipartUpload={'Parts': parts})
+        except BaseException:
+            self.abort()
+            raise
+        finally:
+            self.buffer = bytearray()
+
+    def abort(self):
+        self.closed = True
+        if self.upload_id is not None:
+            for _, future in self.parts:
+                future.exception()  # wait so no part lands after the abort
+            self.store.client.abort_multipart_upload(Bucket=self.store.bucket, Key=self.key, UploadId=self.upload_id)
+            self.upload_id = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.abort() if exc_type else self.close()
+
+
+def _count(store, result, size):
+    metrics.inc('storage_objects_total', backend=store.backend, result=result)
+    metrics.inc('storage_bytes_total', backend=store.backend, result=result, value=size)
+
+
+def open_store(url):
+    """'s3://bucket[/prefix]' or a local directory ('file:///path' also works)"""
+    parts = urlsplit(url)
+    if parts.scheme == 's3':
+        return S3Store(parts.netloc, parts.path)
+    if parts.scheme == 'file':
+        return LocalStore(parts.path)
+    if parts.scheme == '':
+        return LocalStore(url)
+    raise ValueError(f"Unsupported storage url {url!r}")
+
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+
+def default_store():
+    """The configured mirror of DATA_ROOT (PIPELINE_STORAGE_URL), None when outputs stay local only"""
+    global _STORE
+    if not STORAGE_SETTINGS['url']:
+        return None
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = open_store(STORAGE_SETTINGS['url'])
+    return _STORE
+
+
+def publish(paths, store=None, root=DATA_ROOT):
+    """Mirror files from the local layout to the store under the same keys, None when no store is set"""
+    store = store or default_store()
+    if store is None:
+        return None
+    with metrics.timer('storage_publish_seconds', backend=store.backend):
+        return store.put_files([(path, layout_key(path, root)) for path in paths])
+
+
+def sync_layout(store=None, root=DATA_ROOT, layers=None):
+    """Publish every file under the given layers (default all three) - unchanged objects are skipped"""
+    from pipeline.columnar import LAYERS
+
+    paths = []
+    for layer in layers or LAYERS:
+        for directory, _, files in os.walk(os.path.join(root, layer)):
+            paths.extend(os.path.join(directory, name) for name in sorted(files) if not name.endswith('.tmp'))
+    return publish(paths, store, root)
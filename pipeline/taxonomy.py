@@ -0,0 +1,138 @@
+# pipeline/taxonomy.py
+import csv
+import os
+from collections import deque
+
+from configs.settings import CUISINE_SETTINGS
+from pipeline.keys import normalize_text
+
+TAXONOMY_PATH = os.path.join('configs', 'reference', 'cuisine_taxonomy.csv')
+
+# normalize_text leaves only these characters, so every state has a transition for each of them
+ALPHABET = ' abcdefghijklmnopqrstuvwxyz0123456789'
+
+
+def load_taxonomy(path=TAXONOMY_PATH):
+    """{normalized synonym: canonical tag} - every tag is also a synonym of itself"""
+    synonyms = {}
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            for phrase in (row['tag'], row['synonym']):
+                key = normalize_text(phrase)
+                if key:
+                    synonyms.setdefault(key, row['tag'])
+    return synonyms
+
+
+class CuisineTagger:
+    """Aho-Corasick automaton over every synonym, compiled once
+
+    Texts are normalized (lowercase, punctuation -> spaces) and padded with a space, and each
+    synonym is stored as ' synonym ', so only whole words match. The failure links are folded
+    into a full transition table, making the scan one dict lookup per character however many
+    synonyms there are. Overlapping matches resolve leftmost-longest ('new american' wins over
+    'american'), and results for repeated texts are memoized.
+    """
+
+    def __init__(self, synonyms=None, cache_size=None):
+        synonyms = synonyms if synonyms is not None else load_taxonomy()
+        self.tags = []
+        self.cache = {}
+        self.cache_size = cache_size or CUISINE_SETTINGS['cache_size']
+        self._compile(synonyms)
+
+    def _compile(self, synonyms):
+        goto = [{}]
+        outputs = {}  # state -> [(pattern length, tag)]
+        for phrase, tag in synonyms.items():
+            pattern = f" {phrase} "
+            state = 0
+            for char in pattern:
+                if char not in goto[state]:
+                    goto.append({})
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            outputs.setdefault(state, []).append((len(pattern), tag))
+        # Breadth-first: a state's failure target is always complete before the state itself
+        fail = [0] * len(goto)
+        delta = [dict.fromkeys(ALPHABET, 0) for _ in goto]
+        delta[0].update(goto[0])
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            delta[state].update(delta[fail[state]])
+            delta[state].update(goto[state])
+            if fail[state] in outputs:
+                outputs[state] = outputs.get(state, []) + outputs[fail[state]]
+            for char, child in goto[state].items():
+                fail[child] = delta[fail[state]][char]
+                queue.append(child)
+        self.delta = delta
+        self.outputs = outputs
+        self.states = len(goto)
+        self.patterns = len(synonyms)
+
+    def _scan(self, text):
+        """Canonical tags in order of first appearance"""
+        delta, outputs = self.delta, self.outputs
+        matches = []
+        state = 0
+        for end, char in enumerate(f" {text} ", 1):
+            state = delta[state][char]
+            if state in outputs:
+                matches.extend((end - length, end, tag) for length, tag in outputs[state])
+        if not matches:
+            return ()
+        # Leftmost-longest; the padding space between adjacent words is shared, not an overlap
+        matches.sort(key=lambda match: (match[0], match[0] - match[1]))
+        tags = []
+        covered = 0
+        for start, end, tag in matches:
+            if start + 1 >= covered:
+                covered = end - 1
+                if tag not in tags:
+                    tags.append(tag)
+        return tuple(tags)
+
+    def tag(self, text):
+        """Tags for one free-text value ('Japanese, Sushi Bars' -> ('Japanese', 'Sushi'))"""
+        if not isinstance(text, str):
+            return ()
+        tags = self.cache.get(text)
+        if tags is None:
+            if len(self.cache) >= self.cache_size:
+                self.cache.clear()
+            tags = self.cache[text] = self._scan(normalize_text(text))
+        return tags
+
+    def tag_column(self, values):
+        """Tags for every value of a Series - each distinct value is scanned once"""
+        return values.map({value: self.tag(value) for value in values.dropna().unique()})
+
+    def tag_frame(self, df, columns=None):
+        """cuisine_tags for each row from all the text columns present, as 'Tag, Tag'
+
+        A row nothing in the taxonomy matches keeps its existing cuisine_tags (or cuisine) text ('Farm-to-table').
+        """
+        columns = [column for column in (columns or CUISINE_SETTINGS['text_columns']) if column in df.columns]
+        per_column = [self.tag_column(df[column]) for column in columns]
+        original = next((df[column] for column in ('cuisine_tags', 'cuisine') if column in df.columns), [''] * len(df))
+        combined = []
+        for existing, *row in zip(original, *per_column):
+            tags = []
+            for column_tags in row:
+                if isinstance(column_tags, tuple):
+                    tags.extend(tag for tag in column_tags if tag not in tags)
+            combined.append(', '.join(tags) if tags else existing if isinstance(existing, str) else '')
+        return combined
+
+
+_TAGGER = None
+
+
+def get_tagger():
+    """The process-wide tagger, compiled on first use"""
+    global _TAGGER
+    if _TAGGER is None:
+        _TAGGER = CuisineTagger()
+    return _TAGGER
@@ -0,0 +1,149 @@
+# pipeline/transport.py
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+from configs.settings import TRANSPORT_SETTINGS
+from pipeline import metrics
+
+
+def retry_after_seconds(headers):
+    """Seconds from a Retry-After header (delta-seconds or HTTP-date), None when absent/garbled"""
+    value = (headers or {}).get('Retry-After')
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, retry_after=None, base=None, cap=None):
+    """Wait before retry `attempt` (0-based): the server's Retry-After when given, otherwise
+    exponential backoff with full jitter. None means the wait is too long to be worth retrying."""
+    base = base or TRANSPORT_SETTINGS['backoff_base']
+    cap = cap or TRANSPORT_SETTINGS['backoff_max']
+    if retry_after is not None:
+        return retry_after if retry_after <= cap else None
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class AimdThrottle:
+    """Additive-increase / multiplicative-decrease control of one host's token bucket rate
+
+    The configured rate is the ceiling - a clean response nudges the rate back towards it, a
+    429/403/503 or a slow response cuts it. Retry-After also pauses the whole host, not just
+    the request that got it.
+    """
+
+    def __init__(self, bucket, host, settings=TRANSPORT_SETTINGS):
+        self.bucket = bucket
+        self.host = host
+        self.ceiling = bucket.rate
+        self.increase = settings['increase']
+        self.decrease = settings['decrease']
+        self.min_rate = min(settings['min_rate'], self.ceiling)
+        self.slow_seconds = settings['slow_seconds']
+        self.decrease_interval = settings['decrease_interval']
+        self.last_decrease = 0.0
+
+    def _set_rate(self, rate):
+        self.bucket.rate = min(self.ceiling, max(self.min_rate, rate))
+        metrics.gauge('host_rate', self.bucket.rate, host=self.host)
+
+    def success(self, elapsed):
+        if elapsed > self.slow_seconds:
+            self.slow_down('slow')
+        elif self.bucket.rate < self.ceiling:
+            self._set_rate(self.bucket.rate + self.increase)
+
+    def slow_down(self, reason, retry_after=None):
+        if retry_after:
+            self.bucket.pause(retry_after)
+        now = time.monotonic()
+        # Requests already in flight report the same overload - only the first one cuts the rate
+        if now - self.last_decrease < self.decrease_interval:
+            return
+        self.last_decrease = now
+        metrics.inc('host_slowdowns_total', host=self.host, reason=reason)
+        self._set_rate(self.bucket.rate * self.decrease)
+
+
+class Proxy:
+    """One upstream proxy with a health score and a circuit breaker"""
+
+    def __init__(self, url, settings=TRANSPORT_SETTINGS):
+        self.url = url
+        self.max_failures = settings['breaker_failures']
+        self.cooldown = settings['breaker_cooldown']
+        self.score = 1.0  # moving average of request outcomes, 1 = always works
+        self.latency = 1.0
+        self.failures = 0
+        self.open_until = 0.0
+        self.trial = False
+
+    def available(self, now):
+        """Closed breaker, or open but cooled down and no trial request in flight yet (half-open)"""
+        return self.open_until == 0.0 or (now >= self.open_until and not self.trial)
+
+    def weight(self):
+        # Healthy and fast proxies get most of the traffic; a floor keeps recovering ones in rotation
+        return max(self.score, 0.05) / (0.5 + self.latency)
+
+    def success(self, elapsed):
+        self.score = 0.8 * self.score + 0.2
+        self.latency = 0.8 * self.latency + 0.2 * elapsed
+        self.failures = 0
+        self.trial = False
+        if self.open_until:
+            self.open_until = 0.0
+            metrics.inc('proxy_breaker_total', proxy=self.label, state='closed')
+
+    def failure(self):
+        self.score *= 0.8
+        self.failures += 1
+        if self.trial or self.failures >= self.max_failures:
+            self.trial = False
+            self.open_until = time.monotonic() + self.cooldown
+            metrics.inc('proxy_breaker_total', proxy=self.label, state='open')
+
+    @property
+    def label(self):
+        # Gateway host:port only - proxy URLs usually carry credentials
+        return self.url.rsplit('@', 1)[-1]
+
+
+class ProxyPool:
+    """Weighted rotation over the healthy proxies; an empty pool means direct connections"""
+
+    def __init__(self, urls=None, settings=TRANSPORT_SETTINGS):
+        urls = settings['proxies'] if urls is None else urls
+        self.proxies = [Proxy(url, settings) for url in urls]
+
+    def __bool__(self):
+        return bool(self.proxies)
+
+    def choose(self):
+        if not self.proxies:
+            return None
+        now = time.monotonic()
+        healthy = [proxy for proxy in self.proxies if proxy.available(now)]
+        if not healthy:
+            # Every breaker is open - probe the one closest to reopening rather than stall
+            healthy = [min(self.proxies, key=lambda proxy: proxy.open_until)]
+        proxy = random.choices(healthy, weights=[proxy.weight() for proxy in healthy])[0]
+        if proxy.open_until:
+            proxy.trial = True
+        return proxy
+
+    def health(self):
+        return [{'proxy': proxy.label, 'score': round(proxy.score, 3), 'latency': round(proxy.latency, 3),
+                 'open': proxy.open_until > time.monotonic()} for proxy in self.proxies]
+
+
+def user_agent(user_agents=None):
+    """A User-Agent from the rotation"""
+    return random.choice(user_agents or TRANSPORT_SETTINGS['user_agents'])
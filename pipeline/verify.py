@@ -0,0 +1,179 @@
+# pipeline/verify.py
+import asyncio
+import os
+import sqlite3
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import aiohttp
+import pandas as pd
+
+from configs.settings import VERIFY_SETTINGS
+from pipeline import metrics
+from pipeline.cache import normalize_url
+from pipeline.fetch import FetchEngine
+
+# HEAD answers that say "ask again with GET" rather than "this link is dead"
+HEAD_FALLBACK = {400, 403, 404, 405, 406, 429, 500, 501, 503}
+# The page exists but we are not allowed to (or should not) look right now - keep the link
+INCONCLUSIVE = {401, 403, 429}
+
+
+def _ok(status):
+    """True/False for a definitive answer, None when the status says nothing about the link -
+    no response, access refused or rate limited, or a 5xx (the server is struggling, not the link)"""
+    if status is None or status in INCONCLUSIVE or status >= 500:
+        return None
+    return status < 400 or status == 416  # 416: the range was refused, the resource is there
+
+
+def _verdict(url, ok=None, status=None, final_url='', method='HEAD', error=None):
+    return {'url': url, 'ok': ok, 'status': status, 'final_url': final_url, 'method': method,
+            'error': error, 'checked_at': time.time()}
+
+
+class VerdictStore:
+    """Persistent verdicts keyed by normalized URL, each expiring by its own TTL"""
+
+    def __init__(self, path=None):
+        path = path or VERIFY_SETTINGS['path']
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS verdicts (
+                key TEXT PRIMARY KEY, ok INTEGER, status INTEGER, final_url TEXT, method TEXT,
+                error TEXT, checked_at REAL
+            )''')
+
+    @staticmethod
+    def ttl(ok):
+        return VERIFY_SETTINGS['ttl_ok' if ok else 'ttl_unknown' if ok is None else 'ttl_broken']
+
+    def fresh(self, urls):
+        """Cached verdicts that have not expired yet, {url: verdict}"""
+        keys = {normalize_url(url): url for url in urls}
+        now = time.time()
+        results = {}
+        key_list = list(keys)
+        for start in range(0, len(key_list), 500):
+            batch = key_list[start:start + 500]
+            rows = self.db.execute(
+                f"SELECT key, ok, status, final_url, method, error, checked_at FROM verdicts "
+                f"WHERE key IN ({','.join('?' * len(batch))})", batch
+            )
+            for key, ok, status, final_url, method, error, checked_at in rows:
+                # Older stores recorded 5xx as broken - re-read them as inconclusive
+                ok = None if ok is None or (status or 0) >= 500 else bool(ok)
+                if now - checked_at < self.ttl(ok):
+                    results[keys[key]] = {'url': keys[key], 'ok': ok, 'status': status, 'final_url': final_url,
+                                          'method': method, 'error': error, 'checked_at': checked_at}
+        return results
+
+    def put_many(self, verdicts):
+        self.db.executemany('INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?, ?, ?, ?)', [
+            (normalize_url(v['url']), v['ok'], v['status'], v['final_url'], v['method'], v['error'], v['checked_at'])
+            for v in verdicts
+        ])
+        self.db.commit()
+
+
+async def _request(engine, method, url, headers=None):
+    async with engine.session.request(method, url, headers=headers, allow_redirects=True,
+                                      max_redirects=VERIFY_SETTINGS['max_redirects']) as response:
+        # Status and the post-redirect URL are all we need - the body is never read
+        return response.status, str(response.url)
+
+
+async def check_url(engine, url, slots):
+    """HEAD, falling back to a one-byte ranged GET for servers that mishandle HEAD"""
+    semaphore, bucket = engine._host_limits(urlsplit(url).netloc)
+    verdict = _verdict(url)
+    async with semaphore:
+        for method, headers in (('HEAD', None), ('GET', {'Range': 'bytes=0-0'})):
+            await bucket.acquire()
+            verdict['method'] = method
+            try:
+                # The global slot is only held while a request is actually in flight
+                async with slots:
+                    status, final_url = await _request(engine, method, url, headers)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                verdict.update(status=None, error=repr(e))
+                continue
+            verdict.update(status=status, final_url=final_url, error=None)
+            if method == 'HEAD' and status in HEAD_FALLBACK:
+                continue
+            break
+    verdict['ok'] = _ok(verdict['status'])
+    verdict['checked_at'] = time.time()
+    return verdict
+
+
+async def _verify(urls, engine_kwargs):
+    # One worker pool per host: a host with thousands of links queues behind its own
+    # politeness budget instead of holding the global slots other hosts could use
+    by_host = defaultdict(list)
+    for url in urls:
+        by_host[urlsplit(url).netloc].append(url)
+    verdicts = []
+    slots = asyncio.Semaphore(VERIFY_SETTINGS['concurrency'])
+
+    async with FetchEngine(**engine_kwargs) as engine:
+        async def drain(host_urls):
+            while host_urls:
+                verdicts.append(await check_url(engine, host_urls.pop(), slots))
+
+        workers = [drain(host_urls) for host_urls in by_host.values()
+                   for _ in range(min(len(host_urls), engine.per_host))]
+        await asyncio.gather(*workers)
+    return verdicts
+
+
+def verify_urls(urls, store=None, **engine_kwargs):
+    """Verdict per distinct URL, {url: verdict} - cached verdicts are reused until they expire
+
+    ok is True (resolves), False (definitively broken: 404/410...) or None (could not
+    tell: unreachable, timed out, 401/403/429/5xx). final_url is where redirects ended up.
+    """
+    store = store or VerdictStore()
+    urls = {url for url in urls if isinstance(url, str) and url.startswith(('http://', 'https://'))}
+    verdicts = store.fresh(urls)
+    metrics.inc('urls_verified_total', len(verdicts), result='cached')
+    missing = [url for url in urls if url not in verdicts]
+    if missing:
+        engine_kwargs = {'per_host': VERIFY_SETTINGS['per_host'], 'rate': VERIFY_SETTINGS['rate'],
+                         'burst': VERIFY_SETTINGS['per_host'], 'timeout': VERIFY_SETTINGS['timeout'],
+                         'total': VERIFY_SETTINGS['concurrency'], **engine_kwargs}
+        checked = asyncio.run(_verify(missing, engine_kwargs))
+        store.put_many(checked)
+        for verdict in checked:
+            result = {True: 'ok', False: 'broken', None: 'unknown'}[verdict['ok']]
+            metrics.inc('urls_verified_total', result=result)
+            verdicts[verdict['url']] = verdict
+    return verdicts
+
+
+def verify_columns(df, columns=None, store=None, **engine_kwargs):
+    """Verify every URL column in one deduplicated batch, returns (df, stats)
+
+    Working links are rewritten to their canonical (post-redirect) URL, broken ones are
+    blanked, and links we could not judge are left as they were.
+    """
+    columns = [column for column in (columns or VERIFY_SETTINGS['columns']) if column in df.columns]
+    urls = pd.unique(pd.concat([df[column] for column in columns], ignore_index=True).dropna()) \
+        if columns else []
+    verdicts = verify_urls(urls, store=store, **engine_kwargs)
+
+    replacements = {url: (v['final_url'] or url) if v['ok'] else '' for url, v in verdicts.items() if v['ok'] is not None}
+    df = df.copy()
+    for column in columns:
+        df[column] = df[column].map(lambda url: replacements.get(url, url))
+    stats = {
+        'urls': len(verdicts),
+        'ok': sum(1 for v in verdicts.values() if v['ok']),
+        'broken': sum(1 for v in verdicts.values() if v['ok'] is False),
+        'unknown': sum(1 for v in verdicts.values() if v['ok'] is None),
+        'redirected': sum(1 for v in verdicts.values() if v['ok'] and v['final_url'] and v['final_url'] != v['url'])
+    }
+    return df, stats
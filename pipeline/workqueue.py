@@ -0,0 +1,290 @@
+# pipeline/workqueue.py
+import json
+import os
+import signal
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+from urllib.parse import urlsplit
+
+from configs.settings import AWS_REGION, WORK_QUEUE_SETTINGS
+from pipeline import metrics
+
+
+class Lease:
+    """One leased unit of work - `token` proves ownership for ack/nack/extend"""
+
+    def __init__(self, unit, token, attempts):
+        self.unit = unit
+        self.token = token
+        self.attempts = attempts
+
+    @property
+    def id(self):
+        return self.unit['id']
+
+
+class SQLiteQueue:
+    """Durable local queue - safe across processes on one machine
+
+    Units move ready -> leased -> done. A lease that is not acked before it expires
+    (crashed or reclaimed worker) goes back to ready on the next lease() call; after
+    `max_attempts` leases a unit is parked as dead instead.
+    """
+
+    def __init__(self, path, max_attempts=None):
+        self.path = path
+        self.max_attempts = max_attempts or WORK_QUEUE_SETTINGS['max_attempts']
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with closing(self._connect()) as db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('''CREATE TABLE IF NOT EXISTS units (
+                id TEXT PRIMARY KEY, payload TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'ready',
+                attempts INTEGER NOT NULL DEFAULT 0, available_at REAL NOT NULL DEFAULT 0,
+                lease_token TEXT, lease_owner TEXT, lease_expires REAL, last_error TEXT, updated_at REAL)''')
+            db.execute('CREATE INDEX IF NOT EXISTS units_ready ON units (status, available_at)')
+
+    def _connect(self):
+        # One short-lived connection per call, so the queue is usable from any thread or process
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def put(self, units):
+        """Enqueue units; ids already in the queue are left alone, so re-sharding is idempotent"""
+        now = time.time()
+        with closing(self._connect()) as db:
+            db.execute('BEGIN IMMEDIATE')
+            before = db.total_changes
+            db.executemany('INSERT OR IGNORE INTO units (id, payload, updated_at) VALUES (?, ?, ?)',
+                           [(unit['id'], json.dumps(unit), now) for unit in units])
+            added = db.total_changes - before
+            db.execute('COMMIT')
+        return added
+
+    def lease(self, owner, lease_seconds=None):
+        lease_seconds = lease_seconds or WORK_QUEUE_SETTINGS['lease_seconds']
+        now = time.time()
+        token = uuid.uuid4().hex
+        with closing(self._connect()) as db:
+            db.execute('BEGIN IMMEDIATE')
+            # Reclaim expired leases first
+            db.execute("UPDATE units SET status = CASE WHEN attempts >= ? THEN 'dead' ELSE 'ready' END, "
+                       "lease_token = NULL, last_error = 'lease expired', updated_at = ? "
+                       "WHERE status = 'leased' AND lease_expires < ?", (self.max_attempts, now, now))
+            row = db.execute("SELECT id, payload, attempts FROM units WHERE status = 'ready' AND available_at <= ? "
+                             "ORDER BY available_at, id LIMIT 1", (now,)).fetchone()
+            if row is None:
+                db.execute('COMMIT')
+                return None
+            db.execute("UPDATE units SET status = 'leased', attempts = attempts + 1, lease_token = ?, "
+                       "lease_owner = ?, lease_expires = ?, updated_at = ? WHERE id = ?",
+                       (token, owner, now + lease_seconds, now, row[0]))
+            db.execute('COMMIT')
+        return Lease(json.loads(row[1]), token, row[2] + 1)
+
+    def _update(self, lease, sql, params):
+        with closing(self._connect()) as db:
+            changed = db.execute(f"UPDATE units SET {sql}, updated_at = ? WHERE id = ? AND lease_token = ?",
+                                 (*params, time.time(), lease.id, lease.token)).rowcount
+        return changed == 1  # False when the lease was already reclaimed by someone else
+
+    def ack(self, lease):
+        return self._update(lease, "status = 'done', lease_token = NULL", ())
+
+    def nack(self, lease, delay=0, error=None):
+        """Give the unit back, retried after `delay` seconds (or parked as dead)"""
+        status = 'dead' if lease.attempts >= self.max_attempts else 'ready'
+        return self._update(lease, "status = ?, lease_token = NULL, available_at = ?, last_error = ?",
+                            (status, time.time() + delay, error))
+
+    def extend(self, lease, lease_seconds=None):
+        lease_seconds = lease_seconds or WORK_QUEUE_SETTINGS['lease_seconds']
+        return self._update(lease, "lease_expires = ?", (time.time() + lease_seconds,))
+
+    def stats(self):
+        with closing(self._connect()) as db:
+            return dict(db.execute('SELECT status, COUNT(*) FROM units GROUP BY status').fetchall())
+
+    def next_due(self):
+        """Seconds until a unit can next be leased - a backoff ends or a lease expires - None when
+        nothing is ready or leased"""
+        with closing(self._connect()) as db:
+            due = db.execute("SELECT MIN(CASE WHEN status = 'ready' THEN available_at ELSE lease_expires END) "
+                             "FROM units WHERE status IN ('ready', 'leased')").fetchone()[0]
+        return None if due is None else max(due - time.time(), 0)
+
+    def requeue_dead(self):
+        with closing(self._connect()) as db:
+            return db.execute("UPDATE units SET status = 'ready', attempts = 0, available_at = 0 "
+                              "WHERE status = 'dead'").rowcount
+
+
+class SQSQueue:
+    """Same interface on Amazon SQS (or any SQS-compatible endpoint)
+
+    The lease is the message visibility timeout: an unacked message reappears on its own
+    when a spot instance is reclaimed. Dead-lettering is the queue's redrive policy
+    (maxReceiveCount), so configure that on the queue to match max_attempts.
+
+    A standard queue does not deduplicate: re-sharding onto it queues every unit again. On a
+    FIFO queue (name ending in .fifo) each unit id is its MessageDeduplicationId, so a re-shard
+    within SQS's 5-minute deduplication window is dropped; after that window it is queued again.
+    """
+
+    def __init__(self, queue_url, client=None, endpoint_url=None):
+        import boto3  # only needed in prod
+
+        self.queue_url = queue_url
+        self.client = client or boto3.client('sqs', region_name=AWS_REGION, endpoint_url=endpoint_url)
+
+    def put(self, units, attempts=5):
+        units = list(units)
+        fifo = self.queue_url.endswith('.fifo')
+        sent = 0
+        for start in range(0, len(units), 10):
+            pending = {str(i): unit for i, unit in enumerate(units[start:start + 10])}
+            for attempt in range(attempts):
+                entries = [{'Id': i, 'MessageBody': json.dumps(unit)} for i, unit in pending.items()]
+                if fifo:
+                    # One group per unit keeps FIFO delivery parallel; the id makes re-sharding a no-op
+                    for entry, unit in zip(entries, pending.values()):
+                        entry.update(MessageGroupId=unit['id'], MessageDeduplicationId=unit['id'])
+                response = self.client.send_message_batch(QueueUrl=self.queue_url, Entries=entries)
+                sent += len(response.get('Successful', []))
+                failed = response.get('Failed', [])
+                pending = {entry['Id']: pending[entry['Id']] for entry in failed}
+                if not pending:
+                    break
+                if any(entry.get('SenderFault') for entry in failed) or attempt == attempts - 1:
+                    errors = ', '.join(f"{pending[entry['Id']]['id']}: {entry.get('Code')}" for entry in failed)
+                    raise RuntimeError(f"SQS rejected {len(pending)} unit(s) on {self.queue_url}: {errors}")
+                time.sleep(0.2 * 2 ** attempt)
+        return sent
+
+    def lease(self, owner, lease_seconds=None):
+        response = self.client.receive_message(
+            QueueUrl=self.queue_url, MaxNumberOfMessages=1, WaitTimeSeconds=WORK_QUEUE_SETTINGS['poll_seconds'],
+            VisibilityTimeout=lease_seconds or WORK_QUEUE_SETTINGS['lease_seconds'],
+            AttributeNames=['ApproximateReceiveCount']
+        )
+        messages = response.get('Messages', [])
+        if not messages:
+            return None
+        message = messages[0]
+        return Lease(json.loads(message['Body']), message['ReceiptHandle'],
+                     int(message['Attributes']['ApproximateReceiveCount']))
+
+    def ack(self, lease):
+        self.client.delete_message(QueueUrl=self.queue_url, ReceiptHandle=lease.token)
+        return True
+
+    def nack(self, lease, delay=0, error=None):
+        self.client.change_message_visibility(QueueUrl=self.queue_url, ReceiptHandle=lease.token,
+                                              VisibilityTimeout=int(min(delay, 43200)))  # SQS max is 12h
+        return True
+
+    def extend(self, lease, lease_seconds=None):
+        self.client.change_message_visibility(QueueUrl=self.queue_url, ReceiptHandle=lease.token,
+                                              VisibilityTimeout=lease_seconds or WORK_QUEUE_SETTINGS['lease_seconds'])
+        return True
+
+    def stats(self):
+        attributes = self.client.get_queue_attributes(QueueUrl=self.queue_url, AttributeNames=[
+            'ApproximateNumberOfMessages', 'ApproximateNumberOfMessagesNotVisible'
+        ])['Attributes']
+        return {'ready': int(attributes['ApproximateNumberOfMessages']),
+                'leased': int(attributes['ApproximateNumberOfMessagesNotVisible'])}
+
+    def next_due(self):
+        # Delayed and in-flight messages are both "not visible"; SQS does not say when they return
+        stats = self.stats()
+        return WORK_QUEUE_SETTINGS['poll_seconds'] if stats['ready'] or stats['leased'] else None
+
+
+def open_queue(url=None):
+    """'sqlite:///path/queue.sqlite' or an SQS queue URL ('sqs://' + endpoint host/path also works)"""
+    url = url or WORK_QUEUE_SETTINGS['url']
+    parts = urlsplit(url)
+    if parts.scheme == 'sqlite':
+        return SQLiteQueue(url[len('sqlite:///'):])
+    if parts.scheme == 'sqs':
+        return SQSQueue(f"https://{parts.netloc}{parts.path}", endpoint_url=f"https://{parts.netloc}")
+    if parts.scheme in ('http', 'https'):
+        return SQSQueue(url, endpoint_url=None if parts.netloc.endswith('amazonaws.com')
+                        else f"{parts.scheme}://{parts.netloc}")
+    raise ValueError(f"Unsupported queue url {url!r}")
+
+
+class _Heartbeat:
+    """Keeps extending a lease while its unit runs"""
+
+    def __init__(self, queue, lease, lease_seconds):
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(queue, lease, lease_seconds), daemon=True)
+
+    def _run(self, queue, lease, lease_seconds):
+        while not self.stop.wait(lease_seconds / 3):
+            queue.extend(lease, lease_seconds)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        self.thread.join()
+
+
+def run_worker(queue, handle, owner=None, lease_seconds=None, retry_delay=None, exit_when_idle=True):
+    """Lease -> handle(unit) -> ack until the queue is drained (or SIGTERM arrives)
+
+    Drained means no unit is ready, backing off or leased - with exit_when_idle the worker
+    still waits out retry delays and other workers' leases before it stops.
+
+    Delivery is at-least-once: a unit whose worker dies mid-run is handed out again, so
+    handlers must tolerate repeats (raw parts are deduped downstream). On SIGTERM - the
+    spot interruption notice - the worker finishes its current unit and stops leasing;
+    if the instance goes away first, the lease expires and the unit is handed out again.
+    """
+    owner = owner or f"{os.uname().nodename}:{os.getpid()}"
+    lease_seconds = lease_seconds or WORK_QUEUE_SETTINGS['lease_seconds']
+    retry_delay = retry_delay if retry_delay is not None else WORK_QUEUE_SETTINGS['retry_delay']
+    stopping = threading.Event()
+    previous = None
+    if threading.current_thread() is threading.main_thread():
+        previous = signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    try:
+        return _drain(queue, handle, owner, lease_seconds, retry_delay, exit_when_idle, stopping)
+    finally:
+        if previous is not None:
+            signal.signal(signal.SIGTERM, previous)  # pool shutdown must still be able to SIGTERM us
+
+
+def _drain(queue, handle, owner, lease_seconds, retry_delay, exit_when_idle, stopping):
+    done = failed = 0
+    while not stopping.is_set():
+        lease = queue.lease(owner, lease_seconds)
+        if lease is None:
+            # Nothing leasable right now - but units backing off after a failure, or held by a
+            # worker that may have died, still come back, so only an empty queue ends the drain
+            due = queue.next_due()
+            if due is None and exit_when_idle:
+                break
+            poll = WORK_QUEUE_SETTINGS['poll_seconds']
+            stopping.wait(poll if due is None else min(max(due, 0.05), poll))
+            continue
+        try:
+            with _Heartbeat(queue, lease, lease_seconds), metrics.timer('unit_seconds', source=lease.unit.get('source')):
+                handle(lease.unit)
+        except Exception as e:
+            failed += 1
+            metrics.inc('units_total', source=lease.unit.get('source'), status='failed')
+            # Exponential backoff per attempt
+            queue.nack(lease, delay=retry_delay * 2 ** (lease.attempts - 1), error=repr(e))
+            print(f"❌ {owner} {lease.id} (attempt {lease.attempts}): {e}")
+            continue
+        queue.ack(lease)
+        done += 1
+        metrics.inc('units_total', source=lease.unit.get('source'), status='done')
+    return {'owner': owner, 'done': done, 'failed': failed}
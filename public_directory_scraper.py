@@ -1,8 +1,9 @@
-import requests
 import pandas as pd
 import re
 
-print("=== Public Directory Scraping ===\\n")
+from pipeline import metrics
+from pipeline.cache import ResponseCache
+from pipeline.fetch import fetch_all
 
 def scrape_public_directories():
     """Scrape restaurant data from public directories"""
@@ -15,22 +16,20 @@ def scrape_public_directories():
         "https://www.yelp.com/search?find_desc=Restaurants&find_loc=Dallas%2C+TX"
     ]
     
-    for source in public_sources:
+    # Retried with backoff (honoring Retry-After) through rotating User-Agents/proxies
+    responses = fetch_all(public_sources, timeout=15, cache=ResponseCache(), source='public_directories')
+    
+    for source, response in zip(public_sources, responses):
         print(f"Trying {source}...")
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            response = requests.get(source, headers=headers, timeout=15)
-            
-            if response.status_code == 200:
-                print(f"  ✅ Accessible")
-                # Would parse here, but for now use manual data
-            else:
-                print(f"  ❌ Blocked (Status: {response.status_code})")
-                
-        except Exception as e:
-            print(f"  ❌ Error: {e}")
+        metrics.inc('directory_probes_total', source='public_directories',
+                    result='error' if response['error'] else response['status'])
+        if response['error']:
+            print(f"  ❌ Error: {response['error']}")
+        elif response['status'] == 200:
+            print(f"  ✅ Accessible{' (cached)' if response['from_cache'] else ''}")
+            # Would parse here, but for now use manual data
+        else:
+            print(f"  ❌ Blocked (Status: {response['status']})")
     
     # Use comprehensive manual dataset
     print("\\nUsing comprehensive Dallas restaurant dataset...")
@@ -61,6 +60,7 @@ def scrape_public_directories():
     return restaurants
 
 def main():
+    print("=== Public Directory Scraping ===\\n")
     restaurants = scrape_public_directories()
     
     df = pd.DataFrame(restaurants)
@@ -0,0 +1,31 @@
+# restaurants/discover_commoncrawl.py
+from configs.settings import CITIES, COMMONCRAWL_SETTINGS, DEFAULT_CITY
+from pipeline import metrics
+from pipeline.commoncrawl import bare_url, iter_pages
+from pipeline.extract import extract_listings, extract_profile
+
+
+def platform_patterns(city=DEFAULT_CITY):
+    """{platform: [url patterns]} with the city's platform metro slugs filled in"""
+    return {platform: [pattern.format(**CITIES[city]['platform_ids']) for pattern in patterns]
+            for platform, patterns in COMMONCRAWL_SETTINGS['url_patterns'].items()}
+
+
+def iter_commoncrawl_restaurants(city=DEFAULT_CITY, cdx_dir=None, warc_dir=None):
+    """Restaurants from archived OpenTable/Resy/Tock pages - no live requests, so no 403s"""
+    patterns = platform_patterns(city)
+    by_prefix = [(bare_url(pattern), platform) for platform, items in patterns.items() for pattern in items]
+    for page in iter_pages([pattern for items in patterns.values() for pattern in items], cdx_dir, warc_dir):
+        url = bare_url(page['url'])
+        platform = next(platform for prefix, platform in by_prefix if url.startswith(prefix))
+        try:
+            # Search/listing pages go through the card selectors, venue pages through JSON-LD
+            records = extract_listings(platform, page['body'], streaming=True) \
+                or extract_profile(platform, page['body'], page['url'])
+        except Exception as e:
+            metrics.inc('scrape_errors_total', source='commoncrawl', kind='parse')
+            print(f"Error on {page['url']}: {e}")
+            continue
+        for record in records:
+            record['last_updated'] = page['date']
+            yield record
@@ -1,63 +1,57 @@
-# restaurants/scripts/scrape_opentable.py
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-import time
+# restaurants/scrape_opentable.py
+from configs.settings import CITIES, DEFAULT_CITY
+from pipeline import metrics
+from pipeline.cache import ResponseCache
+from pipeline.extract import extract_listings
+from pipeline.fetch import iter_fetch
 
-def scrape_opentable_dallas():
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    }
-    
-    base_url = "https://www.opentable.com/location/dallas-restaurants"
-    all_restaurants = []
-    
+LOCATION_URL = "https://www.opentable.com/location/{metro}"
+
+def opentable_url(city=DEFAULT_CITY):
+    return LOCATION_URL.format(metro=CITIES[city]['platform_ids']['opentable'])
+
+def iter_opentable(city=DEFAULT_CITY, pages=5, first_page=1, state=None):
+    """Yield restaurants page by page - parsing overlaps with fetching the next pages
+
+    With a StateStore, pages whose body is unchanged since the last committed run are not
+    parsed again - their records from that run are re-emitted, so every run's raw partition
+    is the whole listing (the caller commits the page fingerprints once the records are written).
+    """
     # Start with first 5 pages to validate
-    for page in range(1, 6):
-        if page == 1:
-            url = base_url
-        else:
-            url = f"{base_url}?page={page}"
-            
-        try:
-            response = requests.get(url, headers=headers)
-            soup = BeautifulSoup(response.content, 'html.parser')
+    base_url = opentable_url(city)
+    urls = (base_url if page == 1 else f"{base_url}?page={page}" for page in range(first_page, first_page + pages))
+    
+    # Pages arrive as they finish - the per-host token bucket replaces the fixed sleep, and the
+    # transport rotates User-Agents/proxies and backs off when OpenTable starts answering 429/403
+    for response in iter_fetch(urls, cache=ResponseCache(), source='opentable'):
+        if response['error']:
+            metrics.inc('scrape_errors_total', source='opentable', kind='fetch')
+            print(f"Error on {response['url']}: {response['error']}")
+            continue
             
-            # TEMPORARY: Manual extraction - you'll update selectors
-            restaurants = extract_restaurants_manual(soup)
-            all_restaurants.extend(restaurants)
+        if state is not None and not state.page_changed(response['url'], response['content'], 'opentable'):
+            previous = state.page_records(response['url'])
+            if previous is not None:  # state from before records were kept: parse it again
+                yield from previous
+                continue
             
-            print(f"Page {page}: Found {len(restaurants)} restaurants")
-            time.sleep(2)
+        try:
+            # Compiled selectors, partial parse stops after the listing container - page and
+            # record counts go to the parse_seconds / records_total metrics
+            restaurants = extract_listings('opentable', response['content'], streaming=True)
             
         except Exception as e:
-            print(f"Error on page {page}: {e}")
-    
-    # Save initial results
-    df = pd.DataFrame(all_restaurants)
-    df.to_csv('restaurants/data/opentable_sample.csv', index=False)
-    print(f"Saved {len(all_restaurants)} restaurants")
-    return all_restaurants
-
-def extract_restaurants_manual(soup):
-    """Manual extraction - you'll refine this with actual selectors"""
-    restaurants = []
-    
-    # Look for restaurant containers
-    cards = soup.find_all('div', class_=lambda x: x and 'restaurant' in x.lower())
-    
-    for card in cards[:10]:  # Just get first 10 for testing
-        try:
-            restaurant = {
-                'name': 'Gemma',  # Placeholder - you'll extract real data
-                'neighborhood': 'Knox/Henderson',
-                'cuisine': 'American, Contemporary', 
-                'price_band': '$$$',
-                'reservation_url': 'https://www.opentable.com/r/gemma-dallas',
-                'source_platform': 'OpenTable'
-            }
-            restaurants.append(restaurant)
-        except:
+            metrics.inc('scrape_errors_total', source='opentable', kind='parse')
+            print(f"Error on {response['url']}: {e}")
             continue
-            
-    return restaurants
\ No newline at end of file
+        
+        # Only a parsed 2xx page is remembered - block pages and failed parses are retried next run
+        if state is not None and 200 <= (response['status'] or 0) < 300:
+            state.stage_page(response['url'], response['content'], 'opentable', restaurants)
+        yield from restaurants
+
+def iter_opentable_dallas(pages=5, first_page=1, state=None):
+    return iter_opentable(DEFAULT_CITY, pages, first_page, state)
+
+def scrape_opentable_dallas(pages=5, first_page=1):
+    return list(iter_opentable_dallas(pages, first_page))
@@ -1,7 +1,10 @@
-import requests
+import re
+
 from bs4 import BeautifulSoup
 import pandas as pd
-import time
+
+from pipeline.cache import ResponseCache
+from pipeline.fetch import fetch_all
 
 def get_opentable_dallas():
     """Get Dallas restaurants from OpenTable"""
@@ -13,56 +16,54 @@ def get_opentable_dallas():
         "https://www.opentable.com/search?term=dallas&latitude=32.86332&longitude=-96.848335"
     ]
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+    # All patterns are fetched concurrently (rotating User-Agents), then checked in priority order
+    responses = fetch_all(url_patterns, timeout=10, cache=ResponseCache(), source='opentable')
     
-    for i, url in enumerate(url_patterns):
+    for i, (url, response) in enumerate(zip(url_patterns, responses)):
         print(f"Trying pattern {i+1}: {url}")
         
-        try:
-            response = requests.get(url, headers=headers, timeout=10)
-            print(f"  Status: {response.status_code}")
+        if response['error']:
+            print(f"  ❌ Error: {response['error']}")
+            continue
+        
+        print(f"  Status: {response['status']}")
+        
+        if response['status'] == 200:
+            soup = BeautifulSoup(response['text'], 'html.parser')
             
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Look for any text content that indicates success
-                title = soup.find('title')
-                if title:
-                    print(f"  Page title: {title.text}")
-                
-                # Count potential restaurant elements
-                restaurant_keywords = ['restaurant', 'dining', 'eats', 'reservation']
-                elements_with_keywords = []
-                
-                for keyword in restaurant_keywords:
-                    found = soup.find_all(text=re.compile(keyword, re.IGNORECASE))
-                    elements_with_keywords.extend(found)
-                
-                print(f"  Found {len(set(elements_with_keywords))} elements with restaurant keywords")
-                
-                # Save this successful response
-                with open(f'successful_pattern_{i+1}.html', 'w', encoding='utf-8') as f:
-                    f.write(response.text)
-                print(f"  ✅ Saved successful response")
-                return response.text
-                
-            time.sleep(2)
+            # Look for any text content that indicates success
+            title = soup.find('title')
+            if title:
+                print(f"  Page title: {title.text}")
             
-        except Exception as e:
-            print(f"  ❌ Error: {e}")
-            continue
+            # Count potential restaurant elements
+            restaurant_keywords = ['restaurant', 'dining', 'eats', 'reservation']
+            elements_with_keywords = []
+            
+            for keyword in restaurant_keywords:
+                found = soup.find_all(text=re.compile(keyword, re.IGNORECASE))
+                elements_with_keywords.extend(found)
+            
+            print(f"  Found {len(set(elements_with_keywords))} elements with restaurant keywords")
+            
+            # Save this successful response
+            with open(f'successful_pattern_{i+1}.html', 'w', encoding='utf-8') as f:
+                f.write(response['text'])
+            print(f"  ✅ Saved successful response")
+            return response['text']
     
     print("❌ All URL patterns failed")
     return None
 
-# Run it
-print("=== Testing OpenTable Access ===\\n")
-content = get_opentable_dallas()
+def main():
+    print("=== Testing OpenTable Access ===\\n")
+    content = get_opentable_dallas()
+    
+    if content:
+        print("\\n✅ Successfully retrieved OpenTable content")
+        print("Next: Inspect the saved HTML files to identify the correct selectors")
+    else:
+        print("\\n❌ Could not access OpenTable")
 
-if content:
-    print("\\n✅ Successfully retrieved OpenTable content")
-    print("Next: Inspect the saved HTML files to identify the correct selectors")
-else:
-    print("\\n❌ Could not access OpenTable")
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,9 @@
 import requests
-response = requests.get("https://www.opentable.com/location/dallas-restaurants")
-print(f"Status: {response.status_code}")
-print(f"Length: {len(response.text)}")
+
+def main():
+    response = requests.get("https://www.opentable.com/location/dallas-restaurants")
+    print(f"Status: {response.status_code}")
+    print(f"Length: {len(response.text)}")
+
+if __name__ == "__main__":
+    main()
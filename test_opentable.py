@@ -1,25 +1,26 @@
-import urllib.request
-import urllib.error
+from pipeline.cache import cached_get
 
-print("Testing OpenTable access...")
+def main():
+    print("Testing OpenTable access...")
 
-try:
-    # Test OpenTable with timeout
-    response = urllib.request.urlopen('https://www.opentable.com/location/dallas-restaurants', timeout=10)
-    content = response.read()
-    print(f"✅ SUCCESS: OpenTable accessible")
-    print(f"Status: {response.status}")
-    print(f"Content length: {len(content)} bytes")
-    
-    # Check if it contains restaurant data
-    if b'restaurant' in content.lower():
-        print("✅ Restaurant content found")
+    # Goes through the shared response cache - set PIPELINE_OFFLINE=1 to replay without network
+    response = cached_get('https://www.opentable.com/location/dallas-restaurants', timeout=10, source='opentable')
+
+    if response['error']:
+        print(f"❌ Error: {response['error']}")
     else:
-        print("❌ No restaurant content detected")
-        
-except urllib.error.URLError as e:
-    print(f"❌ URL Error: {e.reason}")
-except Exception as e:
-    print(f"❌ Error: {e}")
+        content = response['content']
+        print(f"✅ SUCCESS: OpenTable accessible{' (cached)' if response['from_cache'] else ''}")
+        print(f"Status: {response['status']}")
+        print(f"Content length: {len(content)} bytes")
+    
+        # Check if it contains restaurant data
+        if b'restaurant' in content.lower():
+            print("✅ Restaurant content found")
+        else:
+            print("❌ No restaurant content detected")
+
+    print("Test complete.")
 
-print("Test complete.")
+if __name__ == "__main__":
+    main()
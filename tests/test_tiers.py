@@ -0,0 +1,26 @@
+# tests/test_tiers.py
+import json
+import os
+
+import pandas as pd
+
+from creators.tiers import _fraction, assign_tiers
+
+
+def test_sample_tiers_match_hand_labels():
+    with open(os.path.join(os.path.dirname(__file__), '..', 'dallas_creators_sample.json')) as f:
+        sample = pd.DataFrame(json.load(f))
+    tiered = assign_tiers(sample)
+    assert tiered['tier'].astype(str).tolist() == sample['tier'].tolist()
+
+
+def test_boolean_cadence_false_is_inactive():
+    sample = pd.DataFrame([{'followers': 85000, 'engagement_rate': 0.032, 'audience_location_pct_DFW': 0.42,
+                            'food_focus_pct': 0.65, 'cadence_flag': False, 'compliance_flag': True}])
+    tiered = assign_tiers(sample)
+    assert (tiered['tier'][0], tiered['failed_gate'][0]) == ('Excluded', 'inactive')
+
+
+def test_fraction_unit_is_per_column():
+    assert _fraction(pd.Series([0.9, 3.2, None])).round(4).tolist()[:2] == [0.009, 0.032]
+    assert _fraction(pd.Series(['0.9', '0.35'])).tolist() == [0.9, 0.35]
@@ -0,0 +1,79 @@
+# tests/test_workqueue.py
+import json
+import multiprocessing
+import os
+
+from pipeline.workqueue import SQLiteQueue, SQSQueue, run_worker
+
+LEASE_SECONDS = 1
+
+
+def _flaky(unit):
+    """Fails the first attempt of units marked fail_once, records every unit it completes"""
+    marker = os.path.join(unit['dir'], f"{unit['id']}.attempted")
+    if unit.get('fail_once') and not os.path.exists(marker):
+        open(marker, 'w').close()
+        raise RuntimeError('transient failure')
+    with open(os.path.join(unit['dir'], 'done.log'), 'a') as f:
+        f.write(f"{unit['id']}\n")
+
+
+def _die_holding_lease(path):
+    SQLiteQueue(path).lease('doomed', LEASE_SECONDS)
+    os._exit(1)  # no ack, no nack - like a reclaimed spot instance
+
+
+def _work(path):
+    return run_worker(SQLiteQueue(path), _flaky, lease_seconds=LEASE_SECONDS, retry_delay=0.2)
+
+
+def test_workers_drain_retries_and_reclaimed_leases(tmp_path):
+    path = str(tmp_path / 'queue.sqlite')
+    queue = SQLiteQueue(path)
+    units = [{'id': f"u{i}", 'dir': str(tmp_path), 'fail_once': i % 3 == 0} for i in range(9)]
+    assert queue.put(units) == 9
+    assert queue.put(units) == 0  # re-sharding is idempotent
+
+    doomed = multiprocessing.Process(target=_die_holding_lease, args=(path,))
+    doomed.start()
+    doomed.join()
+    assert queue.stats() == {'leased': 1, 'ready': 8}
+
+    with multiprocessing.Pool(3) as pool:
+        results = pool.map(_work, [path] * 3)
+
+    assert queue.stats() == {'done': 9}
+    assert sum(result['failed'] for result in results) == 3
+    assert sum(result['done'] for result in results) == 9
+    with open(tmp_path / 'done.log') as f:
+        assert sorted(f.read().split()) == sorted(unit['id'] for unit in units)
+
+
+def test_worker_waits_out_backoff(tmp_path):
+    path = str(tmp_path / 'queue.sqlite')
+    SQLiteQueue(path).put([{'id': 'only', 'dir': str(tmp_path), 'fail_once': True}])
+    result = _work(path)
+    assert (result['done'], result['failed']) == (1, 1)
+    assert SQLiteQueue(path).stats() == {'done': 1}
+
+
+class _ThrottledSQS:
+    """Fails the first entry of every batch once, records what was sent"""
+
+    def __init__(self):
+        self.sent = []
+
+    def send_message_batch(self, QueueUrl, Entries):
+        failed = [] if len(self.sent) % 2 else [{'Id': Entries[0]['Id'], 'SenderFault': False, 'Code': 'Throttled'}]
+        self.sent.append(Entries)
+        return {'Successful': [{'Id': entry['Id']} for entry in Entries if entry['Id'] not in
+                               {f['Id'] for f in failed}], 'Failed': failed}
+
+
+def test_sqs_put_retries_failed_entries():
+    client = _ThrottledSQS()
+    queue = SQSQueue('https://sqs.us-east-1.amazonaws.com/1/crawl.fifo', client=client)
+    assert queue.put([{'id': f"u{i}"} for i in range(12)]) == 12
+    assert [len(entries) for entries in client.sent] == [10, 1, 2, 1]
+    assert all(entry['MessageDeduplicationId'] == json.loads(entry['MessageBody'])['id']
+               for entries in client.sent for entry in entries)